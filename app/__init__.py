@@ -1,18 +1,32 @@
+from datetime import time
 from flask import Flask
 from .config import Config
 
-from .logging_config import configure_logging
+from .logging_config import configure_logging, reiniciar_logging, detener_logging
+from .json_provider import ProveedorJSONRapido
+from .db_connection import get_pool, reset_pool
+from .servidor import registrar_recurso
+from .migraciones import registrar_comandos
+from .cache import CacheLRU
+from .metricas import RegistroMetricas, instalar_metricas
+from .trazas import instalar_trazas
 
 # DAOs
 from .dao.usuario_dao import UsuarioDAO
 from .dao.turno_dao import TurnoDAO
 from .dao.vehiculo_dao import VehiculoDAO
 from .dao.resultado_dao import ResultadoDAO
+from .dao.token_revocado_dao import TokenRevocadoDAO
+from .dao.agenda_dao import AgendaDAO
 
 # Servicios
 from .auth.auth_service import AuthService
+from .auth.ejecutor_hash import EjecutorHash
+from .auth.auth_required import EXTENSION_CACHE_TOKENS
 from .turnos.turno_service import TurnoService
 from .admin.admin_service import AdminService
+from .turnos.indice_disponibilidad import IndiceDisponibilidad
+from .turnos.agenda import Agenda
 
 # Controladores
 from .auth import auth_controller
@@ -23,22 +37,93 @@ from .admin import admin_controller
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = ProveedorJSONRapido(app)
 
     configure_logging(app)
+    registrar_comandos(app)
+
+    # Recursos por worker del servidor de producción: se recrean tras el fork y se liberan al
+    # salir (en orden inverso, así el logging es lo último en detenerse).
+    registrar_recurso(app, tras_fork=lambda: reiniciar_logging(app), al_salir=lambda: detener_logging(app))
+    registrar_recurso(app, tras_fork=reset_pool, al_salir=lambda: get_pool().close_all())
 
     usuario_dao = UsuarioDAO()
     turno_dao = TurnoDAO()
     vehiculo_dao = VehiculoDAO()
     resultado_dao = ResultadoDAO()
+    token_revocado_dao = TokenRevocadoDAO()
+
+    # Con agenda virtual no hay filas LIBRES que indexar: la disponibilidad sale de las reglas.
+    # Si no, el índice se crea antes que la cache: ambos observan TurnoDAO y el índice debe
+    # actualizarse antes de que la cache se invalide.
+    agenda = agenda_dao = indice_disponibilidad = None
+    if app.config['AGENDA_VIRTUAL']:
+        agenda_dao = AgendaDAO()
+        agenda = Agenda(
+            agenda_dao,
+            turno_dao,
+            hora_inicio=time.fromisoformat(app.config['AGENDA_HORA_INICIO']),
+            hora_fin=time.fromisoformat(app.config['AGENDA_HORA_FIN']),
+            intervalo_minutos=app.config['AGENDA_INTERVALO_MINUTOS'],
+            dias_semana={int(d) for d in app.config['AGENDA_DIAS_SEMANA'].split(',')},
+            capacidad=app.config['AGENDA_CAPACIDAD']
+        )
+    else:
+        indice_disponibilidad = IndiceDisponibilidad(
+            turno_dao,
+            hora_inicio=time.fromisoformat(app.config['AGENDA_HORA_INICIO']),
+            hora_fin=time.fromisoformat(app.config['AGENDA_HORA_FIN']),
+            intervalo_minutos=app.config['AGENDA_INTERVALO_MINUTOS'],
+            max_dias=app.config['INDICE_DISPONIBILIDAD_MAX_DIAS'],
+            ttl=app.config['INDICE_DISPONIBILIDAD_TTL']
+        )
+    cache_disponibilidad = CacheLRU(
+        max_entradas=app.config['DISPONIBILIDAD_CACHE_MAX_FECHAS'],
+        ttl=app.config['DISPONIBILIDAD_CACHE_TTL']
+    )
+
+    cache_resultados = CacheLRU(
+        max_entradas=app.config['RESULTADOS_CACHE_MAX_ENTRADAS'],
+        max_peso=app.config['RESULTADOS_CACHE_MAX_BYTES']
+    )
+
+    # bcrypt corre en un pool propio y acotado para no ocupar los workers de la API: los
+    # logins admitidos dejan siempre al menos un hilo del worker libre para el resto de los pedidos
+    ejecutor_hash = EjecutorHash(
+        max_workers=app.config['HASH_WORKERS'],
+        max_cola=app.config['HASH_COLA_MAX'],
+        max_admitidos=app.config['WEB_THREADS'] - 1
+    )
+
+    registrar_recurso(app, tras_fork=ejecutor_hash.reiniciar, al_salir=ejecutor_hash.cerrar)
 
-    auth_service_instance = AuthService(usuario_dao)
-    turno_service_instance = TurnoService(turno_dao, vehiculo_dao, resultado_dao)
-    admin_service_instance = AdminService(usuario_dao, turno_dao)
+    cache_tokens = CacheLRU(max_entradas=app.config['TOKEN_CACHE_MAX_ENTRADAS'])
+    app.extensions[EXTENSION_CACHE_TOKENS] = cache_tokens
+
+    auth_service_instance = AuthService(usuario_dao, ejecutor_hash, token_revocado_dao)
+    turno_service_instance = TurnoService(turno_dao, vehiculo_dao, resultado_dao,
+                                          cache_disponibilidad, indice_disponibilidad, cache_resultados, agenda)
+    admin_service_instance = AdminService(usuario_dao, turno_dao, indice_disponibilidad, ejecutor_hash, agenda_dao)
 
     auth_controller.auth_service = auth_service_instance
     turno_controller.turno_service = turno_service_instance
     admin_controller.admin_service = admin_service_instance
 
+    utils_controller.fuentes_estadisticas['pool_db'] = lambda: get_pool().stats()
+    utils_controller.fuentes_estadisticas['cache_disponibilidad'] = cache_disponibilidad.estadisticas
+    if indice_disponibilidad is not None:
+        utils_controller.fuentes_estadisticas['indice_disponibilidad'] = indice_disponibilidad.estadisticas
+    utils_controller.fuentes_estadisticas['cache_resultados'] = cache_resultados.estadisticas
+    utils_controller.fuentes_estadisticas['ejecutor_hash'] = ejecutor_hash.estadisticas
+    utils_controller.fuentes_estadisticas['cache_tokens'] = cache_tokens.estadisticas
+
+    instalar_trazas(app)
+
+    if app.config['METRICAS_HABILITADAS']:
+        registro_metricas = RegistroMetricas()
+        instalar_metricas(app, registro_metricas)
+        utils_controller.registro_metricas = registro_metricas
+
     app.register_blueprint(auth_controller.auth_bp)
     app.register_blueprint(turno_controller.turno_bp)
     app.register_blueprint(utils_controller.utils_bp)
@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify, current_app
 from app.auth.auth_required import token_required, roles_required
+from app.utils.streaming import respuesta_json_streaming
+from app.utils.paginacion import leer_limite, codificar_cursor, decodificar_cursor, HEADER_SIGUIENTE_CURSOR
 
 admin_service = None
 
@@ -25,7 +27,7 @@ def crear_usuario():
 
     usuario, error = admin_service.crear_usuario(username, password, rol)
     if error:
-        current_app.logger.error(f"Fallo al crear usuario: {error}")
+        current_app.logger.error("Fallo al crear usuario: %s", error)
         return jsonify({'message': error}), 409
 
     return jsonify({'message': f'Usuario "{usuario.username}" creado exitosamente.'}), 201
@@ -34,8 +36,33 @@ def crear_usuario():
 @token_required
 @roles_required(['ADMINISTRADOR'])
 def obtener_usuarios():
-    """ Devuelve la lista de todos los usuarios. """
-    usuarios = admin_service.consultar_usuarios()
+    """
+    Devuelve una página de usuarios ordenada por id.
+    Opcionales: limite, cursor. El cursor de la página siguiente viaja solo en el header
+    X-Siguiente-Cursor: la respuesta sigue siendo el array de usuarios de antes de paginar, para
+    no romper a los clientes existentes (/pendientes, que ya era un objeto, lo repite en el cuerpo).
+    Con stream=1 devuelve todos los usuarios como un stream JSON, sin paginar.
+    """
+    if request.args.get('stream') == '1':
+        return respuesta_json_streaming(
+            {'id_usuario': u.id_usuario, 'username': u.username, 'rol': u.rol}
+            for u in admin_service.iterar_usuarios()
+        )
+
+    try:
+        limite = leer_limite(request.args.get('limite'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    despues_de_id = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            despues_de_id = int(decodificar_cursor(cursor, 1)[0])
+        except (TypeError, ValueError):
+            return jsonify({'message': 'Cursor inválido.'}), 400
+
+    usuarios = admin_service.consultar_usuarios(limite, despues_de_id)
     lista_usuarios = [
         {
             'id_usuario': usuario.id_usuario,
@@ -43,16 +70,43 @@ def obtener_usuarios():
             'rol': usuario.rol
         } for usuario in usuarios
     ]
-    return jsonify(lista_usuarios), 200
+
+    response = jsonify(lista_usuarios)
+    if len(usuarios) == limite:
+        response.headers[HEADER_SIGUIENTE_CURSOR] = codificar_cursor(usuarios[-1].id_usuario)
+    return response, 200
 
 @admin_bp.route('/turnos/bulk-create', methods=['POST'])
 @token_required
 @roles_required(['ADMINISTRADOR'])
 def crear_turnos():
     """
-    Crea los turnos entre las 9:00 y las 18:00 para una fecha dada.
-    Requiere: fecha (YYYY-MM-DD)
+    Crea los turnos entre las 9:00 y las 18:00 para una fecha dada, o abre la agenda de un rango.
+    Requiere: fecha (YYYY-MM-DD), o desde y hasta (YYYY-MM-DD, inclusive).
+    Opcionales con rango: dias_semana (1 = lunes ... 7 = domingo, p. ej. 1,2,3,4,5),
+    hora_inicio, hora_fin (HH:MM) e intervalo (minutos). Repetir el alta no duplica turnos.
     """
+    desde_str = request.args.get('desde')
+    hasta_str = request.args.get('hasta')
+    if desde_str or hasta_str:
+        if not (desde_str and hasta_str):
+            return jsonify({'message': 'Faltan campos requeridos (desde, hasta).'}), 400
+
+        resumen, error = admin_service.crear_turnos_rango(
+            desde_str, hasta_str,
+            request.args.get('dias_semana'),
+            request.args.get('hora_inicio'),
+            request.args.get('hora_fin'),
+            request.args.get('intervalo')
+        )
+        if error:
+            return jsonify({'message': error}), 400
+
+        return jsonify({
+            'message': f"Se crearon {resumen['creados']} turnos entre {desde_str} y {hasta_str}.",
+            **resumen
+        }), 201
+
     fecha_str = request.args.get('fecha') # Formato: 'YYYY-MM-DD'
 
     if not fecha_str:
@@ -64,4 +118,65 @@ def crear_turnos():
 
     return jsonify({
         'message': f'Se crearon {turnos_creados} turnos para la fecha {fecha_str}.'
-    }), 201
\ No newline at end of file
+    }), 201
+
+@admin_bp.route('/indice-disponibilidad', methods=['GET'])
+@token_required
+@roles_required(['ADMINISTRADOR'])
+def verificar_indice_disponibilidad():
+    """
+    Verifica el índice de disponibilidad en memoria contra la DB para una fecha.
+    Requiere: fecha (YYYY-MM-DD). Opcional: reconstruir=1
+    """
+    fecha_str = request.args.get('fecha')
+    if not fecha_str:
+        return jsonify({'message': 'Faltan campos requeridos (fecha).'}), 400
+
+    reconstruir = request.args.get('reconstruir') == '1'
+    reporte, error = admin_service.verificar_indice_disponibilidad(fecha_str, reconstruir)
+    if error:
+        return jsonify({'message': error}), 400
+
+    return jsonify(reporte), 200
+
+@admin_bp.route('/agenda/excepciones', methods=['POST'])
+@token_required
+@roles_required(['ADMINISTRADOR'])
+def guardar_excepcion_agenda():
+    """
+    Define un feriado u horario especial de la agenda virtual.
+    Requiere: fecha (YYYY-MM-DD). Opcionales: hora_inicio y hora_fin (HH:MM; sin ellas el día se cierra), motivo
+    y capacidad (carriles por horario).
+    """
+    data = request.get_json()
+    fecha_str = data.get('fecha')
+    if not fecha_str:
+        return jsonify({'message': 'Faltan campos requeridos (fecha).'}), 400
+
+    excepcion, error = admin_service.guardar_excepcion_agenda(
+        fecha_str, data.get('hora_inicio'), data.get('hora_fin'), data.get('motivo'), data.get('capacidad')
+    )
+    if error:
+        return jsonify({'message': error}), 400
+
+    return jsonify({'message': f'Excepción de agenda guardada para {fecha_str}.', 'excepcion': excepcion.to_dict()}), 201
+
+@admin_bp.route('/agenda/excepciones', methods=['DELETE'])
+@token_required
+@roles_required(['ADMINISTRADOR'])
+def eliminar_excepcion_agenda():
+    """
+    Elimina la excepción de un día de la agenda virtual.
+    Requiere: fecha (YYYY-MM-DD)
+    """
+    fecha_str = request.args.get('fecha')
+    if not fecha_str:
+        return jsonify({'message': 'Faltan campos requeridos (fecha).'}), 400
+
+    eliminada, error = admin_service.eliminar_excepcion_agenda(fecha_str)
+    if error:
+        return jsonify({'message': error}), 400
+    if not eliminada:
+        return jsonify({'message': f'No hay una excepción de agenda para {fecha_str}.'}), 404
+
+    return jsonify({'message': f'Excepción de agenda eliminada para {fecha_str}.'}), 200
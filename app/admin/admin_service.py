@@ -1,22 +1,33 @@
-import bcrypt
 from datetime import time, timedelta
 from datetime import datetime
+from flask import current_app
 from ..dao.usuario_dao import UsuarioDAO
 from ..dao.turno_dao import TurnoDAO
-from ..models import Usuario, Turno
+from ..dao.agenda_dao import AgendaDAO
+from ..models import Usuario, Turno, ExcepcionAgenda
 
 class AdminService:
-    def __init__(self, usuario_dao: UsuarioDAO, turno_dao: TurnoDAO):
+    def __init__(self, usuario_dao: UsuarioDAO, turno_dao: TurnoDAO, indice_disponibilidad=None, ejecutor_hash=None,
+                 agenda_dao: AgendaDAO = None):
         self.usuario_dao = usuario_dao
         self.turno_dao = turno_dao
+        self.indice_disponibilidad = indice_disponibilidad
+        self.ejecutor_hash = ejecutor_hash
+        self.agenda_dao = agenda_dao
 
     def crear_usuario(self, username, password, rol):
-        """ Hashea la contraseña y crea un nuevo usuario. """
+        """
+        Hashea la contraseña y crea un nuevo usuario.
+        Lanza ColaHashLlenaError si el ejecutor de hashing está saturado.
+        """
 
         if self.usuario_dao.obtener_por_username(username):
             return None, f"El usuario '{username}' ya existe."
 
-        hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        if self.ejecutor_hash is None:
+            hashed_pw = Usuario.hash_password(password)
+        else:
+            hashed_pw = self.ejecutor_hash.ejecutar(Usuario.hash_password, password)
 
         nuevo_usuario = Usuario(
             username=username,
@@ -31,34 +42,39 @@ class AdminService:
 
         return None, "Error al crear el usuario en la base de datos."
 
-    def consultar_usuarios(self):
-        """ Devuelve la lista de todos los usuarios. """
-        usuarios = self.usuario_dao.obtener_todos()
+    def consultar_usuarios(self, limite: int, despues_de_id: int = None):
+        """ Devuelve una página de usuarios ordenada por id, a partir del id indicado. """
+        usuarios = self.usuario_dao.obtener_todos(limite, despues_de_id)
         return usuarios
 
-    def crear_turnos(self, fecha_str):
-        """ Crea múltiples turnos para una fecha y lista de horas dadas. """
-        try:
-            fecha_obj = datetime.strptime(fecha_str, '%Y-%m-%d').date()
-        except ValueError:
-            return None, "Formato de fecha inválido. Usar YYYY-MM-DD."
+    def iterar_usuarios(self):
+        """ Genera todos los usuarios ordenados por id, sin materializar la lista completa. """
+        return self.usuario_dao.iterar_todos()
+
+    def _generar_turnos(self, fecha_str):
+        """ Arma los turnos LIBRES del día con el horario de la agenda (AGENDA_*). Devuelve (turnos, error). """
+        return self._preparar_turnos_rango(fecha_str, fecha_str, None, None, None, None)
 
+    @staticmethod
+    def _generar_turnos_rango(desde, hasta, dias_semana, hora_inicio, hora_fin, intervalo):
+        """ Arma los turnos LIBRES de los días desde..hasta cuyo día ISO de la semana está en `dias_semana`. """
         turnos_a_crear = []
-        hora_inicio = time(9, 0)
-        hora_fin = time(18, 0)
-        intervalo = timedelta(minutes=30)
-
-        datetime_actual = datetime.combine(fecha_obj, hora_inicio)
-        datetime_fin = datetime.combine(fecha_obj, hora_fin)
-
-        while datetime_actual < datetime_fin:
-            turno = Turno(
-                matricula=None,
-                fecha=datetime_actual,
-                estado='LIBRE'
-            )
-            turnos_a_crear.append(turno)
-            datetime_actual += intervalo
+        dia = desde
+        while dia <= hasta:
+            if dia.isoweekday() in dias_semana:
+                datetime_actual = datetime.combine(dia, hora_inicio)
+                datetime_fin = datetime.combine(dia, hora_fin)
+                while datetime_actual < datetime_fin:
+                    turnos_a_crear.append(Turno(matricula=None, fecha=datetime_actual, estado='LIBRE'))
+                    datetime_actual += intervalo
+            dia += timedelta(days=1)
+        return turnos_a_crear
+
+    def crear_turnos(self, fecha_str):
+        """ Crea múltiples turnos para una fecha y lista de horas dadas. """
+        turnos_a_crear, error = self._generar_turnos(fecha_str)
+        if error:
+            return None, error
 
         if not turnos_a_crear:
             return 0, None
@@ -67,4 +83,110 @@ class AdminService:
         if rows_affected is not None:
             return rows_affected, None
 
-        return None, "Error al insertar los turnos en la base de datos."
\ No newline at end of file
+        return None, "Error al insertar los turnos en la base de datos."
+
+    def _preparar_turnos_rango(self, desde_str, hasta_str, dias_semana_str, hora_inicio_str, hora_fin_str,
+                               intervalo_minutos):
+        """ Valida los parámetros de crear_turnos_rango y arma los turnos. Devuelve (turnos, error). """
+        config = current_app.config
+        try:
+            desde = datetime.strptime(desde_str, '%Y-%m-%d').date()
+            hasta = datetime.strptime(hasta_str, '%Y-%m-%d').date()
+        except ValueError:
+            return None, "Formato de fecha inválido. Usar YYYY-MM-DD."
+        if hasta < desde:
+            return None, "La fecha 'hasta' no puede ser anterior a 'desde'."
+        if (hasta - desde).days + 1 > config['TURNOS_ALTA_MAX_DIAS']:
+            return None, f"El rango no puede superar los {config['TURNOS_ALTA_MAX_DIAS']} días."
+
+        error_agenda = "Parámetros de agenda inválidos. Usar dias_semana=1,...,7, horas HH:MM e intervalo en minutos."
+        try:
+            dias_semana = {int(d) for d in dias_semana_str.split(',')} if dias_semana_str else set(range(1, 8))
+            hora_inicio = time.fromisoformat(hora_inicio_str or config['AGENDA_HORA_INICIO'])
+            hora_fin = time.fromisoformat(hora_fin_str or config['AGENDA_HORA_FIN'])
+            intervalo = timedelta(minutes=int(intervalo_minutos or config['AGENDA_INTERVALO_MINUTOS']))
+        except ValueError:
+            return None, error_agenda
+        if not dias_semana <= set(range(1, 8)) or hora_inicio >= hora_fin or intervalo <= timedelta(0):
+            return None, error_agenda
+
+        return self._generar_turnos_rango(desde, hasta, dias_semana, hora_inicio, hora_fin, intervalo), None
+
+    def crear_turnos_rango(self, desde_str, hasta_str, dias_semana_str=None, hora_inicio_str=None,
+                           hora_fin_str=None, intervalo_minutos=None):
+        """
+        Abre la agenda de los días desde..hasta (inclusive) en una única transacción.
+        dias_semana_str: días ISO separados por coma (1 = lunes ... 7 = domingo); por defecto, todos.
+        Horario e intervalo toman por defecto los de la agenda (AGENDA_*). Los horarios que ya
+        tienen turno se omiten. Devuelve ({'creados', 'existentes'}, error).
+        """
+        turnos_a_crear, error = self._preparar_turnos_rango(desde_str, hasta_str, dias_semana_str,
+                                                            hora_inicio_str, hora_fin_str, intervalo_minutos)
+        if error:
+            return None, error
+        if not turnos_a_crear:
+            return {'creados': 0, 'existentes': 0}, None
+
+        creados = self.turno_dao.crear_varios(turnos_a_crear, tamanio_lote=current_app.config['TURNOS_ALTA_TAMANIO_LOTE'])
+        if creados is None:
+            return None, "Error al insertar los turnos en la base de datos."
+        return {'creados': creados, 'existentes': len(turnos_a_crear) - creados}, None
+
+    def verificar_indice_disponibilidad(self, fecha_str, reconstruir=False):
+        """ Compara el índice de disponibilidad en memoria con la DB y, si se pide, lo reconstruye. """
+        if self.indice_disponibilidad is None:
+            return None, "El índice de disponibilidad no está habilitado."
+
+        try:
+            fecha_obj = datetime.strptime(fecha_str, '%Y-%m-%d').date()
+        except ValueError:
+            return None, "Formato de fecha inválido. Usar YYYY-MM-DD."
+
+        reporte = self.indice_disponibilidad.verificar(fecha_obj)
+        if reconstruir:
+            self.indice_disponibilidad.reconstruir(fecha_obj)
+            reporte['reconstruido'] = True
+        return reporte, None
+
+    def guardar_excepcion_agenda(self, fecha_str, hora_inicio_str=None, hora_fin_str=None, motivo=None,
+                                 capacidad=None):
+        """
+        Define el horario especial de un día de la agenda virtual; sin horas, el día queda cerrado
+        (feriado). `capacidad` cambia la cantidad de carriles por horario de ese día.
+        Las reservas ya hechas para ese día no se modifican.
+        """
+        if self.agenda_dao is None:
+            return None, "La agenda virtual no está habilitada."
+
+        try:
+            fecha_obj = datetime.strptime(fecha_str, '%Y-%m-%d').date()
+            hora_inicio = time.fromisoformat(hora_inicio_str) if hora_inicio_str else None
+            hora_fin = time.fromisoformat(hora_fin_str) if hora_fin_str else None
+            capacidad = int(capacidad) if capacidad is not None else None
+        except (TypeError, ValueError):
+            return None, "Formato inválido. Usar fecha YYYY-MM-DD, horas HH:MM y capacidad entera."
+        if capacidad is not None and capacidad < 1:
+            return None, "La capacidad debe ser al menos 1."
+        if (hora_inicio is None) != (hora_fin is None) or (hora_inicio and hora_inicio >= hora_fin):
+            return None, "Indicar hora_inicio y hora_fin (inicio anterior al fin), o ninguna para cerrar el día."
+
+        excepcion = ExcepcionAgenda(fecha=fecha_obj, hora_inicio=hora_inicio, hora_fin=hora_fin, motivo=motivo,
+                                    capacidad=capacidad)
+        if not self.agenda_dao.guardar_excepcion(excepcion):
+            return None, "Error al guardar la excepción de agenda en la base de datos."
+        return excepcion, None
+
+    def eliminar_excepcion_agenda(self, fecha_str):
+        """ Quita la excepción del día: vuelve a regir el horario habitual. Devuelve (eliminada, error). """
+        if self.agenda_dao is None:
+            return None, "La agenda virtual no está habilitada."
+
+        try:
+            fecha_obj = datetime.strptime(fecha_str, '%Y-%m-%d').date()
+        except ValueError:
+            return None, "Formato de fecha inválido. Usar YYYY-MM-DD."
+
+        eliminada = self.agenda_dao.eliminar_excepcion(fecha_obj)
+        if eliminada is None:
+            return None, "Error al eliminar la excepción de agenda en la base de datos."
+        return eliminada, None
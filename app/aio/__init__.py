@@ -0,0 +1,69 @@
+"""
+Capa asíncrona: pool de conexiones para asyncio, DAOs y servicios con corrutinas y un
+adaptador ASGI para los endpoints de turnos, autenticación y administración.
+
+Un worker ASGI atiende muchos pedidos concurrentes en un solo hilo: mientras una consulta
+espera a MySQL, el event loop sigue con otros pedidos. Para servirla:
+
+    uvicorn --factory app.aio:crear_app_asgi --port 5001
+
+Necesita aiomysql (MySQL) y un servidor ASGI; en tests se usa app.aio.sqlite en su lugar.
+"""
+from flask import Flask
+
+from ..auth.auth_required import EXTENSION_CACHE_TOKENS
+from ..auth.ejecutor_hash import EjecutorHash
+from ..cache import CacheLRU
+from ..config import Config
+from ..json_provider import ProveedorJSONRapido
+from ..logging_config import configure_logging
+from .asgi import AplicacionASGI
+from .conexion import PoolAsincrono, ConexionAsincrona, conectar_mysql
+from .dao import TurnoDAOAsync, VehiculoDAOAsync, ResultadoDAOAsync, UsuarioDAOAsync, TokenRevocadoDAOAsync
+from .servicios import TurnoServiceAsync, AuthServiceAsync, AdminServiceAsync
+
+def crear_app_asgi(config_class=Config, conectar=None):
+    """
+    Arma la aplicación ASGI. La app Flask que la acompaña no registra blueprints: aporta la
+    configuración, el logging, el proveedor JSON y la cache de tokens verificados.
+    `conectar` reemplaza la conexión a MySQL (p. ej. conectar_sqlite(ruta)).
+    """
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+    # La capa asíncrona solo conoce la agenda materializada: con la virtual no habría filas LIBRES
+    # que listar y la reserva por id saltearía el contador del horario
+    if app.config['AGENDA_VIRTUAL']:
+        raise RuntimeError("La app ASGI no soporta AGENDA_VIRTUAL; servir la agenda virtual desde la app WSGI.")
+    app.json = ProveedorJSONRapido(app)
+    configure_logging(app)
+    config = app.config
+    app.extensions[EXTENSION_CACHE_TOKENS] = CacheLRU(max_entradas=config['TOKEN_CACHE_MAX_ENTRADAS'])
+
+    pool = PoolAsincrono(
+        conectar or conectar_mysql(config),
+        size=config['DB_POOL_SIZE'],
+        max_overflow=config['DB_POOL_MAX_OVERFLOW'],
+        timeout=config['DB_POOL_TIMEOUT'],
+        ping_interval=config['DB_POOL_PING_INTERVAL']
+    )
+    turno_dao = TurnoDAOAsync(pool)
+    usuario_dao = UsuarioDAOAsync(pool)
+
+    cache_disponibilidad = CacheLRU(
+        max_entradas=config['DISPONIBILIDAD_CACHE_MAX_FECHAS'],
+        ttl=config['DISPONIBILIDAD_CACHE_TTL']
+    )
+    # Mismo tope que la app WSGI: cada trabajo admitido ocupa un hilo de asyncio.to_thread
+    ejecutor_hash = EjecutorHash(
+        max_workers=config['HASH_WORKERS'],
+        max_cola=config['HASH_COLA_MAX'],
+        max_admitidos=config['WEB_THREADS'] - 1
+    )
+
+    return AplicacionASGI(
+        app,
+        TurnoServiceAsync(turno_dao, VehiculoDAOAsync(pool), ResultadoDAOAsync(pool), cache_disponibilidad),
+        AuthServiceAsync(usuario_dao, ejecutor_hash, TokenRevocadoDAOAsync(pool)),
+        AdminServiceAsync(usuario_dao, turno_dao, ejecutor_hash=ejecutor_hash),
+        al_cerrar=pool.cerrar
+    )
@@ -0,0 +1,339 @@
+import re
+from datetime import datetime
+from urllib.parse import parse_qsl
+
+import jwt
+
+from ..auth.auth_required import _claims_verificados
+from ..auth.ejecutor_hash import ColaHashLlenaError
+from ..utils.paginacion import leer_limite, codificar_cursor, decodificar_cursor, HEADER_SIGUIENTE_CURSOR
+
+ROLES_TODOS = ('CLIENTE', 'INSPECTOR', 'ADMINISTRADOR')
+
+class PedidoASGI:
+    """ Lo que los handlers necesitan de un pedido HTTP: parámetros de ruta y query, headers y cuerpo. """
+    __slots__ = ('metodo', 'ruta', 'args', 'headers', 'cuerpo', 'parametros', 'usuario', '_app')
+
+    def __init__(self, app, scope, cuerpo):
+        self._app = app
+        self.metodo = scope['method']
+        self.ruta = scope['path']
+        self.args = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', ())}
+        self.cuerpo = cuerpo
+        self.parametros = {}
+        self.usuario = None
+
+    def json(self):
+        """ El cuerpo decodificado, o None si está vacío o no es JSON válido. """
+        if not self.cuerpo:
+            return None
+        try:
+            return self._app.json.loads(self.cuerpo)
+        except ValueError:
+            return None
+
+class AplicacionASGI:
+    """
+    Adaptador ASGI de los endpoints de turnos, autenticación y administración sobre los
+    servicios asíncronos. Responde los mismos cuerpos y códigos que los blueprints de Flask.
+    Siguen solo en la app WSGI: la agenda virtual (reserva por fecha, /api/turnos/reservar-proximo
+    y /api/admin/agenda/excepciones), los listados con stream=1, /api/auth/test-protected,
+    /api/auth/hash-creator, /api/admin/indice-disponibilidad, /api/estadisticas y /api/metrics.
+
+    Cada pedido corre dentro de un app_context de la app Flask, así que los servicios usan
+    current_app (config, logger) igual que en la versión sincrónica.
+    """
+
+    def __init__(self, app, turno_service, auth_service, admin_service, al_cerrar=None):
+        self.app = app
+        self.turno_service = turno_service
+        self.auth_service = auth_service
+        self.admin_service = admin_service
+        self.al_cerrar = al_cerrar
+        self._rutas = []
+
+        self._ruta('GET', '/api/health', self.health_check)
+        self._ruta('POST', '/api/auth/login', self.login)
+        self._ruta('POST', '/api/auth/refresh', self.refresh)
+        self._ruta('POST', '/api/auth/logout', self.logout)
+        self._ruta('GET', '/api/turnos/disponibilidad', self.consultar_disponibilidad, ROLES_TODOS)
+        self._ruta('GET', '/api/turnos/disponibilidad/rango', self.consultar_disponibilidad_rango, ROLES_TODOS)
+        self._ruta('GET', '/api/turnos/proximo-libre', self.consultar_proximo_libre, ROLES_TODOS)
+        self._ruta('POST', '/api/turnos/reservar', self.reservar_turno, ('CLIENTE', 'ADMINISTRADOR'))
+        self._ruta('GET', '/api/turnos/<id_turno>/consultar', self.consultar_turno, ROLES_TODOS)
+        self._ruta('GET', '/api/turnos/pendientes', self.consultar_turnos_pendientes, ('INSPECTOR', 'ADMINISTRADOR'))
+        self._ruta('POST', '/api/turnos/<id_turno>/finalizar', self.finalizar_turno, ('INSPECTOR', 'ADMINISTRADOR'))
+        self._ruta('GET', '/api/admin/usuarios', self.consultar_usuarios, ('ADMINISTRADOR',))
+        self._ruta('POST', '/api/admin/usuarios', self.crear_usuario, ('ADMINISTRADOR',))
+        self._ruta('POST', '/api/admin/turnos/bulk-create', self.crear_turnos, ('ADMINISTRADOR',))
+
+    def _ruta(self, metodo, patron, handler, roles=None):
+        """ Registra un handler. `<nombre>` en el patrón captura un entero; `roles` None es una ruta pública. """
+        regex = re.compile('^' + re.sub(r'<(\w+)>', r'(?P<\1>\\d+)', patron) + '$')
+        self._rutas.append((metodo, regex, handler, tuple(roles) if roles is not None else None))
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        cuerpo = b''
+        while True:
+            mensaje = await receive()
+            cuerpo += mensaje.get('body', b'')
+            if not mensaje.get('more_body'):
+                break
+
+        pedido = PedidoASGI(self.app, scope, cuerpo)
+        with self.app.app_context():
+            respuesta, status, headers = await self._despachar(pedido)
+            contenido = self.app.json.dumps(respuesta, separators=(',', ':')).encode('utf-8') + b'\n'
+
+        encabezados = [(b'content-type', b'application/json'), (b'content-length', str(len(contenido)).encode())]
+        encabezados += [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers.items()]
+        await send({'type': 'http.response.start', 'status': status, 'headers': encabezados})
+        await send({'type': 'http.response.body', 'body': contenido})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            mensaje = await receive()
+            if mensaje['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensaje['type'] == 'lifespan.shutdown':
+                if self.al_cerrar is not None:
+                    await self.al_cerrar()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _despachar(self, pedido):
+        """ Busca la ruta, verifica token y rol, y corre el handler. Devuelve (cuerpo, status, headers). """
+        metodo_permitido = False
+        for metodo, regex, handler, roles in self._rutas:
+            coincidencia = regex.match(pedido.ruta)
+            if coincidencia is None:
+                continue
+            if metodo != pedido.metodo:
+                metodo_permitido = True
+                continue
+
+            pedido.parametros = {k: int(v) for k, v in coincidencia.groupdict().items()}
+            if roles is not None:
+                error = self._autorizar(pedido, roles)
+                if error:
+                    return error
+            try:
+                resultado = await handler(pedido)
+            except ColaHashLlenaError as e:
+                self.app.logger.warning("Ejecutor de hashing saturado: %s", e)
+                return ({'message': 'Servicio de autenticación saturado. Intente nuevamente en unos segundos.'}, 503,
+                        {'Retry-After': str(self.app.config['HASH_RETRY_AFTER_SEGUNDOS'])})
+            except Exception:
+                self.app.logger.exception("Error no controlado en %s %s", pedido.metodo, pedido.ruta)
+                return {'message': 'Error interno del servidor.'}, 500, {}
+            return resultado if len(resultado) == 3 else (*resultado, {})
+
+        if metodo_permitido:
+            return {'message': 'Método no permitido.'}, 405, {}
+        return {'message': 'Ruta no encontrada.'}, 404, {}
+
+    def _autorizar(self, pedido, roles):
+        """ Mismas respuestas que token_required y roles_required. Devuelve None si el pedido puede seguir. """
+        auth_header = pedido.headers.get('authorization', '')
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else None
+        if not token:
+            return {'message': 'Token de autenticación es requerido. Acceso denegado.'}, 401, {}
+        try:
+            pedido.usuario = _claims_verificados(token)
+        except jwt.ExpiredSignatureError:
+            return {'message': 'Token expirado. Inicie sesión nuevamente.'}, 401, {}
+        except jwt.InvalidTokenError:
+            return {'message': 'Token inválido. Acceso denegado.'}, 401, {}
+        except Exception as e:
+            return {'message': f'Error de servidor al validar token: {e}'}, 500, {}
+
+        if pedido.usuario.get('rol') not in roles:
+            return {'message': 'Permisos insuficientes. Rol requerido: ' + ', '.join(roles)}, 403, {}
+        return None
+
+    async def health_check(self, pedido):
+        return {'status': 'ok', 'service': 'vehicles-api-service', 'version': '1.0'}, 200
+
+    async def login(self, pedido):
+        data = pedido.json()
+        if not data or 'username' not in data or 'password' not in data:
+            return {'message': 'Faltan credenciales (username/password)'}, 400
+
+        auth_result = await self.auth_service.login(data['username'], data['password'])
+        if not auth_result:
+            return {'message': 'Usuario o contraseña incorrectos'}, 401
+        return {'message': 'Autenticación exitosa', **auth_result}, 200
+
+    async def refresh(self, pedido):
+        data = pedido.json()
+        if not data or 'refresh_token' not in data:
+            return {'message': 'Se requiere el campo "refresh_token"'}, 400
+
+        resultado, error = await self.auth_service.refrescar(data['refresh_token'])
+        if error:
+            return {'message': error}, 401
+        return {'message': 'Token renovado', 'token': resultado['token'], 'rol': resultado['rol']}, 200
+
+    async def logout(self, pedido):
+        data = pedido.json()
+        if not data or 'refresh_token' not in data:
+            return {'message': 'Se requiere el campo "refresh_token"'}, 400
+
+        _, error = await self.auth_service.revocar(data['refresh_token'])
+        if error:
+            return {'message': error}, 401
+        return {'message': 'Sesión cerrada'}, 200
+
+    async def consultar_disponibilidad(self, pedido):
+        fecha_str = pedido.args.get('fecha')
+        if not fecha_str:
+            return {'message': 'Se requiere el parámetro "fecha" (YYYY-MM-DD)'}, 400
+
+        disponibles, error = await self.turno_service.consultar_disponibilidad(fecha_str)
+        if error:
+            return {'message': error}, 400
+        return {'disponibles': disponibles}, 200
+
+    async def consultar_disponibilidad_rango(self, pedido):
+        desde_str, hasta_str = pedido.args.get('desde'), pedido.args.get('hasta')
+        if not desde_str or not hasta_str:
+            return {'message': 'Se requieren los parámetros "desde" y "hasta" (YYYY-MM-DD)'}, 400
+
+        resumen = pedido.args.get('resumen') == '1'
+        dias, error = await self.turno_service.consultar_disponibilidad_rango(desde_str, hasta_str, resumen)
+        if error:
+            return {'message': error}, 400
+        return {'desde': desde_str, 'hasta': hasta_str, 'libres_por_dia' if resumen else 'disponibles': dias}, 200
+
+    async def consultar_proximo_libre(self, pedido):
+        turno, error = await self.turno_service.consultar_proximo_libre(pedido.args.get('desde'))
+        if error:
+            return {'message': error}, 400
+        if not turno:
+            return {'message': 'No hay turnos libres en el período consultado.'}, 404
+        return {'turno': turno}, 200
+
+    async def reservar_turno(self, pedido):
+        data = pedido.json() or {}
+        id_turno = data.get('id_turno')
+        matricula = data.get('matricula')
+        id_marca = data.get('id_marca')
+        anio = data.get('anio')
+        if not all([matricula, id_marca, anio, id_turno]):
+            return {'message': 'Faltan campos requeridos (matricula, id_marca, anio, id_turno).'}, 400
+
+        turno, error = await self.turno_service.reservar_turno(matricula, id_marca, anio, id_turno)
+        if error:
+            return {'message': error}, 409
+        return {'message': 'Turno reservado exitosamente.', 'turno': turno}, 201
+
+    async def consultar_turno(self, pedido):
+        turno, error = await self.turno_service.consultar_turno(pedido.parametros['id_turno'])
+        if error:
+            return {'message': error}, 404
+        return {'turno': turno}, 200
+
+    async def consultar_turnos_pendientes(self, pedido):
+        try:
+            limite = leer_limite(pedido.args.get('limite'))
+        except ValueError as e:
+            return {'message': str(e)}, 400
+
+        despues_de = None
+        cursor = pedido.args.get('cursor')
+        if cursor:
+            try:
+                fecha, id_turno = decodificar_cursor(cursor, 2)
+                despues_de = (datetime.fromisoformat(fecha), int(id_turno))
+            except (TypeError, ValueError):
+                return {'message': 'Cursor inválido.'}, 400
+
+        turnos_pendientes, error = await self.turno_service.consultar_turnos_pendientes(limite, despues_de)
+        if error:
+            return {'message': error}, 400
+
+        siguiente_cursor = None
+        headers = {}
+        if len(turnos_pendientes) == limite:
+            ultimo = turnos_pendientes[-1]
+            siguiente_cursor = headers[HEADER_SIGUIENTE_CURSOR] = codificar_cursor(ultimo['fecha'], ultimo['id_turno'])
+        return {'turnos_pendientes': turnos_pendientes, 'siguiente_cursor': siguiente_cursor}, 200, headers
+
+    async def finalizar_turno(self, pedido):
+        detalles_control = (pedido.json() or {}).get('detalles_control')
+        if not detalles_control or len(detalles_control) != 8:
+            return {'message': 'Se requiere una lista de 8 detalles de control con calificación.'}, 400
+
+        id_turno = pedido.parametros['id_turno']
+        resultado_final, error = await self.turno_service.finalizar_turno_inspeccion(id_turno, detalles_control)
+        if error:
+            return {'message': error}, 409
+        return {
+            'message': f"Inspección finalizada. Resultado: {resultado_final['resultado']}",
+            'id_turno': resultado_final['id_turno']
+        }, 200
+
+    async def consultar_usuarios(self, pedido):
+        try:
+            limite = leer_limite(pedido.args.get('limite'))
+        except ValueError as e:
+            return {'message': str(e)}, 400
+
+        despues_de_id = None
+        cursor = pedido.args.get('cursor')
+        if cursor:
+            try:
+                despues_de_id = int(decodificar_cursor(cursor, 1)[0])
+            except (TypeError, ValueError):
+                return {'message': 'Cursor inválido.'}, 400
+
+        usuarios = await self.admin_service.consultar_usuarios(limite, despues_de_id)
+        # Como en Flask: el cuerpo sigue siendo un array, así que el cursor viaja solo en el header
+        headers = {}
+        if len(usuarios) == limite:
+            headers[HEADER_SIGUIENTE_CURSOR] = codificar_cursor(usuarios[-1].id_usuario)
+        return [{'id_usuario': u.id_usuario, 'username': u.username, 'rol': u.rol} for u in usuarios], 200, headers
+
+    async def crear_usuario(self, pedido):
+        data = pedido.json() or {}
+        username = data.get('username')
+        password = data.get('password')
+        rol = data.get('rol')
+        if not all([username, password, rol]):
+            return {'message': 'Faltan campos requeridos (username, password, rol).'}, 400
+        if rol not in ROLES_TODOS:
+            return {'message': 'El rol debe ser CLIENTE, INSPECTOR o ADMINISTRADOR.'}, 400
+
+        usuario, error = await self.admin_service.crear_usuario(username, password, rol)
+        if error:
+            return {'message': error}, 409
+        return {'message': f'Usuario "{usuario.username}" creado exitosamente.'}, 201
+
+    async def crear_turnos(self, pedido):
+        desde_str, hasta_str = pedido.args.get('desde'), pedido.args.get('hasta')
+        if desde_str or hasta_str:
+            if not (desde_str and hasta_str):
+                return {'message': 'Faltan campos requeridos (desde, hasta).'}, 400
+            resumen, error = await self.admin_service.crear_turnos_rango(
+                desde_str, hasta_str, pedido.args.get('dias_semana'), pedido.args.get('hora_inicio'),
+                pedido.args.get('hora_fin'), pedido.args.get('intervalo')
+            )
+            if error:
+                return {'message': error}, 400
+            return {'message': f"Se crearon {resumen['creados']} turnos entre {desde_str} y {hasta_str}.", **resumen}, 201
+
+        fecha_str = pedido.args.get('fecha')
+        if not fecha_str:
+            return {'message': 'Faltan campos requeridos (fecha).'}, 400
+
+        turnos_creados, error = await self.admin_service.crear_turnos(fecha_str)
+        if error:
+            return {'message': error}, 400
+        return {'message': f'Se crearon {turnos_creados} turnos para la fecha {fecha_str}.'}, 201
@@ -0,0 +1,257 @@
+import asyncio
+import time
+from collections import deque
+
+from .. import db_connection
+from ..db_connection import PoolTimeoutError
+
+class ResultadoSQL:
+    """ Lo que devuelve una sentencia: nombres de columnas, filas (tuplas), lastrowid y rowcount. """
+    __slots__ = ('columnas', 'filas', 'lastrowid', 'rowcount')
+
+    def __init__(self, columnas, filas, lastrowid, rowcount):
+        self.columnas = columnas
+        self.filas = filas
+        self.lastrowid = lastrowid
+        self.rowcount = rowcount
+
+class PoolAsincrono:
+    """
+    Pool de conexiones para asyncio con desborde acotado, análogo a ConnectionPool.
+
+    `conectar` es una corrutina que abre una conexión del driver (ver _ConexionMySQL y
+    app.aio.sqlite.ConexionSQLite). Quien espera una conexión libre cede el event loop en
+    lugar de bloquear un hilo. Un pool pertenece a un único event loop. Como en
+    ConnectionPool, una conexión que estuvo ociosa más de `ping_interval` segundos se
+    verifica antes de entregarla y, si el servidor la cerró, se reemplaza por una nueva.
+    """
+
+    def __init__(self, conectar, size=5, max_overflow=10, timeout=10, ping_interval=30):
+        self._conectar = conectar
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self._cond = asyncio.Condition()
+        self._idle = deque()  # (conexion, instante en que se devolvió)
+        self._open = 0
+        self._checked_out = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+
+    async def adquirir(self):
+        """ Obtiene una conexión viva del pool, abriendo una nueva si hay lugar. """
+        async with self._cond:
+            if not self._idle and self._open >= self.size + self.max_overflow:
+                self._waits += 1
+                try:
+                    await asyncio.wait_for(
+                        self._cond.wait_for(lambda: self._idle or self._open < self.size + self.max_overflow),
+                        self.timeout
+                    )
+                except asyncio.TimeoutError:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(f"No hay conexiones disponibles tras {self.timeout}s de espera.")
+            self._checked_out += 1
+            if self._idle:
+                conexion, devuelta_en = self._idle.pop()
+            else:
+                conexion = None
+                self._open += 1
+
+        if conexion is not None:
+            if time.monotonic() - devuelta_en < self.ping_interval or await self._esta_viva(conexion):
+                return conexion
+            await self._cerrar(conexion)
+            async with self._cond:
+                self._discarded += 1
+
+        try:
+            conexion = await self._conectar()
+        except Exception:
+            async with self._cond:
+                self._open -= 1
+                self._checked_out -= 1
+                self._cond.notify()
+            raise
+        self._created += 1
+        return conexion
+
+    async def liberar(self, conexion, descartar=False):
+        """ Devuelve una conexión al pool. Con `descartar=True` se cierra en lugar de reutilizarse. """
+        cerrar = False
+        async with self._cond:
+            self._checked_out -= 1
+            if descartar or len(self._idle) >= self.size:
+                self._open -= 1
+                if descartar:
+                    self._discarded += 1
+                cerrar = True
+            else:
+                self._idle.append((conexion, time.monotonic()))
+            self._cond.notify()
+
+        if cerrar:
+            await self._cerrar(conexion)
+
+    async def cerrar(self):
+        """ Cierra todas las conexiones ociosas. """
+        async with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for conexion, _ in idle:
+            await self._cerrar(conexion)
+
+    def stats(self):
+        return {
+            'size': self.size,
+            'max_overflow': self.max_overflow,
+            'open': self._open,
+            'idle': len(self._idle),
+            'checked_out': self._checked_out,
+            'created': self._created,
+            'discarded': self._discarded,
+            'waits': self._waits,
+            'timeouts': self._timeouts,
+        }
+
+    @staticmethod
+    async def _esta_viva(conexion):
+        try:
+            await conexion.ping()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    async def _cerrar(conexion):
+        try:
+            await conexion.cerrar()
+        except Exception:
+            pass
+
+class ConexionAsincrona:
+    """
+    Equivalente asíncrono de DBConnection: `async with ConexionAsincrona(pool) as db:` toma
+    una conexión, hace commit al salir sin errores (rollback si hubo una excepción) y la
+    devuelve al pool. Las sentencias se informan a db_connection.observadores_consulta.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.conexion = None
+        self.rowcount = -1
+
+    async def __aenter__(self):
+        self.conexion = await self.pool.adquirir()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        descartar = False
+        try:
+            if exc_type is None:
+                await self.conexion.commit()
+            else:
+                await self.conexion.rollback()
+        except Exception:
+            descartar = True
+            if exc_type is None:
+                raise
+        finally:
+            await self.pool.liberar(self.conexion, descartar=descartar)
+            self.conexion = None
+
+    async def _ejecutar(self, metodo, query, params):
+        inicio = time.perf_counter()
+        filas = -1
+        try:
+            resultado = await metodo(query, params)
+            filas = resultado.rowcount
+            self.rowcount = resultado.rowcount
+            return resultado
+        finally:
+            if db_connection.observadores_consulta:
+                segundos = time.perf_counter() - inicio
+                for observador in db_connection.observadores_consulta:
+                    observador(query, segundos, filas)
+
+    async def fetch_one(self, query, params=None):
+        """ Ejecuta un SELECT y devuelve la primera fila como dict, o None. """
+        resultado = await self._ejecutar(self.conexion.ejecutar, query, params or ())
+        if not resultado.filas:
+            return None
+        return dict(zip(resultado.columnas, resultado.filas[0]))
+
+    async def fetch_all(self, query, params=None):
+        """ Ejecuta un SELECT y devuelve todas las filas como dicts. """
+        resultado = await self._ejecutar(self.conexion.ejecutar, query, params or ())
+        return [dict(zip(resultado.columnas, fila)) for fila in resultado.filas]
+
+    async def fetch_models(self, model, query, params=None):
+        """ Ejecuta un SELECT y construye una instancia de `model` por fila (ver Model.row_mapper). """
+        resultado = await self._ejecutar(self.conexion.ejecutar, query, params or ())
+        return list(map(model.row_mapper(resultado.columnas), resultado.filas))
+
+    async def execute(self, query, params=None):
+        """ Ejecuta un INSERT/UPDATE/DELETE y devuelve el lastrowid. La cantidad de filas queda en `rowcount`. """
+        resultado = await self._ejecutar(self.conexion.ejecutar, query, params or ())
+        return resultado.lastrowid
+
+    async def executemany(self, query, seq_params):
+        """ Ejecuta la sentencia para cada juego de parámetros y devuelve las filas afectadas. """
+        resultado = await self._ejecutar(self.conexion.ejecutar_varios, query, seq_params)
+        return resultado.rowcount
+
+    async def rollback(self):
+        """ Descarta lo escrito hasta ahora en la transacción. """
+        await self.conexion.rollback()
+
+class _ConexionMySQL:
+    """ Adaptador de una conexión de aiomysql a la interfaz que usa ConexionAsincrona. """
+
+    def __init__(self, conexion):
+        self._conexion = conexion
+
+    async def ejecutar(self, query, params):
+        async with self._conexion.cursor() as cursor:
+            await cursor.execute(query, params)
+            columnas = tuple(c[0] for c in cursor.description) if cursor.description else ()
+            filas = await cursor.fetchall() if cursor.description else []
+            return ResultadoSQL(columnas, filas, cursor.lastrowid, cursor.rowcount)
+
+    async def ejecutar_varios(self, query, seq_params):
+        async with self._conexion.cursor() as cursor:
+            await cursor.executemany(query, seq_params)
+            return ResultadoSQL((), [], cursor.lastrowid, cursor.rowcount)
+
+    async def ping(self):
+        await self._conexion.ping(reconnect=False)
+
+    async def commit(self):
+        await self._conexion.commit()
+
+    async def rollback(self):
+        await self._conexion.rollback()
+
+    async def cerrar(self):
+        self._conexion.close()
+
+def conectar_mysql(config):
+    """ Devuelve la corrutina que abre conexiones de aiomysql con los datos de `config`. """
+    import aiomysql
+
+    async def conectar():
+        conexion = await aiomysql.connect(
+            host=config['DB_HOST'],
+            user=config['DB_USER'],
+            password=config['DB_PASSWORD'],
+            db=config['DB_NAME'],
+            port=int(config['DB_PORT']),
+            autocommit=False
+        )
+        return _ConexionMySQL(conexion)
+
+    return conectar
@@ -0,0 +1,292 @@
+"""
+DAOs asíncronos: mismas consultas y mismos resultados que los de app/dao, sobre un
+PoolAsincrono. Cada método toma su propia conexión, así que dos llamadas independientes
+pueden correr a la vez con asyncio.gather.
+"""
+from datetime import date
+
+from flask import current_app
+
+from .conexion import ConexionAsincrona
+from ..dao.turno_dao import (
+    QUERY_DISPONIBLES_POR_FECHA, QUERY_LIBRES_POR_DIA, QUERY_PENDIENTES, QUERY_PENDIENTES_DESDE,
+    QUERY_TURNO_POR_ID, QUERY_ALTA_VEHICULO, QUERY_RESERVA_SI_LIBRE,
+    rango_del_dia, rango_de_dias,
+    RESERVA_OK, RESERVA_NO_ENCONTRADO, RESERVA_CONFLICTO, RESERVA_ERROR
+)
+from ..dao.token_revocado_dao import QUERY_ESTADO_REFRESH
+from ..models import Turno, Vehiculo, Resultado, ResultadoPorControl, Usuario
+
+class TurnoDAOAsync:
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._observadores = []
+
+    def agregar_observador(self, callback):
+        """ Registra una función que recibe la lista de Turnos modificados tras cada escritura confirmada. """
+        self._observadores.append(callback)
+
+    def _notificar(self, turnos: list[Turno]):
+        for callback in self._observadores:
+            callback(turnos)
+
+    async def crear_varios(self, turnos: list[Turno], tamanio_lote: int = 500):
+        """ Inserta una lista de turnos en una única transacción, omitiendo los horarios que ya tienen turno. """
+        try:
+            filas = 0
+            async with ConexionAsincrona(self.pool) as db:
+                for inicio in range(0, len(turnos), tamanio_lote):
+                    lote = turnos[inicio:inicio + tamanio_lote]
+                    query = ("INSERT INTO Turnos (fecha, estado) VALUES " + ", ".join(["(%s, %s)"] * len(lote))
+                             + " ON DUPLICATE KEY UPDATE fecha = fecha")
+                    await db.execute(query, [valor for t in lote for valor in (t.fecha, t.estado)])
+                    filas += db.rowcount
+            self._notificar(turnos)
+            return filas
+        except Exception as e:
+            current_app.logger.error("Error al crear varios turnos en DB: %s", e)
+            return None
+
+    async def obtener_por_id(self, id_turno: int):
+        """ Busca y devuelve un objeto Turno por su ID. """
+        try:
+            async with ConexionAsincrona(self.pool) as db:
+                turnos = await db.fetch_models(Turno, QUERY_TURNO_POR_ID, (id_turno,))
+            return turnos[0] if turnos else None
+        except Exception as e:
+            current_app.logger.error("Error al obtener turno por ID: %s", e)
+            return None
+
+    async def obtener_disponibles_por_fecha(self, fecha_consulta):
+        """ Devuelve una lista de objetos Turno en estado 'LIBRE' para la fecha dada."""
+        try:
+            async with ConexionAsincrona(self.pool) as db:
+                return await db.fetch_models(Turno, QUERY_DISPONIBLES_POR_FECHA, rango_del_dia(fecha_consulta))
+        except Exception as e:
+            current_app.logger.error("Error al obtener turnos disponibles: %s", e)
+            return []
+
+    async def obtener_disponibles_por_rango(self, desde, hasta):
+        """ Devuelve los Turnos 'LIBRE' de los días desde..hasta (inclusive), ordenados por horario. """
+        try:
+            async with ConexionAsincrona(self.pool) as db:
+                return await db.fetch_models(Turno, QUERY_DISPONIBLES_POR_FECHA, rango_de_dias(desde, hasta))
+        except Exception as e:
+            current_app.logger.error("Error al obtener turnos disponibles por rango: %s", e)
+            return []
+
+    async def contar_disponibles_por_dia(self, desde, hasta):
+        """ Devuelve {date: cantidad de turnos 'LIBRE'} para los días desde..hasta que tienen alguno. """
+        try:
+            async with ConexionAsincrona(self.pool) as db:
+                filas = await db.fetch_all(QUERY_LIBRES_POR_DIA, rango_de_dias(desde, hasta))
+        except Exception as e:
+            current_app.logger.error("Error al contar turnos disponibles por día: %s", e)
+            return {}
+        # SQLite devuelve DATE() como texto
+        return {(date.fromisoformat(f['dia']) if isinstance(f['dia'], str) else f['dia']): f['libres'] for f in filas}
+
+    async def obtener_proximo_libre(self, desde, hasta):
+        """ Devuelve el primer Turno 'LIBRE' con fecha en [desde, hasta), o None. """
+        query = """
+            SELECT id_turno, matricula, fecha, estado, id_resultado
+            FROM Turnos
+            WHERE estado = 'LIBRE' AND fecha >= %s AND fecha < %s
+            ORDER BY fecha ASC, id_turno ASC
+            LIMIT 1
+        """
+        try:
+            async with ConexionAsincrona(self.pool) as db:
+                turnos = await db.fetch_models(Turno, query, (desde, hasta))
+            return turnos[0] if turnos else None
+        except Exception as e:
+            current_app.logger.error("Error al obtener próximo turno libre: %s", e)
+            return None
+
+    async def obtener_pendientes(self, limite: int, despues_de: tuple = None):
+        """ Devuelve una página de Turnos 'RESERVADO' ordenados por (fecha, id_turno), como TurnoDAO. """
+        if despues_de:
+            fecha, id_turno = despues_de
+            query, params = QUERY_PENDIENTES_DESDE, (fecha, fecha, id_turno, limite)
+        else:
+            query, params = QUERY_PENDIENTES, (limite,)
+
+        try:
+            async with ConexionAsincrona(self.pool) as db:
+                return await db.fetch_models(Turno, query, params)
+        except Exception as e:
+            current_app.logger.error("Error al obtener turnos pendientes: %s", e)
+            return []
+
+    async def reservar(self, id_turno: int, vehiculo: Vehiculo):
+        """
+        Reserva un turno en una única transacción. En lugar de SELECT ... FOR UPDATE usa un
+        UPDATE condicional (solo si sigue 'LIBRE'): la base resuelve la carrera entre dos
+        clientes sin mantener la fila bloqueada mientras la tarea espera. Si no se actualizó
+        ninguna fila, se lee el turno para distinguir NO_ENCONTRADO de CONFLICTO.
+        Devuelve una tupla (resultado, turno) con resultado en RESERVA_*.
+        """
+        try:
+            async with ConexionAsincrona(self.pool) as db:
+                await db.execute(QUERY_ALTA_VEHICULO, (vehiculo.matricula, vehiculo.id_marca, vehiculo.anio))
+                await db.execute(QUERY_RESERVA_SI_LIBRE, (vehiculo.matricula, id_turno))
+                reservado = db.rowcount == 1
+                if not reservado:
+                    await db.rollback()
+                turnos = await db.fetch_models(Turno, QUERY_TURNO_POR_ID, (id_turno,))
+
+            if not turnos:
+                return RESERVA_NO_ENCONTRADO, None
+            turno = turnos[0]
+            if not reservado:
+                return RESERVA_CONFLICTO, turno
+            self._notificar([turno])
+            return RESERVA_OK, turno
+        except Exception as e:
+            current_app.logger.error("Error al reservar turno: %s", e)
+            return RESERVA_ERROR, None
+
+class VehiculoDAOAsync:
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def obtener_por_matricula(self, matricula: str):
+        """ Busca y devuelve un objeto Vehiculo por su matrícula."""
+        query = "SELECT matricula, id_marca, anio FROM Vehiculos WHERE matricula = %s"
+        try:
+            async with ConexionAsincrona(self.pool) as db:
+                vehiculos = await db.fetch_models(Vehiculo, query, (matricula,))
+            return vehiculos[0] if vehiculos else None
+        except Exception as e:
+            current_app.logger.error("Error al obtener vehículo en DB: %s", e)
+            return None
+
+class ResultadoDAOAsync:
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def registrar_resultado_inspeccion(self, turno: Turno, resultado: Resultado, detalles_control: list[ResultadoPorControl]):
+        """ Registra la inspección completa en una sola transacción. """
+        try:
+            async with ConexionAsincrona(self.pool) as db:
+                id_resultado = await db.execute(
+                    "INSERT INTO Resultados (resultado, puntaje_total, observaciones) VALUES (%s, %s, %s)",
+                    (resultado.resultado, resultado.puntaje_total, resultado.observaciones)
+                )
+                await db.executemany(
+                    """
+                    INSERT INTO ResultadosPorControl (id_resultado, id_control, calificacion, observaciones)
+                    VALUES (%s, %s, %s, %s)
+                    """,
+                    [(id_resultado, d.id_control, d.calificacion, d.observaciones) for d in detalles_control]
+                )
+                await db.execute(
+                    "UPDATE Turnos SET id_resultado = %s, estado = 'FINALIZADO' WHERE id_turno = %s",
+                    (id_resultado, turno.id_turno)
+                )
+            return id_resultado
+        except Exception as e:
+            current_app.logger.error("Error al registrar resultado de inspección en DB: %s", e)
+            return None
+
+    async def obtener_resultado_de_turno(self, id_turno: int):
+        """
+        Devuelve la cabecera y los detalles del resultado del turno, o None si no tiene.
+        No depende de leer antes el turno, así que puede correr en paralelo con esa consulta.
+        """
+        query = """
+            SELECT r.id_resultado, r.resultado, r.puntaje_total, r.observaciones AS observaciones_resultado,
+                   rc.id_control, rc.calificacion, rc.observaciones AS observaciones_control
+            FROM Turnos t
+            JOIN Resultados r ON r.id_resultado = t.id_resultado
+            LEFT JOIN ResultadosPorControl rc ON rc.id_resultado = r.id_resultado
+            WHERE t.id_turno = %s
+            ORDER BY rc.id_control ASC
+        """
+        try:
+            async with ConexionAsincrona(self.pool) as db:
+                filas = await db.fetch_all(query, (id_turno,))
+        except Exception as e:
+            current_app.logger.error("Error al obtener resultado completo: %s", e)
+            return None
+
+        if not filas:
+            return None
+        primera = filas[0]
+        resultado_completo = Resultado(
+            id_resultado=primera['id_resultado'],
+            resultado=primera['resultado'],
+            puntaje_total=primera['puntaje_total'],
+            observaciones=primera['observaciones_resultado']
+        ).to_dict()
+        resultado_completo['detalles_control'] = [
+            {
+                'id_control': f['id_control'],
+                'calificacion': f['calificacion'],
+                'observaciones': f['observaciones_control']
+            } for f in filas if f['id_control'] is not None
+        ]
+        return resultado_completo
+
+class UsuarioDAOAsync:
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def crear(self, usuario: Usuario):
+        """ Inserta un nuevo usuario en la DB y devuelve su ID. """
+        query = "INSERT INTO Usuarios (username, password_hash, rol) VALUES (%s, %s, %s)"
+        try:
+            async with ConexionAsincrona(self.pool) as db:
+                return await db.execute(query, (usuario.username, usuario.password_hash, usuario.rol))
+        except Exception as e:
+            current_app.logger.error("Error al crear usuario en DB: %s", e)
+            return None
+
+    async def obtener_por_username(self, username):
+        """ Busca un usuario por su nombre de usuario. """
+        query = "SELECT id_usuario, username, password_hash, rol, version_token FROM Usuarios WHERE username = %s"
+        async with ConexionAsincrona(self.pool) as db:
+            usuarios = await db.fetch_models(Usuario, query, (username,))
+        return usuarios[0] if usuarios else None
+
+    async def obtener_todos(self, limite: int, despues_de_id: int = None):
+        """ Devuelve una página de usuarios ordenada por id_usuario, a partir del id indicado. """
+        query = """
+            SELECT id_usuario, username, rol
+            FROM Usuarios
+            WHERE id_usuario > %s
+            ORDER BY id_usuario ASC
+            LIMIT %s
+        """
+        async with ConexionAsincrona(self.pool) as db:
+            return await db.fetch_models(Usuario, query, (despues_de_id or 0, limite))
+
+class TokenRevocadoDAOAsync:
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def revocar(self, jti: str, expira):
+        """ Registra el jti como revocado hasta `expira`. Revocar dos veces no es un error. """
+        query = "INSERT IGNORE INTO TokensRevocados (jti, expira) VALUES (%s, %s)"
+        try:
+            async with ConexionAsincrona(self.pool) as db:
+                await db.execute(query, (bytes.fromhex(jti), expira))
+            return True
+        except Exception as e:
+            current_app.logger.error("Error al revocar refresh token en DB: %s", e)
+            return False
+
+    async def obtener_estado_refresh(self, jti: str, id_usuario: int):
+        """ Devuelve (usuario, revocado) con una sola consulta, o None si el usuario ya no existe. """
+        async with ConexionAsincrona(self.pool) as db:
+            fila = await db.fetch_one(QUERY_ESTADO_REFRESH, (bytes.fromhex(jti), id_usuario))
+        if fila is None:
+            return None
+        usuario = Usuario(id_usuario=fila['id_usuario'], username=fila['username'], rol=fila['rol'],
+                          version_token=fila['version_token'])
+        return usuario, bool(fila['revocado'])
@@ -0,0 +1,250 @@
+"""
+Servicios asíncronos sobre los DAOs de app.aio.dao. Heredan de los servicios sincrónicos la
+validación y las reglas de negocio; los métodos que hacen I/O se redefinen como corrutinas
+con los mismos argumentos y el mismo formato de retorno (resultado, error).
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+
+from ..admin.admin_service import AdminService
+from ..auth.auth_service import AuthService
+from ..dao.turno_dao import RESERVA_OK, RESERVA_NO_ENCONTRADO, RESERVA_CONFLICTO
+from ..models import Usuario, Vehiculo, Resultado
+from ..turnos.turno_service import TurnoService
+
+class TurnoServiceAsync(TurnoService):
+    """ TurnoService asíncrono. Usa la cache de disponibilidad, pero no el índice en memoria ni la cache de resultados. """
+
+    def __init__(self, turno_dao, vehiculo_dao, resultado_dao, cache_disponibilidad=None):
+        # fecha -> asyncio.Future de la carga en curso; todo corre en el event loop, sin locks
+        self._cargas_disponibilidad = {}
+        super().__init__(turno_dao, vehiculo_dao, resultado_dao, cache_disponibilidad)
+
+    def _invalidar_fechas(self, fechas):
+        """ Además de la cache, descarta las cargas en curso: su resultado ya no se guardará. """
+        super()._invalidar_fechas(fechas)
+        for fecha in fechas:
+            self._cargas_disponibilidad.pop(fecha, None)
+
+    async def consultar_disponibilidad(self, fecha_str: str):
+        """ Consulta los slots LIBRES para una fecha específica. """
+        try:
+            fecha_consulta = datetime.strptime(fecha_str, '%Y-%m-%d').date()
+        except ValueError:
+            current_app.logger.error("Formato de fecha inválido recibido: %s", fecha_str)
+            return None, "Formato de fecha inválido. Usar YYYY-MM-DD."
+
+        if self.cache_disponibilidad is None:
+            return await self._cargar_disponibilidad_async(fecha_consulta), None
+        disponibles = self.cache_disponibilidad.obtener(fecha_consulta)
+        if disponibles is None:
+            disponibles = await self._obtener_o_cargar_disponibilidad(fecha_consulta)
+        return disponibles, None
+
+    async def _obtener_o_cargar_disponibilidad(self, fecha):
+        """
+        Equivalente asíncrono de CacheLRU.obtener_o_cargar: ante varios fallos simultáneos para
+        la misma fecha, una sola corrutina consulta la DB y el resto espera su Future.
+        """
+        carga = self._cargas_disponibilidad.get(fecha)
+        if carga is not None:
+            # shield: si se cancela quien espera, la carga sigue para los demás
+            return await asyncio.shield(carga)
+
+        carga = self._cargas_disponibilidad[fecha] = asyncio.get_running_loop().create_future()
+        try:
+            disponibles = await self._cargar_disponibilidad_async(fecha)
+        except asyncio.CancelledError:
+            carga.cancel()
+            raise
+        except Exception as e:
+            carga.set_exception(e)
+            carga.exception()  # ya se propaga a quien la cargó; evita el aviso si nadie más esperaba
+            raise
+        finally:
+            vigente = self._cargas_disponibilidad.get(fecha) is carga
+            if vigente:
+                del self._cargas_disponibilidad[fecha]
+
+        # Si una escritura invalidó la fecha durante la carga, el resultado no se guarda
+        if vigente:
+            self.cache_disponibilidad.guardar(fecha, disponibles)
+        carga.set_result(disponibles)
+        return disponibles
+
+    async def _cargar_disponibilidad_async(self, fecha):
+        turnos = await self.turno_dao.obtener_disponibles_por_fecha(fecha)
+        return [turno.to_dict() for turno in turnos]
+
+    async def consultar_disponibilidad_rango(self, desde_str: str, hasta_str: str, resumen: bool = False):
+        """ Consulta los slots LIBRES de los días desde..hasta (inclusive) con una sola consulta. """
+        desde, hasta, error = self._validar_rango(desde_str, hasta_str)
+        if error:
+            return None, error
+
+        if resumen:
+            return self._libres_por_dia(desde, hasta, await self.turno_dao.contar_disponibles_por_dia(desde, hasta)), None
+        turnos = await self.turno_dao.obtener_disponibles_por_rango(desde, hasta)
+        return self._agrupar_por_dia(desde, hasta, turnos), None
+
+    async def consultar_proximo_libre(self, desde_str: str = None):
+        """ Busca el primer slot LIBRE a partir de la fecha/hora dada (por defecto, ahora). """
+        try:
+            desde = datetime.fromisoformat(desde_str) if desde_str else datetime.now()
+        except ValueError:
+            current_app.logger.error("Formato de fecha inválido recibido: %s", desde_str)
+            return None, "Formato de fecha inválido. Usar YYYY-MM-DD o YYYY-MM-DDTHH:MM."
+
+        max_dias = current_app.config.get('PROXIMO_LIBRE_MAX_DIAS', 30)
+        hasta = datetime.combine(desde.date() + timedelta(days=max_dias), datetime.min.time())
+        turno = await self.turno_dao.obtener_proximo_libre(desde, hasta)
+        return (turno.to_dict() if turno else None), None
+
+    async def reservar_turno(self, matricula: str, id_marca: int, anio: int, id_turno: int):
+        """ Generar una reserva de turno para un vehículo en una única transacción. """
+        vehiculo = Vehiculo(matricula=matricula, id_marca=id_marca, anio=anio)
+        resultado, turno = await self.turno_dao.reservar(id_turno, vehiculo)
+
+        if resultado == RESERVA_OK:
+            return turno.to_dict(), None
+        if resultado == RESERVA_NO_ENCONTRADO:
+            return None, "ID de turno no encontrado."
+        if resultado == RESERVA_CONFLICTO:
+            return None, f"El turno {id_turno} ya está {turno.estado}."
+        return None, "Error al actualizar el estado del turno."
+
+    async def consultar_turno(self, id_turno: int):
+        """ Obtiene el turno y su resultado con dos consultas que corren a la vez, en conexiones distintas. """
+        turno, resultado_completo = await asyncio.gather(
+            self.turno_dao.obtener_por_id(id_turno),
+            self.resultado_dao.obtener_resultado_de_turno(id_turno)
+        )
+        if not turno:
+            return None, "Turno no encontrado."
+
+        if turno.estado != 'FINALIZADO' or not turno.id_resultado:
+            resultado_completo = None
+        return {**turno.to_dict(), 'resultado_inspeccion': resultado_completo}, None
+
+    async def consultar_turnos_pendientes(self, limite: int = None, despues_de: tuple = None):
+        """ Obtiene una página de turnos en estado 'RESERVADO', a partir de la clave (fecha, id_turno) dada. """
+        limite = limite or current_app.config['PAGINA_TAMANIO_DEFECTO']
+        pendientes = await self.turno_dao.obtener_pendientes(limite, despues_de)
+        return [turno.to_dict() for turno in pendientes], None
+
+    async def finalizar_turno_inspeccion(self, id_turno: int, detalles_control: list):
+        """ Finaliza un turno de inspección, calcula y guarda el resultado. """
+        turno = await self.turno_dao.obtener_por_id(id_turno)
+        if not turno or turno.estado != 'RESERVADO':
+            return None, "Turno no encontrado o no está listo para ser finalizado."
+
+        puntaje, falla, detalles_obj, error = self._procesar_detalles_inspeccion(detalles_control)
+        if error:
+            return None, error
+
+        resultado_final = self._determinar_resultado_final(puntaje, falla)
+        resultado_cabecera = Resultado(
+            resultado=resultado_final,
+            puntaje_total=puntaje,
+            observaciones=f"Resultado automatico: {resultado_final} con {puntaje}/80 puntos."
+        )
+
+        id_resultado = await self.resultado_dao.registrar_resultado_inspeccion(turno, resultado_cabecera, detalles_obj)
+        if id_resultado:
+            return {'id_turno': id_turno, 'resultado': resultado_final}, None
+
+        current_app.logger.error("Fallo crítico al guardar la transacción en la DB para el turno ID: %s", id_turno)
+        return None, "Error al guardar la transacción de resultados en la DB."
+
+class AuthServiceAsync(AuthService):
+    """ AuthService asíncrono. bcrypt corre en el ejecutor acotado sin bloquear el event loop. """
+
+    async def _bcrypt_async(self, funcion, *args):
+        return await asyncio.to_thread(self._bcrypt, funcion, *args)
+
+    async def login(self, username: str, password: str):
+        """ Verifica credenciales y genera los tokens. Lanza ColaHashLlenaError si el ejecutor está saturado. """
+        usuario = await self.usuario_dao.obtener_por_username(username)
+        if usuario and await self._bcrypt_async(usuario.check_password, password):
+            resultado = {'token': usuario.generate_auth_token(), 'rol': usuario.rol}
+            if self.token_revocado_dao is not None:
+                resultado['refresh_token'] = usuario.generate_refresh_token()
+            return resultado
+        return None
+
+    async def hashear_password(self, password: str):
+        return await self._bcrypt_async(Usuario.hash_password, password)
+
+    async def refrescar(self, refresh_token: str):
+        """ Emite un nuevo token de acceso a partir de un refresh token válido y no revocado. """
+        data, error = self._decodificar_refresh(refresh_token)
+        if error:
+            return None, error
+
+        estado = await self.token_revocado_dao.obtener_estado_refresh(data['jti'], data['sub'])
+        return self._emitir_desde_refresh(data, estado)
+
+    async def revocar(self, refresh_token: str):
+        """ Revoca el refresh token (logout) hasta su expiración. """
+        data, error = self._decodificar_refresh(refresh_token)
+        if error:
+            return False, error
+
+        expira = datetime.fromtimestamp(data['exp'], tz=timezone.utc).replace(tzinfo=None)
+        if not await self.token_revocado_dao.revocar(data['jti'], expira):
+            return False, "Error al revocar el refresh token."
+        return True, None
+
+class AdminServiceAsync(AdminService):
+    """ AdminService asíncrono, sin el índice de disponibilidad en memoria. """
+
+    async def crear_usuario(self, username, password, rol):
+        """ Hashea la contraseña y crea un nuevo usuario. Lanza ColaHashLlenaError si el ejecutor está saturado. """
+        if await self.usuario_dao.obtener_por_username(username):
+            return None, f"El usuario '{username}' ya existe."
+
+        if self.ejecutor_hash is None:
+            hashed_pw = await asyncio.to_thread(Usuario.hash_password, password)
+        else:
+            hashed_pw = await asyncio.to_thread(self.ejecutor_hash.ejecutar, Usuario.hash_password, password)
+
+        nuevo_usuario = Usuario(username=username, password_hash=hashed_pw, rol=rol)
+        id_usuario = await self.usuario_dao.crear(nuevo_usuario)
+        if id_usuario:
+            nuevo_usuario.id_usuario = id_usuario
+            return nuevo_usuario, None
+        return None, "Error al crear el usuario en la base de datos."
+
+    async def consultar_usuarios(self, limite: int, despues_de_id: int = None):
+        """ Devuelve una página de usuarios ordenada por id, a partir del id indicado. """
+        return await self.usuario_dao.obtener_todos(limite, despues_de_id)
+
+    async def crear_turnos(self, fecha_str):
+        """ Crea los turnos de la agenda del día en una única transacción. """
+        turnos_a_crear, error = self._generar_turnos(fecha_str)
+        if error:
+            return None, error
+        if not turnos_a_crear:
+            return 0, None
+
+        rows_affected = await self.turno_dao.crear_varios(turnos_a_crear)
+        if rows_affected is not None:
+            return rows_affected, None
+        return None, "Error al insertar los turnos en la base de datos."
+
+    async def crear_turnos_rango(self, desde_str, hasta_str, dias_semana_str=None, hora_inicio_str=None,
+                                 hora_fin_str=None, intervalo_minutos=None):
+        """ Abre la agenda de los días desde..hasta en una única transacción, omitiendo los horarios existentes. """
+        turnos_a_crear, error = self._preparar_turnos_rango(desde_str, hasta_str, dias_semana_str,
+                                                            hora_inicio_str, hora_fin_str, intervalo_minutos)
+        if error:
+            return None, error
+        if not turnos_a_crear:
+            return {'creados': 0, 'existentes': 0}, None
+
+        creados = await self.turno_dao.crear_varios(turnos_a_crear, tamanio_lote=current_app.config['TURNOS_ALTA_TAMANIO_LOTE'])
+        if creados is None:
+            return None, "Error al insertar los turnos en la base de datos."
+        return {'creados': creados, 'existentes': len(turnos_a_crear) - creados}, None
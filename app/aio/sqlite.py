@@ -0,0 +1,134 @@
+"""
+Reemplazo local de MySQL sobre SQLite para la capa asíncrona (tests y benchmarks).
+
+Cada conexión ejecuta sus sentencias en un hilo propio (como aiosqlite): si compartieran el
+pool de hilos del loop, las conexiones que esperan el lock de escritura podrían ocupar todos
+los hilos y dejar sin avanzar a la que lo tiene. Las consultas de los DAOs se traducen lo
+justo para SQLite: placeholders '%s' -> '?', INSERT IGNORE, ON DUPLICATE KEY UPDATE y
+FOR UPDATE (SQLite bloquea la base entera al escribir).
+"""
+import asyncio
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from .conexion import ResultadoSQL
+
+ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS Usuarios (
+    id_usuario INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(100) NOT NULL UNIQUE,
+    password_hash VARCHAR(255) NOT NULL,
+    rol VARCHAR(50) NOT NULL DEFAULT 'CLIENTE',
+    version_token INT NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS Vehiculos (
+    matricula VARCHAR(20) PRIMARY KEY,
+    id_marca INT NOT NULL,
+    anio INT
+);
+CREATE TABLE IF NOT EXISTS Resultados (
+    id_resultado INTEGER PRIMARY KEY AUTOINCREMENT,
+    resultado VARCHAR(50),
+    puntaje_total INT,
+    observaciones TEXT
+);
+CREATE TABLE IF NOT EXISTS ResultadosPorControl (
+    id_resultado INT NOT NULL,
+    id_control INT NOT NULL,
+    calificacion INT,
+    observaciones TEXT,
+    PRIMARY KEY (id_resultado, id_control)
+);
+CREATE TABLE IF NOT EXISTS Turnos (
+    id_turno INTEGER PRIMARY KEY AUTOINCREMENT,
+    matricula VARCHAR(20) NULL,
+    fecha DATETIME NOT NULL,
+    id_resultado INT NULL,
+    estado VARCHAR(50) NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_turnos_estado_fecha ON Turnos (estado, fecha);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_turnos_fecha ON Turnos (fecha);
+CREATE TABLE IF NOT EXISTS TokensRevocados (
+    jti BLOB PRIMARY KEY,
+    expira DATETIME NOT NULL
+);
+"""
+
+_TRADUCCIONES = (
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\bINSERT\s+IGNORE\b', re.IGNORECASE), 'INSERT OR IGNORE'),
+    (re.compile(r'\bON\s+DUPLICATE\s+KEY\s+UPDATE\b.*$', re.IGNORECASE | re.DOTALL), 'ON CONFLICT DO NOTHING'),
+    (re.compile(r'\bFOR\s+UPDATE\b', re.IGNORECASE), ''),
+)
+
+sqlite3.register_adapter(datetime, lambda valor: valor.isoformat(' '))
+sqlite3.register_converter('DATETIME', lambda valor: datetime.fromisoformat(valor.decode('ascii')))
+
+def traducir_sql(query):
+    for patron, reemplazo in _TRADUCCIONES:
+        query = patron.sub(reemplazo, query)
+    return query
+
+class ConexionSQLite:
+    """ Conexión a un archivo SQLite con la interfaz que usa ConexionAsincrona. """
+
+    def __init__(self, conexion, hilo):
+        self._conexion = conexion
+        self._hilo = hilo
+
+    async def _en_hilo(self, funcion, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._hilo, funcion, *args)
+
+    def _ejecutar(self, query, params):
+        cursor = self._conexion.execute(traducir_sql(query), tuple(params))
+        columnas = tuple(c[0] for c in cursor.description) if cursor.description else ()
+        filas = cursor.fetchall() if cursor.description else []
+        return ResultadoSQL(columnas, filas, cursor.lastrowid, cursor.rowcount)
+
+    def _ejecutar_varios(self, query, seq_params):
+        cursor = self._conexion.executemany(traducir_sql(query), [tuple(p) for p in seq_params])
+        return ResultadoSQL((), [], cursor.lastrowid, cursor.rowcount)
+
+    async def ejecutar(self, query, params):
+        return await self._en_hilo(self._ejecutar, query, params)
+
+    async def ejecutar_varios(self, query, seq_params):
+        return await self._en_hilo(self._ejecutar_varios, query, seq_params)
+
+    async def ping(self):
+        await self._en_hilo(self._conexion.execute, 'SELECT 1')
+
+    async def commit(self):
+        await self._en_hilo(self._conexion.commit)
+
+    async def rollback(self):
+        await self._en_hilo(self._conexion.rollback)
+
+    async def cerrar(self):
+        await self._en_hilo(self._conexion.close)
+        self._hilo.shutdown(wait=False)
+
+def _abrir(ruta):
+    conexion = sqlite3.connect(ruta, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False, timeout=30)
+    conexion.execute('PRAGMA journal_mode=WAL')
+    return conexion
+
+def crear_esquema(ruta):
+    """ Crea las tablas en el archivo SQLite `ruta` si no existen. """
+    conexion = _abrir(ruta)
+    try:
+        conexion.executescript(ESQUEMA_SQLITE)
+    finally:
+        conexion.close()
+
+def conectar_sqlite(ruta):
+    """ Devuelve la corrutina que abre conexiones al archivo SQLite `ruta`, para PoolAsincrono. """
+
+    async def conectar():
+        hilo = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite')
+        conexion = await asyncio.get_running_loop().run_in_executor(hilo, _abrir, ruta)
+        return ConexionSQLite(conexion, hilo)
+
+    return conectar
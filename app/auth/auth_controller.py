@@ -1,13 +1,20 @@
-from flask import Blueprint, request, jsonify, g
+import click
+from flask import Blueprint, request, jsonify, g, current_app
 from .auth_required import token_required
-
-import bcrypt
-
+from .ejecutor_hash import ColaHashLlenaError
 
 auth_service = None
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
+@auth_bp.app_errorhandler(ColaHashLlenaError)
+def cola_hash_llena(error):
+    """ Rechaza de inmediato el pedido cuando el ejecutor de bcrypt está saturado. """
+    current_app.logger.warning("Ejecutor de hashing saturado: %s", error)
+    response = jsonify({'message': 'Servicio de autenticación saturado. Intente nuevamente en unos segundos.'})
+    response.headers['Retry-After'] = str(current_app.config['HASH_RETRY_AFTER_SEGUNDOS'])
+    return response, 503
+
 @auth_bp.route('/test-protected', methods=['GET'])
 @token_required
 def test_protected_route():
@@ -27,7 +34,7 @@ def hash_creator():
     if not data or 'password' not in data:
         return jsonify({'error': 'Se requiere el campo "password"'}), 400
     password = data['password']
-    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    hashed = auth_service.hashear_password(password)
     return jsonify({'hashed_password': hashed}), 200
 
 @auth_bp.route('/login', methods=['POST'])
@@ -43,10 +50,49 @@ def login():
     global auth_service
     auth_result = auth_service.login(usuario, password)
     if auth_result:
-        return jsonify({
+        respuesta = {
             'message': 'Autenticación exitosa',
             'token': auth_result['token'],
             'rol': auth_result['rol']
-        }), 200
+        }
+        if 'refresh_token' in auth_result:
+            respuesta['refresh_token'] = auth_result['refresh_token']
+        return jsonify(respuesta), 200
     else:
         return jsonify({'message': 'Usuario o contraseña incorrectos'}), 401
+
+@auth_bp.route('/refresh', methods=['POST'])
+def refresh():
+    """ Canjea un refresh token por un nuevo token de acceso, sin verificar la contraseña. """
+    data = request.get_json(silent=True)
+    if not data or 'refresh_token' not in data:
+        return jsonify({'message': 'Se requiere el campo "refresh_token"'}), 400
+
+    resultado, error = auth_service.refrescar(data['refresh_token'])
+    if error:
+        return jsonify({'message': error}), 401
+
+    return jsonify({
+        'message': 'Token renovado',
+        'token': resultado['token'],
+        'rol': resultado['rol']
+    }), 200
+
+@auth_bp.route('/logout', methods=['POST'])
+def logout():
+    """ Revoca el refresh token indicado. """
+    data = request.get_json(silent=True)
+    if not data or 'refresh_token' not in data:
+        return jsonify({'message': 'Se requiere el campo "refresh_token"'}), 400
+
+    _, error = auth_service.revocar(data['refresh_token'])
+    if error:
+        return jsonify({'message': error}), 401
+
+    return jsonify({'message': 'Sesión cerrada'}), 200
+
+@auth_bp.cli.command('purgar-revocados')
+def purgar_revocados():
+    """Elimina de TokensRevocados los refresh tokens ya expirados."""
+    borrados = auth_service.purgar_revocados()
+    click.echo(f"Revocaciones expiradas eliminadas: {borrados}")
@@ -1,7 +1,49 @@
+import hashlib
+import time
 from functools import wraps
+from types import MappingProxyType
 from flask import request, jsonify, current_app, g
 import jwt
 
+# Clave en app.extensions de la cache de tokens ya verificados (CacheLRU). Si no está, se verifica siempre.
+EXTENSION_CACHE_TOKENS = 'tokens_verificados'
+
+def _verificar(token):
+    """ Decodifica el JWT verificando firma y expiración. Los claims se devuelven de solo lectura. """
+    data = jwt.decode(
+        token,
+        current_app.config['JWT_SECRET_KEY'],
+        algorithms=['HS256']
+    )
+
+    if data.get('typ') == 'refresh':
+        # Un refresh token solo sirve para /api/auth/refresh, no como token de acceso.
+        raise jwt.InvalidTokenError('refresh token usado como token de acceso')
+
+    return MappingProxyType(data)
+
+def _claims_verificados(token):
+    """
+    Devuelve los claims del token, usando la cache de tokens verificados si está configurada.
+    La clave es el SHA-256 del token y una entrada nunca se usa después del 'exp' del token.
+    """
+    cache = current_app.extensions.get(EXTENSION_CACHE_TOKENS)
+    if cache is None:
+        return _verificar(token)
+
+    clave = hashlib.sha256(token.encode('utf-8')).digest()
+    entrada = cache.obtener(clave)
+    if entrada is not None:
+        data, exp = entrada
+        if time.time() < exp:
+            return data
+        cache.invalidar(clave)
+
+    data = _verificar(token)
+    if 'exp' in data:
+        cache.guardar(clave, (data, data['exp']))
+    return data
+
 def token_required(f):
     """ Decorador que verifica la existencia y validez de un Token Web JSON (JWT) en el header 'Authorization' de la petición."""
     @wraps(f)
@@ -19,13 +61,7 @@ def token_required(f):
             }), 401
 
         try:
-            data = jwt.decode(
-                token,
-                current_app.config['JWT_SECRET_KEY'],
-                algorithms=['HS256']
-            )
-
-            g.current_user = data
+            g.current_user = _claims_verificados(token)
 
         except jwt.ExpiredSignatureError:
             return jsonify({'message': 'Token expirado. Inicie sesión nuevamente.'}), 401
@@ -40,10 +76,12 @@ def token_required(f):
 
 def roles_required(roles):
     """ Decorador que verifica si el usuario autenticado tiene uno de los roles requeridos. """
+    roles_permitidos = frozenset(roles)
+
     def wrapper(f):
         @wraps(f)
         def decorated_view(*args, **kwargs):
-            if 'current_user' in g and g.current_user['rol'] in roles:
+            if 'current_user' in g and g.current_user.get('rol') in roles_permitidos:
                 return f(*args, **kwargs)
 
             return jsonify({
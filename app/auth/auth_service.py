@@ -1,14 +1,98 @@
+from datetime import datetime, timezone
+from flask import current_app
+import jwt
+
+from ..models import Usuario
 
 class AuthService:
 
-    def __init__(self, usuario_dao) -> None:
+    def __init__(self, usuario_dao, ejecutor_hash=None, token_revocado_dao=None) -> None:
         self.usuario_dao = usuario_dao
+        self.ejecutor_hash = ejecutor_hash
+        self.token_revocado_dao = token_revocado_dao
+
+    def _bcrypt(self, funcion, *args):
+        """Corre el trabajo de bcrypt en el ejecutor acotado, si está configurado."""
+        if self.ejecutor_hash is None:
+            return funcion(*args)
+        return self.ejecutor_hash.ejecutar(funcion, *args)
 
     def login(self, username: str, password: str):
-        """Verifica credenciales y genera un token JWT."""
+        """
+        Verifica credenciales y genera un token JWT, más un refresh token si están habilitados.
+        Lanza ColaHashLlenaError si el ejecutor de hashing está saturado.
+        """
         usuario = self.usuario_dao.obtener_por_username(username)
-        if usuario and usuario.check_password(password):
+        if usuario and self._bcrypt(usuario.check_password, password):
             token = usuario.generate_auth_token()
-            return {'token': token, 'rol': usuario.rol}
+            resultado = {'token': token, 'rol': usuario.rol}
+            if self.token_revocado_dao is not None:
+                resultado['refresh_token'] = usuario.generate_refresh_token()
+            return resultado
+
+        return None
+
+    def hashear_password(self, password: str):
+        """Devuelve el hash bcrypt de la contraseña. Lanza ColaHashLlenaError si no hay lugar."""
+        return self._bcrypt(Usuario.hash_password, password)
+
+    def _decodificar_refresh(self, refresh_token: str):
+        """Valida firma, expiración y tipo del refresh token. Devuelve (claims, error)."""
+        if self.token_revocado_dao is None:
+            return None, "Los refresh tokens no están habilitados."
+        try:
+            data = jwt.decode(
+                refresh_token,
+                current_app.config['JWT_SECRET_KEY'],
+                algorithms=['HS256'],
+                options={'require': ['exp', 'jti', 'sub']}
+            )
+        except jwt.ExpiredSignatureError:
+            return None, "Refresh token expirado. Inicie sesión nuevamente."
+        except jwt.InvalidTokenError:
+            return None, "Refresh token inválido."
+
+        if data.get('typ') != 'refresh':
+            return None, "Refresh token inválido."
+        return data, None
+
+    def refrescar(self, refresh_token: str):
+        """
+        Emite un nuevo token de acceso a partir de un refresh token válido y no revocado.
+        Sin bcrypt: verifica la firma HMAC y lee en una sola consulta por clave primaria el
+        usuario y la lista de revocados. El rol sale de la fila, no del token.
+        """
+        data, error = self._decodificar_refresh(refresh_token)
+        if error:
+            return None, error
+
+        return self._emitir_desde_refresh(data, self.token_revocado_dao.obtener_estado_refresh(data['jti'], data['sub']))
+
+    @staticmethod
+    def _emitir_desde_refresh(data, estado):
+        """Emite el token de acceso si el usuario existe, el jti no fue revocado y la versión coincide."""
+        if estado is None:
+            return None, "Refresh token inválido."
+        usuario, revocado = estado
+        # Los refresh tokens emitidos antes de la migración 007 no llevan 'ver': equivalen a la versión 0
+        if revocado or usuario.version_token != data.get('ver', 0):
+            return None, "Refresh token revocado. Inicie sesión nuevamente."
+        return {'token': usuario.generate_auth_token(), 'rol': usuario.rol}, None
+
+    def revocar(self, refresh_token: str):
+        """ Revoca el refresh token (logout) hasta su expiración. """
+        data, error = self._decodificar_refresh(refresh_token)
+        if error:
+            return False, error
+
+        expira = datetime.fromtimestamp(data['exp'], tz=timezone.utc).replace(tzinfo=None)
+        if not self.token_revocado_dao.revocar(data['jti'], expira):
+            return False, "Error al revocar el refresh token."
+        return True, None
 
-        return None
\ No newline at end of file
+    def purgar_revocados(self):
+        """ Borra las revocaciones de refresh tokens que ya expiraron. """
+        if self.token_revocado_dao is None:
+            return 0
+        ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+        return self.token_revocado_dao.purgar_expirados(ahora)
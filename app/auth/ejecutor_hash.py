@@ -0,0 +1,65 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class ColaHashLlenaError(Exception):
+    """El ejecutor de hashing no admite más trabajos; la petición debe reintentarse más tarde."""
+
+class EjecutorHash:
+    """
+    Ejecutor acotado para el trabajo de bcrypt (hashear y verificar contraseñas).
+
+    Corre en `max_workers` hilos propios y admite a lo sumo `max_cola` trabajos esperando
+    turno. Si no hay lugar, `ejecutar` falla de inmediato con ColaHashLlenaError en vez de
+    encolar, para que una ráfaga de logins no ocupe todos los workers de la API.
+
+    Cada trabajo admitido bloquea al hilo del servidor que lo pidió hasta que termina, así que
+    `max_admitidos` acota el total (en ejecución más en espera) por debajo de los hilos del
+    worker; sin él, el tope es `max_workers + max_cola`.
+    """
+
+    def __init__(self, max_workers=2, max_cola=16, max_admitidos=None):
+        self.max_workers = max_workers
+        self.max_cola = max_cola
+        self.max_admitidos = max_workers + max_cola
+        if max_admitidos is not None:
+            self.max_admitidos = max(1, min(max_admitidos, self.max_admitidos))
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Crea hilos y contadores nuevos; se usa en el proceso hijo tras un fork."""
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='hash')
+        self._lock = threading.Lock()
+        self._en_curso = 0
+        self._completados = 0
+        self._rechazados = 0
+
+    def ejecutar(self, funcion, *args):
+        """Ejecuta `funcion(*args)` en el pool y espera su resultado."""
+        with self._lock:
+            if self._en_curso >= self.max_admitidos:
+                self._rechazados += 1
+                raise ColaHashLlenaError("Demasiadas solicitudes de autenticación en curso.")
+            self._en_curso += 1
+
+        try:
+            return self._executor.submit(funcion, *args).result()
+        finally:
+            with self._lock:
+                self._en_curso -= 1
+                self._completados += 1
+
+    def cerrar(self):
+        """Espera a que terminen los trabajos en curso y detiene los hilos."""
+        self._executor.shutdown(wait=True)
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_cola': self.max_cola,
+                'max_admitidos': self.max_admitidos,
+                'en_curso': self._en_curso,
+                'en_cola': max(0, self._en_curso - self.max_workers),
+                'completados': self._completados,
+                'rechazados': self._rechazados,
+            }
@@ -0,0 +1,175 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+def estimar_bytes(valor):
+    """Estimación aproximada de la memoria ocupada por dicts, listas, tuplas y escalares anidados."""
+    total = sys.getsizeof(valor)
+    if isinstance(valor, dict):
+        for k, v in valor.items():
+            total += estimar_bytes(k) + estimar_bytes(v)
+    elif isinstance(valor, (list, tuple)):
+        for v in valor:
+            total += estimar_bytes(v)
+    return total
+
+class _CargaEnCurso:
+    """Carga de una clave en progreso; los demás hilos esperan su resultado."""
+    def __init__(self):
+        self.listo = threading.Event()
+        self.valor = None
+        self.error = None
+        self.invalidada = False
+
+class CacheLRU:
+    """
+    Cache en memoria, thread-safe, acotada por cantidad de entradas (desalojo LRU)
+    y con expiración opcional por TTL en segundos. Si se indica `max_peso`, también
+    desaloja hasta que la suma de `peso(valor)` de las entradas no lo supere.
+
+    `obtener_o_cargar` garantiza que, ante varios fallos simultáneos para la misma
+    clave, la función de carga se ejecute una sola vez y el resto comparta su resultado.
+    """
+
+    def __init__(self, max_entradas=256, ttl=None, reloj=time.monotonic, max_peso=None, peso=estimar_bytes):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.max_peso = max_peso
+        self._peso = peso
+        self._peso_total = 0
+        self._reloj = reloj
+        self._datos = OrderedDict()  # clave -> (valor, expira_en, peso)
+        self._cargas = {}
+        self._lock = threading.Lock()
+        self._aciertos = 0
+        self._fallos = 0
+        self._desalojos = 0
+        self._expiraciones = 0
+        self._invalidaciones = 0
+        self._cargas_compartidas = 0
+
+    def _buscar(self, clave, renovar=True):
+        """Busca la clave con el lock tomado. Devuelve (encontrado, valor)."""
+        entrada = self._datos.get(clave)
+        if entrada is None:
+            return False, None
+        valor, expira_en, _ = entrada
+        if expira_en is not None and self._reloj() >= expira_en:
+            self._quitar(clave)
+            self._expiraciones += 1
+            return False, None
+        if renovar:
+            self._datos.move_to_end(clave)
+        return True, valor
+
+    def _quitar(self, clave):
+        entrada = self._datos.pop(clave, None)
+        if entrada is not None:
+            self._peso_total -= entrada[2]
+        return entrada
+
+    def _guardar(self, clave, valor):
+        expira_en = self._reloj() + self.ttl if self.ttl is not None else None
+        peso = self._peso(valor) if self.max_peso is not None else 0
+        self._quitar(clave)
+        self._datos[clave] = (valor, expira_en, peso)
+        self._peso_total += peso
+        while len(self._datos) > self.max_entradas or (
+                self.max_peso is not None and self._peso_total > self.max_peso and len(self._datos) > 1):
+            _, (_, _, peso_desalojado) = self._datos.popitem(last=False)
+            self._peso_total -= peso_desalojado
+            self._desalojos += 1
+
+    def obtener(self, clave, default=None):
+        """Devuelve el valor cacheado o `default` si no existe o expiró."""
+        with self._lock:
+            encontrado, valor = self._buscar(clave)
+            if encontrado:
+                self._aciertos += 1
+                return valor
+            self._fallos += 1
+            return default
+
+    def consultar(self, clave, default=None):
+        """
+        Como `obtener`, pero sin contar aciertos ni fallos ni renovar la posición LRU: para
+        lecturas internas (mantenimiento, diagnóstico) que no son uso real de la cache.
+        """
+        with self._lock:
+            encontrado, valor = self._buscar(clave, renovar=False)
+            return valor if encontrado else default
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._guardar(clave, valor)
+
+    def obtener_o_cargar(self, clave, cargar):
+        """Devuelve el valor cacheado o lo obtiene con `cargar()`, compartiendo cargas concurrentes."""
+        with self._lock:
+            encontrado, valor = self._buscar(clave)
+            if encontrado:
+                self._aciertos += 1
+                return valor
+            self._fallos += 1
+            carga = self._cargas.get(clave)
+            propietario = carga is None
+            if propietario:
+                carga = self._cargas[clave] = _CargaEnCurso()
+            else:
+                self._cargas_compartidas += 1
+
+        if not propietario:
+            carga.listo.wait()
+            if carga.error is not None:
+                raise carga.error
+            return carga.valor
+
+        try:
+            carga.valor = cargar()
+        except BaseException as e:
+            carga.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._cargas[clave]
+                if carga.error is None and not carga.invalidada:
+                    self._guardar(clave, carga.valor)
+            carga.listo.set()
+        return carga.valor
+
+    def invalidar(self, clave):
+        """Elimina la clave. Si hay una carga en curso, su resultado no se guardará."""
+        with self._lock:
+            if self._quitar(clave) is not None:
+                self._invalidaciones += 1
+            carga = self._cargas.get(clave)
+            if carga is not None:
+                carga.invalidada = True
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self._peso_total = 0
+            for carga in self._cargas.values():
+                carga.invalidada = True
+
+    def __len__(self):
+        return len(self._datos)
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self._aciertos + self._fallos
+            return {
+                'entradas': len(self._datos),
+                'max_entradas': self.max_entradas,
+                'peso_total': self._peso_total,
+                'max_peso': self.max_peso,
+                'aciertos': self._aciertos,
+                'fallos': self._fallos,
+                'tasa_aciertos': round(self._aciertos / consultas, 4) if consultas else 0.0,
+                'desalojos': self._desalojos,
+                'expiraciones': self._expiraciones,
+                'invalidaciones': self._invalidaciones,
+                'cargas_compartidas': self._cargas_compartidas,
+            }
@@ -7,5 +7,82 @@ class Config:
     DB_NAME = os.environ.get('DB_NAME') or 'db_vehiculos'
     DB_PORT = os.environ.get('DB_PORT') or 3306
 
+    # Pool de conexiones
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 5) # conexiones ociosas que se conservan
+    DB_POOL_MAX_OVERFLOW = int(os.environ.get('DB_POOL_MAX_OVERFLOW') or 10) # conexiones extra en picos
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT') or 10) # segundos de espera máxima
+    DB_POOL_PING_INTERVAL = float(os.environ.get('DB_POOL_PING_INTERVAL') or 30) # ping si estuvo ociosa más de N segundos
+
+    # Agenda diaria de turnos: de AGENDA_HORA_INICIO a AGENDA_HORA_FIN cada AGENDA_INTERVALO_MINUTOS
+    AGENDA_HORA_INICIO = os.environ.get('AGENDA_HORA_INICIO') or '09:00'
+    AGENDA_HORA_FIN = os.environ.get('AGENDA_HORA_FIN') or '18:00'
+    AGENDA_INTERVALO_MINUTOS = int(os.environ.get('AGENDA_INTERVALO_MINUTOS') or 30)
+    # Agenda virtual: los slots libres se calculan con las reglas (horario, días de la semana,
+    # AgendaExcepciones) y solo las reservas se guardan en Turnos
+    AGENDA_VIRTUAL = os.environ.get('AGENDA_VIRTUAL') == '1'
+    AGENDA_DIAS_SEMANA = os.environ.get('AGENDA_DIAS_SEMANA') or '1,2,3,4,5,6,7' # 1 = lunes ... 7 = domingo
+    AGENDA_CAPACIDAD = int(os.environ.get('AGENDA_CAPACIDAD') or 1) # carriles de inspección por horario
+
+    # Alta masiva de turnos por rango de fechas (POST /api/admin/turnos/bulk-create?desde=&hasta=)
+    TURNOS_ALTA_MAX_DIAS = int(os.environ.get('TURNOS_ALTA_MAX_DIAS') or 366)
+    TURNOS_ALTA_TAMANIO_LOTE = int(os.environ.get('TURNOS_ALTA_TAMANIO_LOTE') or 500) # filas por INSERT
+
+    # Índice de disponibilidad en memoria (bitset por día)
+    INDICE_DISPONIBILIDAD_MAX_DIAS = int(os.environ.get('INDICE_DISPONIBILIDAD_MAX_DIAS') or 400)
+    INDICE_DISPONIBILIDAD_TTL = float(os.environ.get('INDICE_DISPONIBILIDAD_TTL') or 30) # segundos; cada worker ve las escrituras de los demás al vencer
+    PROXIMO_LIBRE_MAX_DIAS = int(os.environ.get('PROXIMO_LIBRE_MAX_DIAS') or 30)
+    RESERVA_HORIZONTE_DIAS = int(os.environ.get('RESERVA_HORIZONTE_DIAS') or 90) # con agenda virtual, días hacia adelante que se pueden reservar
+    RESERVA_PROXIMO_MAX_INTENTOS = int(os.environ.get('RESERVA_PROXIMO_MAX_INTENTOS') or 5) # horarios a probar con agenda virtual
+
+    # Cache de disponibilidad por fecha
+    DISPONIBILIDAD_CACHE_MAX_FECHAS = int(os.environ.get('DISPONIBILIDAD_CACHE_MAX_FECHAS') or 366)
+    DISPONIBILIDAD_CACHE_TTL = float(os.environ.get('DISPONIBILIDAD_CACHE_TTL') or 30) # segundos
+    DISPONIBILIDAD_RANGO_MAX_DIAS = int(os.environ.get('DISPONIBILIDAD_RANGO_MAX_DIAS') or 62)
+
+    # Cache de resultados de inspecciones finalizadas (inmutables)
+    RESULTADOS_CACHE_MAX_ENTRADAS = int(os.environ.get('RESULTADOS_CACHE_MAX_ENTRADAS') or 10000)
+    RESULTADOS_CACHE_MAX_BYTES = int(os.environ.get('RESULTADOS_CACHE_MAX_BYTES') or 16 * 1024 * 1024)
+
+    # Paginación por cursor de los listados
+    PAGINA_TAMANIO_DEFECTO = int(os.environ.get('PAGINA_TAMANIO_DEFECTO') or 50)
+    PAGINA_TAMANIO_MAXIMO = int(os.environ.get('PAGINA_TAMANIO_MAXIMO') or 500)
+
+    # Migraciones versionadas del esquema (flask migrar)
+    MIGRACIONES_DIR = os.environ.get('MIGRACIONES_DIR') or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'db', 'migrations'
+    )
+
+    # Ejecutor acotado para bcrypt: hilos dedicados y trabajos en espera antes de responder 503.
+    # El total admitido se recorta a WEB_THREADS - 1 para no bloquear todos los hilos del worker.
+    HASH_WORKERS = int(os.environ.get('HASH_WORKERS') or 2)
+    HASH_COLA_MAX = int(os.environ.get('HASH_COLA_MAX') or 16)
+    HASH_RETRY_AFTER_SEGUNDOS = int(os.environ.get('HASH_RETRY_AFTER_SEGUNDOS') or 1) # valor del header Retry-After
+
+    # Métricas de pedidos en formato Prometheus (GET /api/metrics)
+    METRICAS_HABILITADAS = (os.environ.get('METRICAS_HABILITADAS') or '1') != '0'
+
+    # Traza de consultas por pedido
+    DB_CONSULTA_LENTA_SEGUNDOS = float(os.environ.get('DB_CONSULTA_LENTA_SEGUNDOS') or 0.5) # umbral del log de consultas lentas
+    DB_TRAZA_HEADERS = os.environ.get('DB_TRAZA_HEADERS') == '1' # agrega X-DB-Queries / X-DB-Time-Ms a las respuestas
+
+    # Cache de tokens JWT ya verificados (cada entrada vive como máximo hasta el 'exp' del token)
+    TOKEN_CACHE_MAX_ENTRADAS = int(os.environ.get('TOKEN_CACHE_MAX_ENTRADAS') or 10000)
+
+    # Servidor de run.py: 'desarrollo' (servidor de Flask) o 'produccion' (gunicorn con la app precargada)
+    SERVIDOR = os.environ.get('SERVIDOR') or 'desarrollo'
+    WEB_WORKERS = int(os.environ.get('WEB_WORKERS') or 0) # procesos; 0 = uno por CPU. Cada uno tiene su pool de DB
+    WEB_THREADS = int(os.environ.get('WEB_THREADS') or 4) # hilos por proceso; 1 = worker sync
+    WEB_TIMEOUT = int(os.environ.get('WEB_TIMEOUT') or 30) # segundos sin respuesta antes de reiniciar un worker
+    WEB_GRACEFUL_TIMEOUT = int(os.environ.get('WEB_GRACEFUL_TIMEOUT') or 30) # espera a los pedidos en curso al apagar
+    WEB_KEEPALIVE = int(os.environ.get('WEB_KEEPALIVE') or 5)
+    WEB_MAX_REQUESTS = int(os.environ.get('WEB_MAX_REQUESTS') or 0) # reciclar cada worker tras N pedidos; 0 = nunca
+
+    # Logging asíncrono (QueueHandler + QueueListener)
+    LOG_NIVEL = os.environ.get('LOG_NIVEL') or 'INFO'
+    LOG_FORMATO = os.environ.get('LOG_FORMATO') or 'json' # 'json' o 'texto'
+    LOG_MUESTREO = {'app.health': 100} # logger -> se conserva 1 de cada N registros INFO/DEBUG
+    LOG_LIMITE_POR_SEGUNDO = int(os.environ.get('LOG_LIMITE_POR_SEGUNDO') or 20) # por mensaje, INFO/DEBUG; 0 sin límite
+
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'test-token'
-    JWT_EXPIRATION_SECONDS = os.environ.get('JWT_EXPIRATION_SECONDS') or 60*5 # 5 minutos
\ No newline at end of file
+    JWT_EXPIRATION_SECONDS = os.environ.get('JWT_EXPIRATION_SECONDS') or 60*5 # 5 minutos
+    JWT_REFRESH_EXPIRATION_SECONDS = int(os.environ.get('JWT_REFRESH_EXPIRATION_SECONDS') or 60*60*24*7) # 7 días
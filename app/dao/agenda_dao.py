@@ -0,0 +1,79 @@
+# app/dao/agenda_dao.py
+from datetime import date, datetime, timedelta
+from flask import current_app
+from ..db_connection import DBConnection
+from ..models import ExcepcionAgenda
+
+def _a_time(valor):
+    """ mysql-connector devuelve las columnas TIME como timedelta. """
+    if isinstance(valor, timedelta):
+        return (datetime.min + valor).time()
+    return valor
+
+class AgendaDAO:
+    """ Excepciones de la agenda (feriados y horarios especiales), indexadas por fecha. """
+
+    def __init__(self):
+        self._observadores = []
+
+    def agregar_observador(self, callback):
+        """ Registra una función que recibe la lista de fechas cuyas excepciones cambiaron. """
+        self._observadores.append(callback)
+
+    def _notificar(self, fechas: list[date]):
+        for callback in self._observadores:
+            callback(fechas)
+
+    def obtener_excepciones(self, desde: date, hasta: date):
+        """
+        Devuelve las excepciones de los días desde..hasta (inclusive), ordenadas por fecha. Si la
+        consulta falla registra el error y lo relanza: sin excepciones, un feriado se ofrecería abierto.
+        """
+        query = """
+            SELECT fecha, hora_inicio, hora_fin, motivo, capacidad
+            FROM AgendaExcepciones
+            WHERE fecha >= %s AND fecha <= %s
+            ORDER BY fecha ASC
+        """
+        try:
+            with DBConnection() as db:
+                filas = db.fetch_all(query, (desde, hasta))
+        except Exception:
+            current_app.logger.exception("Error al obtener excepciones de agenda.")
+            raise
+        return [
+            ExcepcionAgenda(fila['fecha'], _a_time(fila['hora_inicio']), _a_time(fila['hora_fin']), fila['motivo'],
+                            fila['capacidad'])
+            for fila in filas
+        ]
+
+    def guardar_excepcion(self, excepcion: ExcepcionAgenda):
+        """ Crea o reemplaza la excepción del día. """
+        query = """
+            INSERT INTO AgendaExcepciones (fecha, hora_inicio, hora_fin, motivo, capacidad)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE hora_inicio = VALUES(hora_inicio), hora_fin = VALUES(hora_fin),
+                                    motivo = VALUES(motivo), capacidad = VALUES(capacidad)
+        """
+        try:
+            with DBConnection() as db:
+                db.execute(query, (excepcion.fecha, excepcion.hora_inicio, excepcion.hora_fin, excepcion.motivo,
+                                   excepcion.capacidad))
+            self._notificar([excepcion.fecha])
+            return True
+        except Exception as e:
+            current_app.logger.error("Error al guardar excepción de agenda en DB: %s", e)
+            return False
+
+    def eliminar_excepcion(self, fecha: date):
+        """ Elimina la excepción del día. Devuelve True si existía. """
+        query = "DELETE FROM AgendaExcepciones WHERE fecha = %s"
+        try:
+            with DBConnection() as db:
+                db.cursor.execute(query, (fecha,))
+                eliminadas = db.cursor.rowcount
+            self._notificar([fecha])
+            return eliminadas > 0
+        except Exception as e:
+            current_app.logger.error("Error al eliminar excepción de agenda en DB: %s", e)
+            return None
@@ -47,7 +47,7 @@ class ResultadoDAO:
                 return id_resultado
 
         except Exception as e:
-            current_app.logger.error(f"Error al registrar resultado de inspección en DB: {e}")
+            current_app.logger.error("Error al registrar resultado de inspección en DB: %s", e)
             return None
 
     def obtener_resultado_completo(self, id_resultado: int):
@@ -77,5 +77,5 @@ class ResultadoDAO:
             return resultado_completo
 
         except Exception as e:
-            current_app.logger.error(f"Error al obtener resultado completo: {e}")
+            current_app.logger.error("Error al obtener resultado completo: %s", e)
             return None
\ No newline at end of file
@@ -0,0 +1,55 @@
+# app/dao/token_revocado_dao.py
+from datetime import datetime
+from flask import current_app
+from ..db_connection import DBConnection
+from ..models import Usuario
+
+# Datos para canjear un refresh token en una sola ida a la DB: el usuario (por clave primaria)
+# y si el jti fue revocado (por clave primaria en TokensRevocados).
+QUERY_ESTADO_REFRESH = """
+    SELECT u.id_usuario, u.username, u.rol, u.version_token,
+           EXISTS (SELECT 1 FROM TokensRevocados WHERE jti = %s) AS revocado
+    FROM Usuarios u
+    WHERE u.id_usuario = %s
+"""
+
+class TokenRevocadoDAO:
+    """ Lista de refresh tokens revocados, indexada por jti. """
+
+    def revocar(self, jti: str, expira: datetime):
+        """ Registra el jti (UUID en hexadecimal) como revocado hasta su expiración. """
+        query = "INSERT IGNORE INTO TokensRevocados (jti, expira) VALUES (%s, %s)"
+
+        try:
+            with DBConnection() as db:
+                db.execute(query, (bytes.fromhex(jti), expira))
+            return True
+        except Exception as e:
+            current_app.logger.error("Error al revocar refresh token en DB: %s", e)
+            return False
+
+    def obtener_estado_refresh(self, jti: str, id_usuario: int):
+        """
+        Devuelve (usuario, revocado) para canjear un refresh token con una sola consulta,
+        o None si el usuario ya no existe.
+        """
+        with DBConnection() as db:
+            filas = db.fetch_all(QUERY_ESTADO_REFRESH, (bytes.fromhex(jti), id_usuario))
+        if not filas:
+            return None
+        fila = filas[0]
+        usuario = Usuario(id_usuario=fila['id_usuario'], username=fila['username'], rol=fila['rol'],
+                          version_token=fila['version_token'])
+        return usuario, bool(fila['revocado'])
+
+    def purgar_expirados(self, ahora: datetime):
+        """ Elimina las revocaciones de tokens que ya expiraron y devuelve cuántas se borraron. """
+        query = "DELETE FROM TokensRevocados WHERE expira < %s"
+
+        try:
+            with DBConnection() as db:
+                db.cursor.execute(query, (ahora,))
+                return db.cursor.rowcount
+        except Exception as e:
+            current_app.logger.error("Error al purgar tokens revocados en DB: %s", e)
+            return None
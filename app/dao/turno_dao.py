@@ -1,11 +1,110 @@
 # app/dao/turno_dao.py
 
+from flask import current_app
+
 from ..db_connection import DBConnection
-from ..models import Turno
-from datetime import datetime # Necesaria para manejar DATETIME
+from ..models import Turno, Vehiculo, Resultado
+from datetime import datetime, time, timedelta # Necesaria para manejar DATETIME
+
+# Resultados posibles de TurnoDAO.reservar
+RESERVA_OK = 'OK'
+RESERVA_NO_ENCONTRADO = 'NO_ENCONTRADO'
+RESERVA_CONFLICTO = 'CONFLICTO'
+RESERVA_ERROR = 'ERROR'
+
+# Consultas de listado. Filtran 'fecha' con rangos semiabiertos [desde, hasta) para que
+# MySQL pueda usar el índice (estado, fecha); ver db/migrations y app/migraciones.py.
+QUERY_DISPONIBLES_POR_FECHA = """
+    SELECT id_turno, matricula, fecha, estado, id_resultado
+    FROM Turnos
+    WHERE estado = 'LIBRE' AND fecha >= %s AND fecha < %s
+    ORDER BY fecha ASC
+"""
+
+# Resumen de calendario: cantidad de turnos LIBRES por día. Recorre el mismo rango del índice
+# (estado, fecha) que QUERY_DISPONIBLES_POR_FECHA sin devolver las filas.
+QUERY_LIBRES_POR_DIA = """
+    SELECT DATE(fecha) AS dia, COUNT(*) AS libres
+    FROM Turnos
+    WHERE estado = 'LIBRE' AND fecha >= %s AND fecha < %s
+    GROUP BY DATE(fecha)
+    ORDER BY dia ASC
+"""
+
+# Paginación por clave (fecha, id_turno): el cursor es la clave del último turno de la página anterior.
+QUERY_PENDIENTES = """
+    SELECT id_turno, matricula, fecha, estado, id_resultado
+    FROM Turnos
+    WHERE estado = 'RESERVADO'
+    ORDER BY fecha ASC, id_turno ASC
+    LIMIT %s
+"""
+
+QUERY_PENDIENTES_DESDE = """
+    SELECT id_turno, matricula, fecha, estado, id_resultado
+    FROM Turnos
+    WHERE estado = 'RESERVADO' AND (fecha > %s OR (fecha = %s AND id_turno > %s))
+    ORDER BY fecha ASC, id_turno ASC
+    LIMIT %s
+"""
+
+QUERY_TURNO_POR_ID = """
+    SELECT id_turno, matricula, fecha, estado, id_resultado
+    FROM Turnos
+    WHERE id_turno = %s
+"""
+
+# Sentencias compartidas por las reservas: alta del vehículo si no existe y paso del turno a RESERVADO.
+QUERY_ALTA_VEHICULO = """
+    INSERT INTO Vehiculos (matricula, id_marca, anio)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE matricula = matricula
+"""
+
+QUERY_RESERVA = """
+    UPDATE Turnos
+    SET matricula = %s, estado = 'RESERVADO'
+    WHERE id_turno = %s
+"""
+
+# Reserva sin bloqueo previo: solo actualiza si el turno sigue 'LIBRE' (rowcount 0 si no).
+QUERY_RESERVA_SI_LIBRE = """
+    UPDATE Turnos
+    SET matricula = %s, estado = 'RESERVADO'
+    WHERE id_turno = %s AND estado = 'LIBRE'
+"""
+
+# Reserva de un lugar en un horario de la agenda virtual: una sola sentencia sobre la fila
+# del horario. Sin FOUND_ROWS, rowcount es 1 si creó la fila, 2 si incrementó el contador
+# y 0 si el horario estaba completo.
+QUERY_TOMAR_CUPO = """
+    INSERT INTO CuposHorario (fecha, reservados) VALUES (%s, 1)
+    ON DUPLICATE KEY UPDATE
+        reservados = IF(reservados < %s, LAST_INSERT_ID(reservados + 1), reservados)
+"""
+
+def rango_del_dia(fecha):
+    """ Devuelve los límites [inicio, fin) del día como datetimes. """
+    inicio = datetime.combine(fecha, time.min)
+    return inicio, inicio + timedelta(days=1)
+
+def rango_de_dias(desde, hasta):
+    """ Devuelve los límites [inicio, fin) que cubren los días desde..hasta, ambos inclusive. """
+    return datetime.combine(desde, time.min), rango_del_dia(hasta)[1]
 
 class TurnoDAO:
 
+    def __init__(self):
+        self._observadores = []
+
+    def agregar_observador(self, callback):
+        """ Registra una función que recibe la lista de Turnos modificados tras cada escritura confirmada. """
+        self._observadores.append(callback)
+
+    def _notificar(self, turnos: list[Turno]):
+        for callback in self._observadores:
+            callback(turnos)
+
     def crear(self, turno: Turno):
         """ Inserta un nuevo turno en la DB y retorna su ID. """
         query = """
@@ -25,38 +124,41 @@ class TurnoDAO:
             with DBConnection() as db:
                 db.cursor.execute(query, params)
                 db.connection.commit()
-                return db.cursor.lastrowid
-        except Exception as e:
-            print(f"Error al crear turno en DB: {e}")
+                id_turno = db.cursor.lastrowid
+            self._notificar([turno])
+            return id_turno
+        except Exception:
+            current_app.logger.exception("Error al crear turno en DB.")
             return None
 
-    def crear_varios(self, turnos: list[Turno]):
-        """ Inserta una lista de turnos en una única transacción. """
-        query = "INSERT INTO Turnos (fecha, estado) VALUES (%s, %s)"
-
-        # Prepara una lista de tuplas con los datos de cada turno
-        params_list = [(t.fecha, t.estado) for t in turnos]
-
+    def crear_varios(self, turnos: list[Turno], tamanio_lote: int = 500):
+        """
+        Inserta una lista de turnos en una única transacción, con INSERTs de varias filas de a
+        `tamanio_lote`. Los horarios que ya tienen turno se omiten (índice único sobre fecha),
+        así que repetir el alta no duplica la agenda. A diferencia de INSERT IGNORE, el upsert
+        sin cambios solo absorbe la clave duplicada: los demás errores (valores inválidos,
+        truncamientos) siguen fallando. Retorna la cantidad de turnos insertados.
+        """
         try:
+            filas = 0
             with DBConnection() as db:
-                db.cursor.executemany(query, params_list)
-                db.connection.commit()
-                return db.cursor.rowcount
-        except Exception as e:
-            print(f"Error al crear varios turnos en DB: {e}")
+                for inicio in range(0, len(turnos), tamanio_lote):
+                    lote = turnos[inicio:inicio + tamanio_lote]
+                    query = ("INSERT INTO Turnos (fecha, estado) VALUES " + ", ".join(["(%s, %s)"] * len(lote))
+                             + " ON DUPLICATE KEY UPDATE fecha = fecha")
+                    db.cursor.execute(query, [valor for t in lote for valor in (t.fecha, t.estado)])
+                    filas += db.cursor.rowcount
+            self._notificar(turnos)
+            return filas
+        except Exception:
+            current_app.logger.exception("Error al crear varios turnos en DB.")
             return None
 
     def obtener_por_id(self, id_turno: int):
         """ Busca y devuelve un objeto Turno por su ID. """
-        query = """
-            SELECT id_turno, matricula, fecha, estado, id_resultado
-            FROM Turnos
-            WHERE id_turno = %s
-        """
-
         try:
             with DBConnection() as db:
-                db.cursor.execute(query, (id_turno,))
+                db.cursor.execute(QUERY_TURNO_POR_ID, (id_turno,))
                 data = db.cursor.fetchone()
 
             if data:
@@ -69,60 +171,345 @@ class TurnoDAO:
                 )
             return None
 
-        except Exception as e:
-            print(f"Error al obtener turno por ID: {e}")
+        except Exception:
+            current_app.logger.exception("Error al obtener turno por ID.")
             return None
 
-    def obtener_disponibles_por_fecha(self, fecha_consulta):
-        """ Devuelve una lista de objetos Turno en estado 'LIBRE' para la fecha dada."""
+    def obtener_con_resultado(self, id_turno: int):
+        """
+        Obtiene el turno junto con la cabecera y los detalles de su resultado en una sola consulta.
+        Devuelve (turno, resultado_completo); resultado_completo es None si el turno no tiene resultado.
+        """
+        query = """
+            SELECT t.id_turno, t.matricula, t.fecha, t.estado, t.id_resultado,
+                   r.id_resultado AS id_resultado_cabecera, r.resultado, r.puntaje_total, r.observaciones AS observaciones_resultado,
+                   rc.id_control, rc.calificacion, rc.observaciones AS observaciones_control
+            FROM Turnos t
+            LEFT JOIN Resultados r ON r.id_resultado = t.id_resultado
+            LEFT JOIN ResultadosPorControl rc ON rc.id_resultado = r.id_resultado
+            WHERE t.id_turno = %s
+            ORDER BY rc.id_control ASC
+        """
+        try:
+            with DBConnection() as db:
+                db.cursor.execute(query, (id_turno,))
+                filas = db.cursor.fetchall()
+
+            if not filas:
+                return None, None
+
+            primera = filas[0]
+            turno = Turno(
+                id_turno=primera['id_turno'],
+                matricula=primera['matricula'],
+                fecha=primera['fecha'],
+                estado=primera['estado'],
+                id_resultado=primera['id_resultado']
+            )
+            if primera['id_resultado_cabecera'] is None:
+                return turno, None
+
+            resultado_completo = Resultado(
+                id_resultado=primera['id_resultado'],
+                resultado=primera['resultado'],
+                puntaje_total=primera['puntaje_total'],
+                observaciones=primera['observaciones_resultado']
+            ).to_dict()
+            resultado_completo['detalles_control'] = [
+                {
+                    'id_control': f['id_control'],
+                    'calificacion': f['calificacion'],
+                    'observaciones': f['observaciones_control']
+                } for f in filas if f['id_control'] is not None
+            ]
+            return turno, resultado_completo
+
+        except Exception:
+            current_app.logger.exception("Error al obtener turno con resultado.")
+            return None, None
+
+    def obtener_por_fecha(self, fecha_consulta):
+        """
+        Devuelve todos los Turnos de la fecha dada, en cualquier estado, ordenados por horario.
+        Si la consulta falla registra el error y lo relanza: el índice de disponibilidad guardaría
+        una lista vacía como un día sin turnos.
+        """
         query = """
             SELECT id_turno, matricula, fecha, estado, id_resultado
             FROM Turnos
-            WHERE DATE(fecha) = %s AND estado = 'LIBRE'
-            ORDER BY fecha ASC
+            WHERE fecha >= %s AND fecha < %s
+            ORDER BY fecha ASC, id_turno ASC
         """
         try:
             with DBConnection() as db:
-                db.cursor.execute(query, (fecha_consulta,))
-                data_list = db.cursor.fetchall()
+                return db.fetch_models(Turno, query, rango_del_dia(fecha_consulta))
+        except Exception:
+            current_app.logger.exception("Error al obtener turnos por fecha.")
+            raise
 
-            return [Turno(**data) for data in data_list]
-        except Exception as e:
-            print(f"Error al obtener turnos disponibles: {e}")
+    def obtener_por_rango(self, desde, hasta):
+        """
+        Devuelve todos los Turnos de los días desde..hasta (inclusive), en cualquier estado, ordenados
+        por horario. Como obtener_por_fecha, registra y relanza los errores de la DB.
+        """
+        query = """
+            SELECT id_turno, matricula, fecha, estado, id_resultado
+            FROM Turnos
+            WHERE fecha >= %s AND fecha < %s
+            ORDER BY fecha ASC, id_turno ASC
+        """
+        try:
+            with DBConnection() as db:
+                return db.fetch_models(Turno, query, rango_de_dias(desde, hasta))
+        except Exception:
+            current_app.logger.exception("Error al obtener turnos por rango.")
+            raise
+
+    def obtener_disponibles_por_fecha(self, fecha_consulta):
+        """ Devuelve una lista de objetos Turno en estado 'LIBRE' para la fecha dada."""
+        try:
+            with DBConnection() as db:
+                return db.fetch_models(Turno, QUERY_DISPONIBLES_POR_FECHA, rango_del_dia(fecha_consulta))
+        except Exception:
+            current_app.logger.exception("Error al obtener turnos disponibles.")
+            return []
+
+    def obtener_disponibles_por_rango(self, desde, hasta):
+        """ Devuelve los Turnos 'LIBRE' de los días desde..hasta (inclusive), ordenados por horario. """
+        try:
+            with DBConnection() as db:
+                return db.fetch_models(Turno, QUERY_DISPONIBLES_POR_FECHA, rango_de_dias(desde, hasta))
+        except Exception:
+            current_app.logger.exception("Error al obtener turnos disponibles por rango.")
             return []
 
-    def obtener_pendientes(self):
-        """ Devuelve una lista de objetos Turno en estado 'RESERVADO'. """
+    def contar_disponibles_por_dia(self, desde, hasta):
+        """ Devuelve {date: cantidad de turnos 'LIBRE'} para los días desde..hasta que tienen alguno. """
+        try:
+            with DBConnection() as db:
+                filas = db.fetch_all(QUERY_LIBRES_POR_DIA, rango_de_dias(desde, hasta))
+            return {fila['dia']: fila['libres'] for fila in filas}
+        except Exception:
+            current_app.logger.exception("Error al contar turnos disponibles por día.")
+            return {}
+
+    def obtener_reservados_por_horario(self, desde: datetime, hasta: datetime):
+        """
+        Devuelve {fecha: reservas} de los horarios con reservas en [desde, hasta), según los
+        contadores de CuposHorario. Es lo único que la agenda virtual lee para la disponibilidad:
+        un rango de la clave primaria, una fila por horario. Si la consulta falla registra el
+        error y lo relanza: un resultado vacío mostraría libres los horarios completos.
+        """
+        query = """
+            SELECT fecha, reservados
+            FROM CuposHorario
+            WHERE fecha >= %s AND fecha < %s
+        """
+        try:
+            with DBConnection() as db:
+                return {fila['fecha']: fila['reservados'] for fila in db.fetch_all(query, (desde, hasta))}
+        except Exception:
+            current_app.logger.exception("Error al obtener reservas por horario.")
+            raise
+
+    def obtener_proximo_libre(self, desde: datetime, hasta: datetime):
+        """ Devuelve el primer Turno 'LIBRE' con fecha en [desde, hasta), o None. """
         query = """
             SELECT id_turno, matricula, fecha, estado, id_resultado
             FROM Turnos
-            WHERE estado = 'RESERVADO'
-            ORDER BY fecha ASC
+            WHERE estado = 'LIBRE' AND fecha >= %s AND fecha < %s
+            ORDER BY fecha ASC, id_turno ASC
+            LIMIT 1
         """
         try:
             with DBConnection() as db:
-                db.cursor.execute(query)
-                data_list = db.cursor.fetchall()
+                db.cursor.execute(query, (desde, hasta))
+                data = db.cursor.fetchone()
+
+            return Turno(**data) if data else None
+        except Exception:
+            current_app.logger.exception("Error al obtener próximo turno libre.")
+            return None
 
-            return [Turno(**data) for data in data_list]
-        except Exception as e:
-            print(f"Error al obtener turnos pendientes: {e}")
+    def obtener_pendientes(self, limite: int, despues_de: tuple = None):
+        """
+        Devuelve una página de objetos Turno en estado 'RESERVADO', ordenados por (fecha, id_turno).
+        `despues_de` es la clave (fecha, id_turno) del último turno de la página anterior.
+        """
+        if despues_de:
+            fecha, id_turno = despues_de
+            query, params = QUERY_PENDIENTES_DESDE, (fecha, fecha, id_turno, limite)
+        else:
+            query, params = QUERY_PENDIENTES, (limite,)
+
+        try:
+            with DBConnection() as db:
+                return db.fetch_models(Turno, query, params)
+        except Exception:
+            current_app.logger.exception("Error al obtener turnos pendientes.")
             return []
 
-    def actualizar_a_reservado(self, id_turno: int, matricula: str):
-        """Actualiza el slot LIBRE con la matrícula y cambia el estado a 'RESERVADO'."""
+    def iterar_pendientes(self):
+        """
+        Genera todos los Turnos en estado 'RESERVADO' ordenados por (fecha, id_turno), leyendo
+        la DB de a lotes con un cursor no bufferizado. La conexión se mantiene hasta agotar el generador.
+        """
         query = """
-            UPDATE Turnos
-            SET matricula = %s, estado = 'RESERVADO'
-            WHERE id_turno = %s AND estado = 'LIBRE'
+            SELECT id_turno, matricula, fecha, estado, id_resultado
+            FROM Turnos
+            WHERE estado = 'RESERVADO'
+            ORDER BY fecha ASC, id_turno ASC
         """
+        with DBConnection() as db:
+            yield from db.stream(query, model=Turno)
+
+    def actualizar_a_reservado(self, id_turno: int, matricula: str):
+        """Actualiza el slot LIBRE con la matrícula y cambia el estado a 'RESERVADO'."""
         try:
             with DBConnection() as db:
-                db.cursor.execute(query, (matricula, id_turno))
-                db.connection.commit()
-                if db.cursor.rowcount > 0:
-                    return self.obtener_por_id(id_turno)
+                db.cursor.execute(QUERY_RESERVA_SI_LIBRE, (matricula, id_turno))
+                if db.cursor.rowcount == 0:
+                    return None
+                db.cursor.execute(QUERY_TURNO_POR_ID, (id_turno,))
+                data = db.cursor.fetchone()
+            if not data:
                 return None
-        except Exception as e:
-            print(f"Error al actualizar a reservado: {e}")
+            turno = Turno(**data)
+            self._notificar([turno])
+            return turno
+        except Exception:
+            current_app.logger.exception("Error al actualizar a reservado.")
             return None
+
+    def reservar(self, id_turno: int, vehiculo: Vehiculo):
+        """
+        Reserva un turno en una única transacción sobre una sola conexión.
+        Bloquea la fila del turno (SELECT ... FOR UPDATE), registra el vehículo si no existe
+        y pasa el turno a 'RESERVADO'. Si dos clientes compiten por el mismo turno, el segundo
+        espera el bloqueo y recibe RESERVA_CONFLICTO. Es para la agenda materializada: no toca
+        los contadores de CuposHorario, así que con la agenda virtual se usa reservar_horario.
+        Devuelve una tupla (resultado, turno) con resultado en RESERVA_*.
+        """
+        query_bloqueo = """
+            SELECT id_turno, matricula, fecha, estado, id_resultado
+            FROM Turnos
+            WHERE id_turno = %s
+            FOR UPDATE
+        """
+        try:
+            with DBConnection() as db:
+                db.cursor.execute(query_bloqueo, (id_turno,))
+                data = db.cursor.fetchone()
+                if not data:
+                    return RESERVA_NO_ENCONTRADO, None
+
+                turno = Turno(**data)
+                if turno.estado != 'LIBRE':
+                    return RESERVA_CONFLICTO, turno
+
+                db.cursor.execute(QUERY_ALTA_VEHICULO, (vehiculo.matricula, vehiculo.id_marca, vehiculo.anio))
+                db.cursor.execute(QUERY_RESERVA, (vehiculo.matricula, id_turno))
+
+            # La fila estuvo bloqueada hasta el commit: el estado final es el que escribimos.
+            turno.matricula = vehiculo.matricula
+            turno.estado = 'RESERVADO'
+            self._notificar([turno])
+            return RESERVA_OK, turno
+        except Exception:
+            current_app.logger.exception("Error al reservar turno.")
+            return RESERVA_ERROR, None
+
+    def reservar_proximo(self, desde: datetime, hasta: datetime, vehiculo: Vehiculo):
+        """
+        Reserva el primer turno 'LIBRE' con fecha en [desde, hasta) en una única transacción.
+        El turno se elige y bloquea con SELECT ... FOR UPDATE SKIP LOCKED: los clientes que
+        compiten en el mismo momento saltean las filas que otro está reservando y toman la
+        siguiente, en lugar de esperar el bloqueo y recibir un conflicto. Como reservar, no toca
+        CuposHorario: con la agenda virtual el servicio prueba los horarios con reservar_horario.
+        Devuelve una tupla (resultado, turno); RESERVA_NO_ENCONTRADO si no quedan turnos libres.
+        """
+        query_eleccion = """
+            SELECT id_turno, matricula, fecha, estado, id_resultado
+            FROM Turnos
+            WHERE estado = 'LIBRE' AND fecha >= %s AND fecha < %s
+            ORDER BY fecha ASC, id_turno ASC
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        """
+        try:
+            with DBConnection() as db:
+                db.cursor.execute(query_eleccion, (desde, hasta))
+                data = db.cursor.fetchone()
+                if not data:
+                    return RESERVA_NO_ENCONTRADO, None
+
+                turno = Turno(**data)
+                db.cursor.execute(QUERY_ALTA_VEHICULO, (vehiculo.matricula, vehiculo.id_marca, vehiculo.anio))
+                db.cursor.execute(QUERY_RESERVA, (vehiculo.matricula, turno.id_turno))
+
+            turno.matricula = vehiculo.matricula
+            turno.estado = 'RESERVADO'
+            self._notificar([turno])
+            return RESERVA_OK, turno
+        except Exception:
+            current_app.logger.exception("Error al reservar próximo turno.")
+            return RESERVA_ERROR, None
+
+    def reservar_horario(self, fecha: datetime, vehiculo: Vehiculo, capacidad: int = 1):
+        """
+        Reserva un lugar en el horario `fecha` de la agenda virtual, que tiene `capacidad` carriles.
+        El horario es una fila de CuposHorario y la reserva es una única sentencia condicional
+        sobre ella (QUERY_TOMAR_CUPO): la crea con el primer lugar o, si quedan lugares, incrementa
+        el contador, cuyo nuevo valor es el carril asignado; si no, no cambia ninguna fila.
+        El vehículo se registra antes y el turno (única por fecha y carril, con el vehículo y luego
+        el resultado) se escribe después: el bloqueo de la fila del horario dura solo esa sentencia.
+        Si en el carril quedó un turno LIBRE de la agenda materializada, se toma esa fila.
+        Devuelve una tupla (resultado, turno) con resultado en RESERVA_*.
+        """
+        if capacidad < 1:
+            return RESERVA_CONFLICTO, None
+        query_reserva = """
+            INSERT INTO Turnos (matricula, fecha, carril, estado)
+            VALUES (%s, %s, %s, 'RESERVADO')
+            ON DUPLICATE KEY UPDATE
+                id_turno = LAST_INSERT_ID(id_turno),
+                matricula = IF(estado = 'LIBRE', VALUES(matricula), matricula),
+                estado = IF(estado = 'LIBRE', 'RESERVADO', estado)
+        """
+        carril = None
+        try:
+            with DBConnection() as db:
+                db.cursor.execute(QUERY_ALTA_VEHICULO, (vehiculo.matricula, vehiculo.id_marca, vehiculo.anio))
+                db.connection.commit()
+
+                db.cursor.execute(QUERY_TOMAR_CUPO, (fecha, capacidad))
+                if db.cursor.rowcount == 0:
+                    return RESERVA_CONFLICTO, None
+                # Al crear la fila el carril es el 1; al incrementarla, LAST_INSERT_ID(reservados + 1)
+                carril = db.cursor.lastrowid or 1
+                db.connection.commit()
+
+                db.cursor.execute(query_reserva, (vehiculo.matricula, fecha, carril))
+                if db.cursor.rowcount == 0:
+                    # El carril ya tenía una reserva hecha por fuera del contador, que lo sigue ocupando.
+                    return RESERVA_CONFLICTO, None
+                id_turno = db.cursor.lastrowid
+
+            turno = Turno(id_turno=id_turno, matricula=vehiculo.matricula, fecha=fecha, estado='RESERVADO')
+            self._notificar([turno])
+            return RESERVA_OK, turno
+        except Exception:
+            current_app.logger.exception("Error al reservar horario.")
+            if carril is not None:
+                self._devolver_cupo(fecha)
+            return RESERVA_ERROR, None
+
+    def _devolver_cupo(self, fecha: datetime):
+        """ Descuenta del contador del horario un lugar tomado cuyo turno no se pudo escribir. """
+        try:
+            with DBConnection() as db:
+                db.cursor.execute(
+                    "UPDATE CuposHorario SET reservados = reservados - 1 WHERE fecha = %s AND reservados > 0", (fecha,)
+                )
+        except Exception:
+            current_app.logger.exception("Error al devolver el cupo del horario %s.", fecha)
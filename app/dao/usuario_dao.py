@@ -34,26 +34,27 @@ class UsuarioDAO:
                 id_usuario=data['id_usuario'],
                 username=data['username'],
                 password_hash=data['password_hash'],
-                rol=data['rol']
+                rol=data['rol'],
+                version_token=data['version_token']
             )
         return None
 
-    def obtener_todos(self):
-        """ Devuelve una lista de todos los usuarios. """
-        query = "SELECT * FROM Usuarios"
+    def obtener_todos(self, limite: int, despues_de_id: int = None):
+        """ Devuelve una página de usuarios ordenada por id_usuario, a partir del id indicado. """
+        query = """
+            SELECT id_usuario, username, rol
+            FROM Usuarios
+            WHERE id_usuario > %s
+            ORDER BY id_usuario ASC
+            LIMIT %s
+        """
 
         with DBConnection() as db:
-            db.cursor.execute(query)
-            rows = db.cursor.fetchall()
+            return db.fetch_models(Usuario, query, (despues_de_id or 0, limite))
 
-        usuarios = []
-        for data in rows:
-            usuario = Usuario(
-                id_usuario=data['id_usuario'],
-                username=data['username'],
-                password_hash=data['password_hash'],
-                rol=data['rol']
-            )
-            usuarios.append(usuario)
+    def iterar_todos(self):
+        """ Genera todos los usuarios ordenados por id, leyendo la DB de a lotes con un cursor no bufferizado. """
+        query = "SELECT id_usuario, username, rol FROM Usuarios ORDER BY id_usuario ASC"
 
-        return usuarios
\ No newline at end of file
+        with DBConnection() as db:
+            yield from db.stream(query, model=Usuario)
@@ -7,7 +7,7 @@ class VehiculoDAO:
     def crear(self, vehiculo: Vehiculo):
         """ Crea un nuevo vehículo en la base de datos."""
         if self.obtener_por_matricula(vehiculo.matricula):
-            current_app.logger.warning(f"Vehículo con matrícula {vehiculo.matricula} ya existe. Saltando inserción.")
+            current_app.logger.warning("Vehículo con matrícula %s ya existe. Saltando inserción.", vehiculo.matricula)
             return True
 
         query = """
@@ -22,7 +22,7 @@ class VehiculoDAO:
                 db.connection.commit()
                 return True
         except Exception as e:
-            current_app.logger.error(f"Error al crear vehículo en DB: {e}")
+            current_app.logger.error("Error al crear vehículo en DB: %s", e)
             return False
 
     def obtener_por_matricula(self, matricula: str):
@@ -43,5 +43,5 @@ class VehiculoDAO:
             return None
 
         except Exception as e:
-            current_app.logger.error(f"Error al obtener vehículo en DB: {e}")
+            current_app.logger.error("Error al obtener vehículo en DB: %s", e)
             return None
\ No newline at end of file
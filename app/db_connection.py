@@ -1,37 +1,291 @@
+import os
+import threading
+import time
+from collections import deque
+
 import mysql.connector
 from .config import Config
 
+class PoolTimeoutError(Exception):
+    """Se agotó el tiempo de espera para obtener una conexión del pool."""
+
+class ConnectionPool:
+    """
+    Pool de conexiones thread-safe con desborde acotado.
+
+    Mantiene hasta `size` conexiones ociosas para reutilizar y permite abrir
+    `max_overflow` conexiones extra en picos, que se cierran al devolverse.
+    Si el proceso hace fork, el hijo descarta las conexiones heredadas y
+    arranca con un pool vacío.
+    """
+
+    def __init__(self, connect, size=5, max_overflow=10, timeout=10, ping_interval=30):
+        self._connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self._reset_state()
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conexion, instante en que se devolvió)
+        self._open = 0
+        self._checked_out = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+
+    def _check_fork(self):
+        """Tras un fork las conexiones del padre no pueden usarse ni cerrarse desde el hijo."""
+        if self._pid != os.getpid():
+            self._reset_state()
+
+    def acquire(self):
+        """Obtiene una conexión viva del pool, abriendo una nueva si hay lugar."""
+        self._check_fork()
+        wait_start = None
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._open < self.size + self.max_overflow:
+                    conn, returned_at = None, None
+                    self._open += 1
+                    break
+
+                now = time.monotonic()
+                if wait_start is None:
+                    wait_start = now
+                    self._waits += 1
+                remaining = self.timeout - (now - wait_start)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    self._wait_time += now - wait_start
+                    raise PoolTimeoutError(
+                        f"No hay conexiones disponibles tras {self.timeout}s de espera."
+                    )
+                self._cond.wait(remaining)
+
+            if wait_start is not None:
+                self._wait_time += time.monotonic() - wait_start
+            self._checked_out += 1
+
+        if conn is not None and self._needs_ping(returned_at) and not self._is_alive(conn):
+            self._close(conn)
+            with self._cond:
+                self._discarded += 1
+            conn = None
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._checked_out -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._created += 1
+
+        return conn
+
+    def release(self, conn, discard=False):
+        """Devuelve una conexión al pool. Con `discard=True` se cierra en lugar de reutilizarse."""
+        if self._pid != os.getpid():
+            # Conexión heredada del proceso padre: se abandona sin cerrarla.
+            return
+
+        close = False
+        with self._cond:
+            self._checked_out -= 1
+            if discard or len(self._idle) >= self.size:
+                self._open -= 1
+                if discard:
+                    self._discarded += 1
+                close = True
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+        if close:
+            self._close(conn)
+
+    def close_all(self):
+        """Cierra todas las conexiones ociosas."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for conn, _ in idle:
+            self._close(conn)
+
+    def stats(self):
+        """Contadores del pool para inspección."""
+        with self._cond:
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'idle': len(self._idle),
+                'checked_out': self._checked_out,
+                'created': self._created,
+                'discarded': self._discarded,
+                'waits': self._waits,
+                'wait_time_seconds': round(self._wait_time, 6),
+                'timeouts': self._timeouts,
+            }
+
+    def _needs_ping(self, returned_at):
+        return time.monotonic() - returned_at >= self.ping_interval
+
+    @staticmethod
+    def _is_alive(conn):
+        try:
+            return conn.is_connected()
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+def _connect():
+    return mysql.connector.connect(
+        host=Config.DB_HOST,
+        user=Config.DB_USER,
+        password=Config.DB_PASSWORD,
+        database=Config.DB_NAME,
+        port=Config.DB_PORT
+    )
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Devuelve el pool del proceso, creándolo la primera vez que se usa."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _connect,
+                    size=Config.DB_POOL_SIZE,
+                    max_overflow=Config.DB_POOL_MAX_OVERFLOW,
+                    timeout=Config.DB_POOL_TIMEOUT,
+                    ping_interval=Config.DB_POOL_PING_INTERVAL
+                )
+    return _pool
+
+def reset_pool():
+    """Descarta el pool del proceso; el siguiente `get_pool()` crea uno nuevo."""
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_pool)
+
+# Funciones que reciben los segundos que cada DBConnection mantuvo tomada su conexión (p. ej. métricas).
+observadores_tiempo = []
+
+# Funciones (sql, segundos, filas) llamadas tras cada sentencia. Solo si hay alguna registrada
+# los cursores se envuelven en CursorObservado.
+observadores_consulta = []
+
+class CursorObservado:
+    """ Envoltorio de un cursor que informa cada sentencia ejecutada a `observadores_consulta`. """
+    __slots__ = ('_cursor',)
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def _medir(self, metodo, query, params):
+        inicio = time.perf_counter()
+        filas = -1
+        try:
+            resultado = metodo(query, params)
+            filas = self._cursor.rowcount
+            return resultado
+        finally:
+            segundos = time.perf_counter() - inicio
+            for observador in observadores_consulta:
+                observador(query, segundos, filas)
+
+    def execute(self, query, params=()):
+        return self._medir(self._cursor.execute, query, params)
+
+    def executemany(self, query, seq_params):
+        return self._medir(self._cursor.executemany, query, seq_params)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
 class DBConnection:
     def __init__(self):
         self.connection = None
         self.cursor = None
+        self.pool = None
+        self._discard = False
+        self._inicio = None
 
     def __enter__(self):
         """Método de contexto: se ejecuta al iniciar el bloque 'with'."""
+        self.pool = get_pool()
         try:
-            self.connection = mysql.connector.connect(
-                host=Config.DB_HOST,
-                user=Config.DB_USER,
-                password=Config.DB_PASSWORD,
-                database=Config.DB_NAME,
-                port=Config.DB_PORT
-            )
-            self.cursor = self.connection.cursor(dictionary=True)
-            return self
+            self.connection = self.pool.acquire()
         except mysql.connector.Error as err:
             print(f"Error al conectar a MySQL: {err}")
             raise
+        self._inicio = time.perf_counter()
+
+        try:
+            self.cursor = self._nuevo_cursor(dictionary=True, buffered=True)
+        except Exception:
+            self.pool.release(self.connection, discard=True)
+            raise
+        return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Método de contexto: se ejecuta al finalizar el bloque 'with'."""
-        if self.cursor:
-            self.cursor.close()
-        if self.connection and self.connection.is_connected():
+        """Método de contexto: se ejecuta al finalizar el bloque 'with'. Devuelve la conexión al pool."""
+        # Si un stream quedó a medio leer, cerrar la conexión descarta la transacción pendiente.
+        discard = self._discard
+        try:
+            if not discard:
+                self.cursor.close()
+                if exc_type is None:
+                    self.connection.commit()
+                else:
+                    self.connection.rollback()
+        except Exception:
+            discard = True
             if exc_type is None:
-                self.connection.commit()
-            else:
-                self.connection.rollback()
-            self.connection.close()
+                raise
+        finally:
+            self.pool.release(self.connection, discard=discard)
+            self.connection = None
+            self.cursor = None
+            self._discard = False
+            if observadores_tiempo:
+                segundos = time.perf_counter() - self._inicio
+                for observador in observadores_tiempo:
+                    observador(segundos)
+
+    def _nuevo_cursor(self, **kwargs):
+        cursor = self.connection.cursor(**kwargs)
+        return CursorObservado(cursor) if observadores_consulta else cursor
 
     def fetch_all(self, query, params=None):
         """Ejecuta una consulta SELECT y retorna todos los resultados."""
@@ -41,4 +295,46 @@ class DBConnection:
     def execute(self, query, params=None):
         """Ejecuta una consulta INSERT/UPDATE/DELETE."""
         self.cursor.execute(query, params or ())
-        return self.cursor.lastrowid
\ No newline at end of file
+        return self.cursor.lastrowid
+
+    def fetch_models(self, model, query, params=None):
+        """
+        Ejecuta un SELECT con un cursor de tuplas y construye una instancia de `model` por fila.
+        El mapeo columna -> atributo se resuelve una sola vez por consulta.
+        """
+        cursor = self._nuevo_cursor(buffered=True)
+        try:
+            cursor.execute(query, params or ())
+            build = model.row_mapper(column[0] for column in cursor.description)
+            return list(map(build, cursor.fetchall()))
+        finally:
+            cursor.close()
+
+    def stream(self, query, params=None, batch_size=500, model=None):
+        """
+        Ejecuta un SELECT con un cursor no bufferizado y genera las filas de a lotes,
+        sin materializar el resultado completo. Debe consumirse dentro del bloque 'with'.
+        Sin `model` genera dicts; con `model` genera instancias construidas desde tuplas.
+        """
+        cursor = self._nuevo_cursor(dictionary=model is None, buffered=False)
+        completed = False
+        try:
+            cursor.execute(query, params or ())
+            build = model.row_mapper(column[0] for column in cursor.description) if model else None
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if build:
+                    yield from map(build, rows)
+                else:
+                    yield from rows
+            completed = True
+        finally:
+            if not completed:
+                # Quedaron filas sin leer en el socket: la conexión no puede volver al pool.
+                self._discard = True
+            try:
+                cursor.close()
+            except Exception:
+                self._discard = True
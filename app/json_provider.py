@@ -0,0 +1,118 @@
+import math
+import re
+from datetime import date, datetime, time
+
+from flask.json.provider import DefaultJSONProvider, _default as _flask_default
+
+from .models import Model
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+_SEPARADORES_COMPACTOS = (',', ':')
+
+# orjson escribe los floats en notación científica sin signo ni relleno ("1e16", "2.5e-5")
+# y usa decimales donde `repr` ya pasa a exponente ("0.000025"). Solo se reescriben los
+# números si la salida contiene alguno de esos patrones.
+_FLOAT_A_REVISAR = re.compile(rb'\de|0\.0000')
+_TOKEN_JSON = re.compile(rb'"(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?(?:e[-+]?\d+)?')
+_NO_ASCII = re.compile(r'[^\x00-\x7e]')
+
+def _default(obj):
+    """Tipos propios de la API: fechas en ISO 8601 y modelos a través de su `to_dict`."""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Model) and hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    return _flask_default(obj)
+
+def _tiene_no_finitos(obj):
+    """Indica si `obj` contiene algún float NaN o infinito (orjson los escribe como null)."""
+    pendientes = [obj]
+    while pendientes:
+        valor = pendientes.pop()
+        if isinstance(valor, float):
+            if not math.isfinite(valor):
+                return True
+        elif isinstance(valor, dict):
+            pendientes.extend(valor.values())
+        elif isinstance(valor, (list, tuple)):
+            pendientes.extend(valor)
+        elif isinstance(valor, Model) and hasattr(valor, 'to_dict'):
+            pendientes.append(valor.to_dict())
+    return False
+
+def _float_como_repr(match):
+    token = match.group()
+    if token[0] == 0x22 or (b'.' not in token and b'e' not in token):  # string o entero
+        return token
+    return repr(float(token)).encode('ascii')
+
+def _escapar(match):
+    """Mismo escape que `json.dumps(..., ensure_ascii=True)`, con pares sustitutos fuera del BMP."""
+    codigo = ord(match.group())
+    if codigo > 0xFFFF:
+        codigo -= 0x10000
+        return '\\u%04x\\u%04x' % (0xD800 | (codigo >> 10), 0xDC00 | (codigo & 0x3FF))
+    return '\\u%04x' % codigo
+
+class ProveedorJSONRapido(DefaultJSONProvider):
+    """
+    Proveedor JSON de la app. Serializa con orjson si está instalado y, si no, con el
+    `json` de la biblioteca estándar; en ambos casos fechas y modelos se serializan sin
+    convertirlos antes.
+
+    La salida compacta de orjson se ajusta para que sea idéntica byte a byte a la del
+    proveedor por defecto de Flask (claves ordenadas, escape ASCII y formato de floats).
+    Lo que orjson no soporta (enteros de más de 64 bits, claves no string, NaN e infinito,
+    indentación en modo debug, argumentos extra) se resuelve con la biblioteca estándar.
+    """
+
+    default = staticmethod(_default)
+
+    def _dumps_rapido(self, obj, kwargs):
+        """Devuelve los bytes serializados con orjson, o None si hay que usar la biblioteca estándar."""
+        if orjson is None or kwargs.keys() != {'separators'} or tuple(kwargs['separators']) != _SEPARADORES_COMPACTOS:
+            return None
+        try:
+            salida = orjson.dumps(obj, default=self.default,
+                                  option=orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+        except TypeError:
+            return None
+
+        # NaN e infinito salen como null; Flask escribe NaN/Infinity. Solo se busca si hay algún null.
+        if b'null' in salida and _tiene_no_finitos(obj):
+            return None
+        if _FLOAT_A_REVISAR.search(salida):
+            salida = _TOKEN_JSON.sub(_float_como_repr, salida)
+        if self.ensure_ascii and (not salida.isascii() or b'\x7f' in salida):
+            salida = _NO_ASCII.sub(_escapar, salida.decode('utf-8')).encode('ascii')
+        return salida
+
+    def dumps(self, obj, **kwargs):
+        salida = self._dumps_rapido(obj, kwargs)
+        if salida is None:
+            return super().dumps(obj, **kwargs)
+        return salida.decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                # NaN, enteros enormes, etc.: se delega para aceptar lo mismo que `json`.
+                pass
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        """Igual que en Flask, pero sin pasar por `str` cuando serializa orjson."""
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        salida = self._dumps_rapido(obj, {'separators': _SEPARADORES_COMPACTOS})
+        if salida is None:
+            return super().response(obj)
+        return self._app.response_class(salida + b'\n', mimetype=self.mimetype)
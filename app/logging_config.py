@@ -1,17 +1,169 @@
+import atexit
+import copy
+import json
 import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask.logging import default_handler
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+EXTENSION_LOGGING = 'logging_listener'
+
+# Atributos estándar de LogRecord; el resto llegó por `extra=` y se agrega al JSON.
+_ATRIBUTOS_RECORD = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+class FormateadorJSON(logging.Formatter):
+    """Una línea JSON por registro: instante, nivel, logger, mensaje, campos `extra` y excepción."""
+
+    def format(self, record):
+        datos = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage(),
+            'hilo': record.threadName,
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_RECORD:
+                datos[clave] = valor
+        if record.exc_info:
+            datos['excepcion'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            datos['stack'] = self.formatStack(record.stack_info)
+        if orjson is None:
+            return json.dumps(datos, default=str, ensure_ascii=False)
+        return orjson.dumps(datos, default=str).decode('utf-8')
+
+class FiltroMuestreo(logging.Filter):
+    """
+    Descarta registros de alta frecuencia antes de encolarlos. Solo afecta a los niveles
+    por debajo de WARNING; las advertencias y los errores pasan siempre.
+
+    * `muestreo`: logger -> N; de ese logger (y sus hijos) se conserva 1 de cada N registros.
+    * `limite_por_segundo`: máximo de registros por segundo para cada mensaje (la plantilla
+      sin interpolar). El primero que pasa en la ventana siguiente informa en `suprimidos`
+      cuántos se descartaron. 0 deshabilita el límite.
+    """
+
+    def __init__(self, muestreo=None, limite_por_segundo=0, reloj=time.monotonic):
+        super().__init__()
+        self.muestreo = dict(muestreo or {})
+        self.limite_por_segundo = limite_por_segundo
+        self._reloj = reloj
+        self._lock = threading.Lock()
+        self._contadores = {}  # logger -> registros vistos
+        self._ventanas = {}    # (logger, plantilla) -> [inicio de la ventana, emitidos, suprimidos]
+
+    def _cada(self, nombre):
+        while True:
+            cada = self.muestreo.get(nombre)
+            if cada is not None or '.' not in nombre:
+                return cada
+            nombre = nombre.rpartition('.')[0]
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+
+        with self._lock:
+            cada = self._cada(record.name)
+            if cada and cada > 1:
+                visto = self._contadores.get(record.name, 0)
+                self._contadores[record.name] = visto + 1
+                if visto % cada:
+                    return False
+
+            if self.limite_por_segundo <= 0:
+                return True
+
+            clave = (record.name, record.msg)
+            ahora = self._reloj()
+            ventana = self._ventanas.get(clave)
+            if ventana is None or ahora - ventana[0] >= 1.0:
+                suprimidos = ventana[2] if ventana else 0
+                self._ventanas[clave] = [ahora, 1, 0]
+                if suprimidos:
+                    record.suprimidos = suprimidos
+                return True
+            if ventana[1] >= self.limite_por_segundo:
+                ventana[2] += 1
+                return False
+            ventana[1] += 1
+            return True
+
+class ManejadorCola(QueueHandler):
+    """
+    QueueHandler para una cola en el mismo proceso: interpola el mensaje en el hilo que loguea
+    (los argumentos pueden cambiar después) y deja el formateo y la escritura al listener.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+def detener_logging(app):
+    """Escribe los registros pendientes y detiene el listener. Se puede llamar más de una vez."""
+    listener = app.extensions.pop(EXTENSION_LOGGING, None)
+    if listener is not None:
+        listener.stop()
+
+def reiniciar_logging(app):
+    """
+    Tras un fork el hilo del listener no existe en el hijo: crea una cola y un listener nuevos
+    con los mismos handlers. Los registros que quedaron en la cola del padre no se duplican.
+    """
+    listener = app.extensions.get(EXTENSION_LOGGING)
+    if listener is None:
+        return
+
+    cola = queue.SimpleQueue()
+    for handler in app.logger.handlers:
+        if isinstance(handler, ManejadorCola):
+            handler.queue = cola
+    listener = QueueListener(cola, *listener.handlers, respect_handler_level=True)
+    listener.start()
+    app.extensions[EXTENSION_LOGGING] = listener
 
 def configure_logging(app):
-    """Configura el logging para la aplicación."""
+    """
+    Configura el logging para la aplicación. Los registros de app.logger y sus hijos
+    (app.db, app.health, ...) pasan por el filtro de muestreo y se encolan; un hilo
+    QueueListener los formatea y los escribe, fuera del hilo del pedido.
+    """
 
     if app.debug or app.testing:
         return
 
+    nivel = logging.getLevelName(app.config['LOG_NIVEL'])
+
     stream_handler = logging.StreamHandler()
-    stream_handler.setLevel(logging.INFO)
+    stream_handler.setLevel(nivel)
+    if app.config['LOG_FORMATO'] == 'json':
+        stream_handler.setFormatter(FormateadorJSON())
+    else:
+        stream_handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s'))
+
+    cola = queue.SimpleQueue()
+    manejador_cola = ManejadorCola(cola)
+    manejador_cola.addFilter(FiltroMuestreo(app.config['LOG_MUESTREO'], app.config['LOG_LIMITE_POR_SEGUNDO']))
 
-    formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
-    stream_handler.setFormatter(formatter)
+    listener = QueueListener(cola, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(detener_logging, app)
+    app.extensions[EXTENSION_LOGGING] = listener
 
-    app.logger.addHandler(stream_handler)
-    app.logger.setLevel(logging.INFO)
-    app.logger.info("Logging configurado.")
\ No newline at end of file
+    # El handler por defecto de Flask escribe en el hilo del pedido.
+    app.logger.removeHandler(default_handler)
+    app.logger.addHandler(manejador_cola)
+    app.logger.setLevel(nivel)
+    app.logger.info("Logging configurado.")
@@ -0,0 +1,138 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from flask import g, request, has_request_context
+
+from . import db_connection
+
+# Límites de los buckets en segundos (los mismos que usan por defecto los clientes de Prometheus)
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+SIN_RUTA = 'sin_ruta'
+
+class Histograma:
+    """Conteos por bucket, suma y total de observaciones. No es thread-safe: lo protege el registro."""
+    __slots__ = ('limites', 'conteos', 'suma', 'total')
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.conteos = [0] * (len(limites) + 1)  # el último es el bucket +Inf
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.conteos[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+    def acumulados(self):
+        """Pares (le, conteo acumulado) en el formato de Prometheus, terminando en +Inf."""
+        acumulado = 0
+        for limite, conteo in zip(self.limites + (float('inf'),), self.conteos):
+            acumulado += conteo
+            yield ('+Inf' if limite == float('inf') else repr(limite)), acumulado
+
+class RegistroMetricas:
+    """
+    Métricas de los pedidos HTTP por endpoint y método: histograma de latencia, histograma
+    del tiempo con una conexión a la DB tomada, conteo por código de estado y pedidos en curso.
+    Todas las actualizaciones toman un único lock por pedido.
+    """
+
+    def __init__(self, limites=LIMITES_SEGUNDOS):
+        self.limites = tuple(limites)
+        self._lock = threading.Lock()
+        self._latencias = {}
+        self._tiempos_db = {}
+        self._respuestas = defaultdict(int)
+        self._en_curso = 0
+
+    def inicio_pedido(self):
+        with self._lock:
+            self._en_curso += 1
+
+    def fin_pedido(self):
+        with self._lock:
+            self._en_curso -= 1
+
+    def observar_pedido(self, endpoint, metodo, status, segundos, segundos_db):
+        clave = (endpoint, metodo)
+        with self._lock:
+            latencia = self._latencias.get(clave)
+            if latencia is None:
+                latencia = self._latencias[clave] = Histograma(self.limites)
+                self._tiempos_db[clave] = Histograma(self.limites)
+            latencia.observar(segundos)
+            self._tiempos_db[clave].observar(segundos_db)
+            self._respuestas[(endpoint, metodo, status)] += 1
+
+    def exportar(self):
+        """Devuelve todas las métricas en el formato de texto de Prometheus (versión 0.0.4)."""
+        with self._lock:
+            lineas = []
+            self._exportar_histograma(lineas, 'http_request_duration_seconds',
+                                      'Latencia de los pedidos HTTP.', self._latencias)
+            self._exportar_histograma(lineas, 'http_request_db_seconds',
+                                      'Tiempo con una conexión a la DB tomada, por pedido.', self._tiempos_db)
+
+            lineas.append('# HELP http_requests_total Pedidos HTTP respondidos, por código de estado.')
+            lineas.append('# TYPE http_requests_total counter')
+            for (endpoint, metodo, status), total in sorted(self._respuestas.items()):
+                lineas.append(f'http_requests_total{{endpoint="{endpoint}",method="{metodo}",status="{status}"}} {total}')
+
+            lineas.append('# HELP http_requests_in_flight Pedidos HTTP en curso.')
+            lineas.append('# TYPE http_requests_in_flight gauge')
+            lineas.append(f'http_requests_in_flight {self._en_curso}')
+        return '\n'.join(lineas) + '\n'
+
+    @staticmethod
+    def _exportar_histograma(lineas, nombre, ayuda, histogramas):
+        lineas.append(f'# HELP {nombre} {ayuda}')
+        lineas.append(f'# TYPE {nombre} histogram')
+        for (endpoint, metodo), histograma in sorted(histogramas.items()):
+            etiquetas = f'endpoint="{endpoint}",method="{metodo}"'
+            for le, acumulado in histograma.acumulados():
+                lineas.append(f'{nombre}_bucket{{{etiquetas},le="{le}"}} {acumulado}')
+            lineas.append(f'{nombre}_sum{{{etiquetas}}} {histograma.suma!r}')
+            lineas.append(f'{nombre}_count{{{etiquetas}}} {histograma.total}')
+
+def _acumular_tiempo_db(segundos):
+    """Observador de DBConnection: suma el tiempo de cada conexión al pedido en curso."""
+    if has_request_context() and '_metricas_db' in g:
+        g._metricas_db += segundos
+
+def instalar_metricas(app, registro):
+    """
+    Registra los hooks que miden cada pedido. La latencia se mide hasta que la vista devuelve
+    la respuesta; en las respuestas streaming no incluye el envío del cuerpo.
+    """
+    if _acumular_tiempo_db not in db_connection.observadores_tiempo:
+        db_connection.observadores_tiempo.append(_acumular_tiempo_db)
+
+    @app.before_request
+    def _iniciar_medicion():
+        g._metricas_inicio = time.perf_counter()
+        g._metricas_db = 0.0
+        g._metricas_en_curso = True
+        registro.inicio_pedido()
+
+    @app.after_request
+    def _registrar_medicion(response):
+        inicio = g.pop('_metricas_inicio', None)
+        if inicio is not None:
+            registro.observar_pedido(
+                request.endpoint or SIN_RUTA,
+                request.method,
+                response.status_code,
+                time.perf_counter() - inicio,
+                g.pop('_metricas_db', 0.0)
+            )
+        return response
+
+    @app.teardown_request
+    def _finalizar_medicion(exc):
+        # Se ejecuta siempre, también si el pedido terminó en una excepción.
+        if g.pop('_metricas_en_curso', False):
+            registro.fin_pedido()
@@ -0,0 +1,90 @@
+import os
+import sys
+from datetime import date, datetime
+
+import click
+
+from .config import Config
+from .db_connection import DBConnection
+from .dao.turno_dao import QUERY_DISPONIBLES_POR_FECHA, QUERY_PENDIENTES, QUERY_PENDIENTES_DESDE, rango_del_dia
+
+# Consultas críticas y el índice que deben usar según EXPLAIN.
+CONSULTAS_INDEXADAS = [
+    ('disponibles_por_fecha', QUERY_DISPONIBLES_POR_FECHA, lambda: rango_del_dia(date.today()), 'idx_turnos_estado_fecha'),
+    ('pendientes', QUERY_PENDIENTES, lambda: (50,), 'idx_turnos_estado_fecha'),
+    ('pendientes_desde_cursor', QUERY_PENDIENTES_DESDE, lambda: (datetime.now(), datetime.now(), 0, 50), 'idx_turnos_estado_fecha'),
+]
+
+def listar_migraciones(directorio=None):
+    """ Devuelve las migraciones del directorio como tuplas (version, ruta), ordenadas por versión. """
+    directorio = directorio or Config.MIGRACIONES_DIR
+    migraciones = []
+    for nombre in sorted(os.listdir(directorio)):
+        if nombre.endswith('.sql'):
+            version = nombre.split('_', 1)[0]
+            migraciones.append((version, os.path.join(directorio, nombre)))
+    return migraciones
+
+def separar_sentencias(sql: str):
+    """ Separa un script SQL en sentencias, descartando comentarios de línea. """
+    lineas = [l for l in sql.splitlines() if not l.strip().startswith('--')]
+    return [s.strip() for s in '\n'.join(lineas).split(';') if s.strip()]
+
+def aplicar_migraciones(directorio=None):
+    """ Aplica, en orden, las migraciones que aún no figuran en SchemaMigrations. Devuelve las versiones aplicadas. """
+    with DBConnection() as db:
+        db.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS SchemaMigrations (
+                version VARCHAR(50) PRIMARY KEY,
+                aplicada_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        db.cursor.execute("SELECT version FROM SchemaMigrations")
+        aplicadas = {fila['version'] for fila in db.cursor.fetchall()}
+
+    nuevas = []
+    for version, ruta in listar_migraciones(directorio):
+        if version in aplicadas:
+            continue
+        with open(ruta, encoding='utf-8') as f:
+            sentencias = separar_sentencias(f.read())
+        with DBConnection() as db:
+            for sentencia in sentencias:
+                db.cursor.execute(sentencia)
+            db.cursor.execute("INSERT INTO SchemaMigrations (version) VALUES (%s)", (version,))
+        nuevas.append(version)
+    return nuevas
+
+def verificar_indices():
+    """ Ejecuta EXPLAIN sobre las consultas críticas y reporta qué índice usa cada una. """
+    reporte = []
+    with DBConnection() as db:
+        for nombre, query, params, indice_esperado in CONSULTAS_INDEXADAS:
+            db.cursor.execute("EXPLAIN " + query, params())
+            plan = db.cursor.fetchone() or {}
+            reporte.append({
+                'consulta': nombre,
+                'indice_usado': plan.get('key'),
+                'indice_esperado': indice_esperado,
+                'ok': plan.get('key') == indice_esperado,
+            })
+    return reporte
+
+def registrar_comandos(app):
+    """ Registra los comandos 'flask migrar' y 'flask verificar-indices'. """
+
+    @app.cli.command('migrar')
+    def migrar():
+        """Aplica las migraciones pendientes de db/migrations."""
+        nuevas = aplicar_migraciones()
+        click.echo(f"Migraciones aplicadas: {', '.join(nuevas) if nuevas else 'ninguna'}")
+
+    @app.cli.command('verificar-indices')
+    def verificar():
+        """Verifica con EXPLAIN que las consultas de Turnos usen sus índices."""
+        reporte = verificar_indices()
+        for r in reporte:
+            estado = 'OK' if r['ok'] else 'FALLA'
+            click.echo(f"[{estado}] {r['consulta']}: usa {r['indice_usado']} (esperado {r['indice_esperado']})")
+        if not all(r['ok'] for r in reporte):
+            sys.exit(1)
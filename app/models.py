@@ -1,15 +1,39 @@
+import uuid
 import bcrypt
 import jwt
 
 from flask import current_app
 from datetime import datetime, timedelta, timezone
 
-class Usuario:
-    def __init__(self, id_usuario=None, username=None, password_hash=None, rol=None):
+class Model:
+    """
+    Base de los modelos: instancias compactas con __slots__ y construcción rápida desde
+    filas de cursores de tuplas. Cada subclase declara en FIELDS sus atributos en el mismo
+    orden que los parámetros de su constructor.
+    """
+    __slots__ = ()
+    FIELDS = ()
+
+    @classmethod
+    def row_mapper(cls, columns):
+        """
+        Devuelve una función fila -> instancia para filas con las columnas dadas.
+        El orden de las columnas se resuelve una sola vez por consulta.
+        """
+        columns = tuple(columns)
+        if columns == cls.FIELDS[:len(columns)]:
+            return lambda row: cls(*row)
+        return lambda row: cls(**dict(zip(columns, row)))
+
+class Usuario(Model):
+    __slots__ = FIELDS = ('id_usuario', 'username', 'password_hash', 'rol', 'version_token')
+
+    def __init__(self, id_usuario=None, username=None, password_hash=None, rol=None, version_token=0):
         self.id_usuario = id_usuario
         self.username = username
         self.password_hash = password_hash
         self.rol = rol
+        self.version_token = version_token
 
     @staticmethod
     def hash_password(password):
@@ -37,7 +61,28 @@ class Usuario:
         except Exception as e:
             return str(e)
 
-class Vehiculo:
+    def generate_refresh_token(self):
+        """
+        Genera un refresh token de larga duración, firmado con la misma clave que el token de acceso.
+        Lleva un jti para poder revocarlo y la versión de tokens del usuario ('ver'): el refresh
+        lo rechaza si la versión de la fila ya no coincide.
+        """
+        secret_key = current_app.config.get('JWT_SECRET_KEY')
+        expiracion = current_app.config.get('JWT_REFRESH_EXPIRATION_SECONDS')
+        fecha_utc = datetime.now(timezone.utc)
+        payload = {
+            'exp': fecha_utc + timedelta(seconds=expiracion),
+            'iat': fecha_utc,
+            'jti': uuid.uuid4().hex,
+            'typ': 'refresh',
+            'sub': str(self.id_usuario),
+            'ver': self.version_token
+        }
+        return jwt.encode(payload, secret_key, algorithm='HS256')
+
+class Vehiculo(Model):
+    __slots__ = FIELDS = ('matricula', 'id_marca', 'anio')
+
     def __init__(self, matricula=None, id_marca=None, anio=None):
         self.matricula = matricula
         self.id_marca = id_marca
@@ -50,7 +95,9 @@ class Vehiculo:
             'anio': self.anio
         }
 
-class Turno:
+class Turno(Model):
+    __slots__ = FIELDS = ('id_turno', 'matricula', 'fecha', 'estado', 'id_resultado')
+
     def __init__(self, id_turno=None, matricula=None, fecha=None, estado='LIBRE', id_resultado=None):
         self.id_turno = id_turno
         self.matricula = matricula
@@ -58,7 +105,6 @@ class Turno:
         self.id_resultado = id_resultado
         self.estado = estado
 
-
     def to_dict(self):
         return {
             'id_turno': self.id_turno,
@@ -68,7 +114,9 @@ class Turno:
             'estado': self.estado,
         }
 
-class Resultado:
+class Resultado(Model):
+    __slots__ = FIELDS = ('id_resultado', 'resultado', 'puntaje_total', 'observaciones')
+
     def __init__(self, id_resultado=None, resultado=None, puntaje_total=None, observaciones=None):
         self.id_resultado = id_resultado
         self.resultado = resultado
@@ -83,7 +131,9 @@ class Resultado:
             'observaciones': self.observaciones
         }
 
-class ResultadoPorControl:
+class ResultadoPorControl(Model):
+    __slots__ = FIELDS = ('id_resultado', 'id_control', 'calificacion', 'observaciones')
+
     def __init__(self, id_resultado=None, id_control=None, calificacion=None, observaciones=None):
         self.id_resultado = id_resultado
         self.id_control = id_control
@@ -96,4 +146,30 @@ class ResultadoPorControl:
             'id_control': self.id_control,
             'calificacion': self.calificacion,
             'observaciones': self.observaciones
-        }
\ No newline at end of file
+        }
+class ExcepcionAgenda(Model):
+    """
+    Horario especial de un día. Sin hora_inicio/hora_fin el día está cerrado (feriado).
+    `capacidad` (carriles por horario) reemplaza la habitual si no es None.
+    """
+    __slots__ = FIELDS = ('fecha', 'hora_inicio', 'hora_fin', 'motivo', 'capacidad')
+
+    def __init__(self, fecha=None, hora_inicio=None, hora_fin=None, motivo=None, capacidad=None):
+        self.fecha = fecha
+        self.hora_inicio = hora_inicio
+        self.hora_fin = hora_fin
+        self.motivo = motivo
+        self.capacidad = capacidad
+
+    @property
+    def cerrado(self):
+        return self.hora_inicio is None
+
+    def to_dict(self):
+        return {
+            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'hora_inicio': self.hora_inicio.isoformat('minutes') if self.hora_inicio else None,
+            'hora_fin': self.hora_fin.isoformat('minutes') if self.hora_fin else None,
+            'motivo': self.motivo,
+            'capacidad': self.capacidad
+        }
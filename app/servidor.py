@@ -0,0 +1,58 @@
+import os
+
+EXTENSION_RECURSOS = 'recursos_worker'
+
+def registrar_recurso(app, tras_fork=None, al_salir=None):
+    """
+    Registra un recurso propio de cada worker: `tras_fork()` lo recrea en el proceso hijo
+    (hilos, locks y conexiones no sobreviven al fork) y `al_salir()` lo libera cuando el
+    worker termina. Los recursos se liberan en orden inverso al de registro.
+    """
+    app.extensions.setdefault(EXTENSION_RECURSOS, []).append((tras_fork, al_salir))
+
+def reiniciar_tras_fork(app):
+    for tras_fork, _ in app.extensions.get(EXTENSION_RECURSOS, ()):
+        if tras_fork is not None:
+            tras_fork()
+
+def liberar_recursos(app):
+    for _, al_salir in reversed(app.extensions.get(EXTENSION_RECURSOS, ())):
+        if al_salir is not None:
+            al_salir()
+
+def opciones_gunicorn(app, puerto):
+    """
+    Configuración de gunicorn a partir de la de la app. La app se crea una sola vez en el
+    proceso maestro (preload) y cada worker reinicia sus recursos en `post_fork`. Al recibir
+    SIGTERM, gunicorn deja de aceptar conexiones y espera `WEB_GRACEFUL_TIMEOUT` segundos a
+    que terminen los pedidos en curso.
+    """
+    hilos = app.config['WEB_THREADS']
+    return {
+        'bind': f'0.0.0.0:{puerto}',
+        'workers': app.config['WEB_WORKERS'] or os.cpu_count() or 1,
+        'threads': hilos,
+        'worker_class': 'gthread' if hilos > 1 else 'sync',
+        'preload_app': True,
+        'timeout': app.config['WEB_TIMEOUT'],
+        'graceful_timeout': app.config['WEB_GRACEFUL_TIMEOUT'],
+        'keepalive': app.config['WEB_KEEPALIVE'],
+        'max_requests': app.config['WEB_MAX_REQUESTS'],
+        'max_requests_jitter': app.config['WEB_MAX_REQUESTS'] // 10,
+        'post_fork': lambda server, worker: reiniciar_tras_fork(app),
+        'worker_exit': lambda server, worker: liberar_recursos(app),
+    }
+
+def servir(app, puerto):
+    """Sirve `app` con gunicorn. Bloquea hasta que el maestro termina."""
+    from gunicorn.app.base import BaseApplication
+
+    class _AplicacionGunicorn(BaseApplication):
+        def load_config(self):
+            for clave, valor in opciones_gunicorn(app, puerto).items():
+                self.cfg.set(clave, valor)
+
+        def load(self):
+            return app
+
+    _AplicacionGunicorn().run()
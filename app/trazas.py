@@ -0,0 +1,114 @@
+import logging
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from flask import g, has_request_context
+
+from . import db_connection
+
+logger = logging.getLogger('app.db')
+
+HEADER_CONSULTAS = 'X-DB-Queries'
+HEADER_TIEMPO = 'X-DB-Time-Ms'
+
+_LITERAL_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_LITERAL_NUMERO = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LISTA_VALORES = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_LISTAS_REPETIDAS = re.compile(r'\(\?\+\)(?:\s*,\s*\(\?\+\))+')
+_ESPACIOS = re.compile(r'\s+')
+
+# Umbral del log de consultas lentas; lo fija instalar_trazas con DB_CONSULTA_LENTA_SEGUNDOS.
+umbral_consulta_lenta = 0.5
+
+# Listas que reciben las consultas ejecutadas dentro de un `presupuesto_consultas`. Es una
+# variable de contexto: cada hilo (y cada tarea de asyncio, que hereda el contexto de quien la
+# crea) ve solo los presupuestos abiertos en su propio flujo.
+_presupuestos = ContextVar('presupuestos_consultas', default=())
+
+@lru_cache(maxsize=1024)
+def huella_sql(sql):
+    """
+    Normaliza una sentencia para agrupar las ejecuciones de una misma consulta: literales y
+    parámetros pasan a '?', las listas de valores a '(?+)' y se colapsan los espacios.
+    """
+    huella = sql.replace('%s', '?')
+    huella = _LITERAL_STRING.sub('?', huella)
+    huella = _LITERAL_NUMERO.sub('?', huella)
+    huella = _LISTA_VALORES.sub('(?+)', huella)
+    huella = _LISTAS_REPETIDAS.sub('(?+)...', huella)
+    return _ESPACIOS.sub(' ', huella).strip()
+
+class ConsultaTrazada:
+    __slots__ = ('huella', 'segundos', 'filas')
+
+    def __init__(self, huella, segundos, filas):
+        self.huella = huella
+        self.segundos = segundos
+        self.filas = filas
+
+    def __repr__(self):
+        return f"ConsultaTrazada({self.huella!r}, {self.segundos * 1000:.3f} ms, filas={self.filas})"
+
+def _registrar_consulta(sql, segundos, filas):
+    """Observador de DBConnection: agrega la sentencia a la traza del pedido y a los presupuestos activos."""
+    consulta = ConsultaTrazada(huella_sql(sql), segundos, filas)
+
+    if segundos >= umbral_consulta_lenta:
+        logger.warning("Consulta lenta (%.1f ms, %d filas): %s", segundos * 1000, filas, consulta.huella)
+
+    if has_request_context():
+        traza = g.get('_traza_db')
+        if traza is not None:
+            traza.append(consulta)
+
+    for consultas in _presupuestos.get():
+        consultas.append(consulta)
+
+def _activar():
+    if _registrar_consulta not in db_connection.observadores_consulta:
+        db_connection.observadores_consulta.append(_registrar_consulta)
+
+def traza_actual():
+    """Consultas ejecutadas hasta el momento en el pedido en curso."""
+    return g.get('_traza_db', [])
+
+def instalar_trazas(app):
+    """
+    Activa la traza de consultas por pedido y el log de consultas lentas. Con
+    DB_TRAZA_HEADERS, cada respuesta informa la cantidad de consultas y el tiempo de DB.
+    """
+    global umbral_consulta_lenta
+    umbral_consulta_lenta = app.config['DB_CONSULTA_LENTA_SEGUNDOS']
+    _activar()
+
+    @app.before_request
+    def _iniciar_traza():
+        g._traza_db = []
+
+    if app.config['DB_TRAZA_HEADERS']:
+        @app.after_request
+        def _informar_traza(response):
+            traza = g.get('_traza_db', [])
+            response.headers[HEADER_CONSULTAS] = str(len(traza))
+            response.headers[HEADER_TIEMPO] = f"{sum(c.segundos for c in traza) * 1000:.3f}"
+            return response
+
+@contextmanager
+def presupuesto_consultas(maximo):
+    """
+    Registra las sentencias ejecutadas dentro del bloque y lanza AssertionError si superan
+    `maximo`. Pensado para tests: `with presupuesto_consultas(1): client.get(...)`.
+    """
+    _activar()
+    consultas = []
+    token = _presupuestos.set(_presupuestos.get() + (consultas,))
+    try:
+        yield consultas
+    finally:
+        _presupuestos.reset(token)
+
+    if len(consultas) > maximo:
+        detalle = '\n'.join(f'  {c.huella}' for c in consultas)
+        raise AssertionError(f"Se ejecutaron {len(consultas)} consultas (máximo {maximo}):\n{detalle}")
@@ -0,0 +1,106 @@
+# app/turnos/agenda.py
+from datetime import datetime, date, time, timedelta
+
+from ..dao.turno_dao import rango_de_dias
+
+class HorarioLibre:
+    """ Horario de la agenda virtual con lugares libres. Se reserva por fecha: no tiene id_turno. """
+    __slots__ = ('fecha', 'cupos', 'capacidad')
+
+    def __init__(self, fecha: datetime, cupos: int, capacidad: int = None):
+        self.fecha = fecha
+        self.cupos = cupos
+        self.capacidad = capacidad if capacidad is not None else cupos
+
+    def to_dict(self):
+        return {
+            'id_turno': None,
+            'matricula': None,
+            'fecha': self.fecha.isoformat(),
+            'id_resultado': None,
+            'estado': 'LIBRE',
+            'cupos': self.cupos,
+        }
+
+class Agenda:
+    """
+    Agenda virtual: los slots se calculan a partir de reglas en lugar de guardarse como filas
+    LIBRES en Turnos.
+
+    Las reglas son el horario habitual (hora_inicio a hora_fin cada `intervalo_minutos`), los
+    días de la semana que se atiende, la capacidad (carriles por horario) y las excepciones por
+    fecha de AgendaDAO: feriados (día cerrado) u horarios y capacidades especiales, que también
+    pueden abrir un día no habitual. Los lugares libres de un horario son su capacidad menos
+    las reservas de su contador en CuposHorario.
+    """
+
+    def __init__(self, agenda_dao, turno_dao, hora_inicio: time, hora_fin: time, intervalo_minutos: int,
+                 dias_semana=range(1, 8), capacidad: int = 1):
+        self.agenda_dao = agenda_dao
+        self.turno_dao = turno_dao
+        self.hora_inicio = hora_inicio
+        self.hora_fin = hora_fin
+        self.intervalo = timedelta(minutes=intervalo_minutos)
+        self.dias_semana = frozenset(dias_semana)
+        self.capacidad = capacidad
+
+    def horarios(self, dia: date, excepcion=None):
+        """ Devuelve los horarios de los slots del día según las reglas, ordenados. """
+        if excepcion is not None:
+            if excepcion.cerrado:
+                return []
+            hora_inicio, hora_fin = excepcion.hora_inicio, excepcion.hora_fin
+        elif dia.isoweekday() in self.dias_semana:
+            hora_inicio, hora_fin = self.hora_inicio, self.hora_fin
+        else:
+            return []
+
+        horarios = []
+        actual, fin = datetime.combine(dia, hora_inicio), datetime.combine(dia, hora_fin)
+        while actual < fin:
+            horarios.append(actual)
+            actual += self.intervalo
+        return horarios
+
+    def _capacidad(self, excepcion):
+        if excepcion is not None and excepcion.capacidad is not None:
+            return excepcion.capacidad
+        return self.capacidad
+
+    def disponibles(self, desde: date, hasta: date):
+        """
+        Devuelve {date: [HorarioLibre]} para los días desde..hasta (inclusive), solo con los
+        horarios que tienen lugares. Cuesta dos consultas sin importar el rango.
+        """
+        excepciones = {e.fecha: e for e in self.agenda_dao.obtener_excepciones(desde, hasta)}
+        reservados = self.turno_dao.obtener_reservados_por_horario(*rango_de_dias(desde, hasta))
+
+        disponibles = {}
+        dia = desde
+        while dia <= hasta:
+            excepcion = excepciones.get(dia)
+            capacidad = self._capacidad(excepcion)
+            libres = []
+            for horario in self.horarios(dia, excepcion):
+                cupos = capacidad - reservados.get(horario, 0)
+                if cupos > 0:
+                    libres.append(HorarioLibre(horario, cupos, capacidad))
+            disponibles[dia] = libres
+            dia += timedelta(days=1)
+        return disponibles
+
+    def proximo_libre(self, desde: datetime, dias: int):
+        """ Devuelve el primer HorarioLibre a partir de `desde`, buscando hasta `dias` días hacia adelante. """
+        disponibles = self.disponibles(desde.date(), desde.date() + timedelta(days=dias - 1))
+        for libres in disponibles.values():
+            for libre in libres:
+                if libre.fecha >= desde:
+                    return libre
+        return None
+
+    def capacidad_de(self, fecha: datetime):
+        """ Devuelve la cantidad de carriles del horario `fecha`, o 0 si no es un slot de la agenda. """
+        dia = fecha.date()
+        excepciones = self.agenda_dao.obtener_excepciones(dia, dia)
+        excepcion = excepciones[0] if excepciones else None
+        return self._capacidad(excepcion) if fecha in self.horarios(dia, excepcion) else 0
@@ -0,0 +1,193 @@
+# app/turnos/indice_disponibilidad.py
+import threading
+from array import array
+from datetime import datetime, date, time, timedelta
+
+from ..cache import CacheLRU
+from ..models import Turno
+
+class DiaIndexado:
+    """
+    Turnos de un día en la grilla fija de la agenda.
+    `ids[i]` es el id_turno del slot i (0 si no hay turno) y el bit i de `libres`
+    indica si ese slot está LIBRE.
+    """
+    __slots__ = ('ids', 'libres')
+
+    def __init__(self, cantidad_slots: int):
+        self.ids = array('q', bytes(8 * cantidad_slots))
+        self.libres = 0
+
+    def __eq__(self, otro):
+        return isinstance(otro, DiaIndexado) and self.ids == otro.ids and self.libres == otro.libres
+
+class IndiceDisponibilidad:
+    """
+    Índice en memoria de la disponibilidad por día, con un bitset de slots libres por fecha.
+
+    Cada día se carga de Turnos la primera vez que se consulta y luego se mantiene con las
+    escrituras que notifica TurnoDAO. Los días cuyos turnos no encajan en la grilla
+    (horarios fuera de agenda o slots duplicados) se marcan como no indexables y se
+    responden desde la base de datos.
+
+    Cada proceso tiene su propio índice y solo ve las escrituras de los demás cuando el día
+    vence (`ttl`), así que con varios workers el TTL debe ser corto.
+    """
+
+    NO_INDEXABLE = object()
+
+    def __init__(self, turno_dao, hora_inicio: time, hora_fin: time, intervalo_minutos: int,
+                 max_dias=400, ttl=None):
+        self.turno_dao = turno_dao
+        self.hora_inicio = hora_inicio
+        self.intervalo = timedelta(minutes=intervalo_minutos)
+        duracion = datetime.combine(date.min, hora_fin) - datetime.combine(date.min, hora_inicio)
+        self.cantidad_slots = int(duracion / self.intervalo)
+        self._dias = CacheLRU(max_entradas=max_dias, ttl=ttl)
+        self._lock_escritura = threading.Lock()
+        self._escrituras = 0
+
+        # Se registra antes que cualquier cache construida sobre el índice, para que esta
+        # se invalide recién cuando el índice ya refleja la escritura.
+        turno_dao.agregar_observador(self.aplicar)
+
+    def _slot(self, fecha_hora: datetime):
+        """ Devuelve el offset del slot para el horario dado, o None si no cae en la grilla. """
+        desde_inicio = fecha_hora - datetime.combine(fecha_hora.date(), self.hora_inicio)
+        offset, resto = divmod(desde_inicio, self.intervalo)
+        if resto or not 0 <= offset < self.cantidad_slots:
+            return None
+        return offset
+
+    def _horario(self, dia: date, offset: int) -> datetime:
+        return datetime.combine(dia, self.hora_inicio) + offset * self.intervalo
+
+    def _construir(self, dia: date, turnos=None):
+        """ Arma el bitset del día a partir de `turnos` o, si no se indican, de los turnos en la DB. """
+        if turnos is None:
+            turnos = self.turno_dao.obtener_por_fecha(dia)
+        indexado = DiaIndexado(self.cantidad_slots)
+        for turno in turnos:
+            offset = self._slot(turno.fecha)
+            if offset is None or indexado.ids[offset]:
+                return self.NO_INDEXABLE
+            indexado.ids[offset] = turno.id_turno
+            if turno.estado == 'LIBRE':
+                indexado.libres |= 1 << offset
+        return indexado
+
+    def _dia(self, dia: date):
+        return self._dias.obtener_o_cargar(dia, lambda: self._construir(dia))
+
+    def disponibles(self, dia: date):
+        """ Devuelve los Turnos LIBRES del día ordenados por horario, o None si el día no es indexable. """
+        indexado = self._dia(dia)
+        if indexado is self.NO_INDEXABLE:
+            return None
+
+        libres, ids = indexado.libres, indexado.ids
+        turnos = []
+        while libres:
+            bit = libres & -libres
+            offset = bit.bit_length() - 1
+            turnos.append(Turno(id_turno=ids[offset], fecha=self._horario(dia, offset), estado='LIBRE'))
+            libres ^= bit
+        return turnos
+
+    def _cargador_de_ventana(self, ultimo: date):
+        """
+        Devuelve la función de carga de los días de una ventana que termina en `ultimo`. El
+        primer día sin cargar trae con una sola consulta todos los turnos hasta `ultimo`, y los
+        días siguientes se arman con ese resultado si desde entonces no se notificaron
+        escrituras (si hubo alguna, el día se vuelve a leer de la DB).
+        """
+        ventana = {}
+
+        def cargar(dia):
+            if not ventana:
+                ventana['escrituras'] = self._escrituras
+                ventana['por_dia'] = por_dia = {}
+                for turno in self.turno_dao.obtener_por_rango(dia, ultimo):
+                    por_dia.setdefault(turno.fecha.date(), []).append(turno)
+            elif ventana['escrituras'] != self._escrituras:
+                return self._construir(dia)
+            return self._construir(dia, ventana['por_dia'].get(dia, []))
+
+        return cargar
+
+    def proximo_libre(self, desde: datetime, dias: int):
+        """ Devuelve el primer Turno LIBRE a partir de `desde`, buscando hasta `dias` días hacia adelante. """
+        cargar = self._cargador_de_ventana(desde.date() + timedelta(days=dias - 1))
+        for i in range(dias):
+            dia = desde.date() + timedelta(days=i)
+            indexado = self._dias.obtener_o_cargar(dia, lambda: cargar(dia))
+
+            if indexado is self.NO_INDEXABLE:
+                for turno in self.turno_dao.obtener_disponibles_por_fecha(dia):
+                    if turno.fecha >= desde:
+                        return turno
+                continue
+
+            libres = indexado.libres
+            if i == 0:
+                # Descarta los slots anteriores a 'desde'
+                primero = self._slot_desde(desde)
+                libres &= ~((1 << primero) - 1)
+            if libres:
+                offset = (libres & -libres).bit_length() - 1
+                return Turno(id_turno=indexado.ids[offset], fecha=self._horario(dia, offset), estado='LIBRE')
+        return None
+
+    def _slot_desde(self, desde: datetime) -> int:
+        """ Primer offset cuyo horario es >= desde. """
+        desde_inicio = desde - datetime.combine(desde.date(), self.hora_inicio)
+        if desde_inicio <= timedelta(0):
+            return 0
+        offset, resto = divmod(desde_inicio, self.intervalo)
+        return min(offset + (1 if resto else 0), self.cantidad_slots)
+
+    def aplicar(self, turnos: list[Turno]):
+        """
+        Observador de TurnoDAO: actualiza el bitset con los turnos escritos.
+        Si un turno no trae id (alta masiva) o no coincide con el índice, el día se descarta
+        y se vuelve a cargar en la próxima consulta.
+        """
+        with self._lock_escritura:
+            self._escrituras += 1
+        for turno in turnos:
+            if not turno.fecha:
+                continue
+            dia = turno.fecha.date()
+            indexado = self._dias.consultar(dia)
+            offset = self._slot(turno.fecha)
+
+            if (not isinstance(indexado, DiaIndexado) or not turno.id_turno or offset is None
+                    or indexado.ids[offset] != turno.id_turno):
+                self._dias.invalidar(dia)
+                continue
+
+            with self._lock_escritura:
+                if turno.estado == 'LIBRE':
+                    indexado.libres |= 1 << offset
+                else:
+                    indexado.libres &= ~(1 << offset)
+
+    def reconstruir(self, dia: date):
+        """ Descarta el día y lo vuelve a cargar desde la DB. """
+        self._dias.invalidar(dia)
+        return self._dia(dia)
+
+    def verificar(self, dia: date):
+        """ Compara el índice en memoria con la DB para el día dado. """
+        en_memoria = self._dias.consultar(dia)
+        en_db = self._construir(dia)
+        if en_memoria is None:
+            return {'fecha': dia.isoformat(), 'cargado': False, 'consistente': True}
+        return {
+            'fecha': dia.isoformat(),
+            'cargado': True,
+            'consistente': en_memoria is en_db or en_memoria == en_db,
+        }
+
+    def estadisticas(self):
+        return self._dias.estadisticas()
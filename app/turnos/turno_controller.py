@@ -1,6 +1,9 @@
 # app/turnos/turno_controller.py
 from flask import Blueprint, jsonify, request, current_app
 from app.auth.auth_required import token_required, roles_required
+from app.utils.streaming import respuesta_json_streaming
+from app.utils.paginacion import leer_limite, codificar_cursor, decodificar_cursor, HEADER_SIGUIENTE_CURSOR
+from datetime import datetime
 
 turno_service = None
 
@@ -19,36 +22,113 @@ def consultar_disponibilidad():
     disponibles, error = turno_service.consultar_disponibilidad(fecha_str)
 
     if error:
-        current_app.logger.error(f"Error al consultar disponibilidad: {error}")
+        current_app.logger.error("Error al consultar disponibilidad: %s", error)
         return jsonify({'message': error}), 400
 
-    current_app.logger.info(f"Disponibilidad consultada exitosamente para {fecha_str}.")
+    current_app.logger.info("Disponibilidad consultada exitosamente para %s.", fecha_str)
     return jsonify({'disponibles': disponibles}), 200
 
+@turno_bp.route('/disponibilidad/rango', methods=['GET'])
+@token_required
+@roles_required(['CLIENTE', 'INSPECTOR', 'ADMINISTRADOR'])
+def consultar_disponibilidad_rango():
+    """
+    Ruta para consultar los slots libres de varios días (p. ej. un mes de calendario) en un solo pedido.
+    Con resumen=1 devuelve solo la cantidad de slots libres por día.
+    """
+    desde_str = request.args.get('desde') # Formato: 'YYYY-MM-DD'
+    hasta_str = request.args.get('hasta') # Formato: 'YYYY-MM-DD', inclusive
+    if not desde_str or not hasta_str:
+        return jsonify({'message': 'Se requieren los parámetros "desde" y "hasta" (YYYY-MM-DD)'}), 400
+
+    resumen = request.args.get('resumen') == '1'
+    dias, error = turno_service.consultar_disponibilidad_rango(desde_str, hasta_str, resumen)
+    if error:
+        current_app.logger.error("Error al consultar disponibilidad por rango: %s", error)
+        return jsonify({'message': error}), 400
+
+    return jsonify({'desde': desde_str, 'hasta': hasta_str, 'libres_por_dia' if resumen else 'disponibles': dias}), 200
+
+@turno_bp.route('/proximo-libre', methods=['GET'])
+@token_required
+@roles_required(['CLIENTE', 'INSPECTOR', 'ADMINISTRADOR'])
+def consultar_proximo_libre():
+    """ Ruta para consultar el primer slot libre a partir de una fecha/hora (por defecto, ahora). """
+    desde_str = request.args.get('desde') # Formato: 'YYYY-MM-DD' o 'YYYY-MM-DDTHH:MM'
+
+    turno, error = turno_service.consultar_proximo_libre(desde_str)
+    if error:
+        current_app.logger.error("Error al consultar próximo turno libre: %s", error)
+        return jsonify({'message': error}), 400
+
+    if not turno:
+        return jsonify({'message': 'No hay turnos libres en el período consultado.'}), 404
+
+    return jsonify({'turno': turno}), 200
+
 @turno_bp.route('/reservar', methods=['POST'])
 @token_required
 @roles_required(['CLIENTE', 'ADMINISTRADOR'])
 def reservar_turno():
-    """ Ruta para que un cliente solicite un turno libre."""
+    """
+    Ruta para que un cliente solicite un turno libre, por id_turno o, con la agenda virtual,
+    por fecha y hora ('fecha': 'YYYY-MM-DDTHH:MM'). Con la agenda virtual solo se admite la
+    reserva por fecha y hora: el servicio rechaza id_turno.
+    """
     current_app.logger.info("Solicitud de reserva de turno recibida.")
 
     data = request.get_json()
 
     id_turno = data.get('id_turno')
+    fecha_str = data.get('fecha')
+    matricula = data.get('matricula')
+    id_marca = data.get('id_marca')
+    anio = data.get('anio')
+
+    if not all([matricula, id_marca, anio]) or not (id_turno or fecha_str):
+        current_app.logger.error("Faltan campos requeridos en la solicitud de reserva.")
+        return jsonify({'message': 'Faltan campos requeridos (matricula, id_marca, anio, e id_turno o fecha).'}), 400
+
+    if id_turno:
+        turno, error = turno_service.reservar_turno(matricula, id_marca, anio, id_turno)
+    else:
+        turno, error = turno_service.reservar_horario(matricula, id_marca, anio, fecha_str)
+    if error:
+        current_app.logger.error("Fallo al reservar turno: %s", error)
+        return jsonify({'message': error}), 409
+
+    current_app.logger.info("Turno %s reservado exitosamente para vehículo %s.", turno['id_turno'], matricula)
+    return jsonify({
+        'message': 'Turno reservado exitosamente.',
+        'turno': turno
+    }), 201
+
+@turno_bp.route('/reservar-proximo', methods=['POST'])
+@token_required
+@roles_required(['CLIENTE', 'ADMINISTRADOR'])
+def reservar_proximo():
+    """
+    Ruta para reservar el primer turno libre de una ventana, elegido por el servidor.
+    Requiere: matricula, id_marca, anio, desde (YYYY-MM-DD o YYYY-MM-DDTHH:MM).
+    Opcional: hasta (por defecto, el final del día de 'desde').
+    """
+    data = request.get_json()
+
     matricula = data.get('matricula')
     id_marca = data.get('id_marca')
     anio = data.get('anio')
+    desde_str = data.get('desde')
 
-    if not all([matricula, id_marca, anio, id_turno]):
+    if not all([matricula, id_marca, anio, desde_str]):
         current_app.logger.error("Faltan campos requeridos en la solicitud de reserva.")
-        return jsonify({'message': 'Faltan campos requeridos (matricula, id_marca, anio, id_turno).'}), 400
+        return jsonify({'message': 'Faltan campos requeridos (matricula, id_marca, anio, desde).'}), 400
 
-    turno, error = turno_service.reservar_turno(matricula, id_marca, anio, id_turno)
+    turno, error = turno_service.reservar_proximo(matricula, id_marca, anio, desde_str, data.get('hasta'))
     if error:
-        current_app.logger.error(f"Fallo al reservar turno: {error}")
+        current_app.logger.error("Fallo al reservar próximo turno: %s", error)
         return jsonify({'message': error}), 409
 
-    current_app.logger.info(f"Turno {id_turno} reservado exitosamente para vehículo {matricula}.")
+    current_app.logger.info("Turno %s reservado exitosamente para vehículo %s.", turno['id_turno'], matricula)
     return jsonify({
         'message': 'Turno reservado exitosamente.',
         'turno': turno
@@ -59,35 +139,67 @@ def reservar_turno():
 @roles_required(['CLIENTE', 'INSPECTOR', 'ADMINISTRADOR'])
 def consultar_turno(id_turno):
     """ Ruta para consultar los detalles de un turno específico."""
-    current_app.logger.info(f"Consulta de turno iniciada para ID: {id_turno}")
+    current_app.logger.info("Consulta de turno iniciada para ID: %s", id_turno)
     turno, error = turno_service.consultar_turno(id_turno)
     if error:
-        current_app.logger.error(f"Error al consultar turno {id_turno}: {error}")
+        current_app.logger.error("Error al consultar turno %s: %s", id_turno, error)
         return jsonify({'message': error}), 404
 
-    current_app.logger.info(f"Turno {id_turno} consultado exitosamente.")
+    current_app.logger.info("Turno %s consultado exitosamente.", id_turno)
     return jsonify({'turno': turno}), 200
 
 @turno_bp.route('/pendientes', methods=['GET'])
 @token_required
 @roles_required(['INSPECTOR', 'ADMINISTRADOR'])
 def consultar_turnos_pendientes():
-    """ Ruta para consultar todos los turnos pendientes. """
+    """
+    Ruta para consultar los turnos pendientes, paginados por cursor.
+    Opcionales: limite, cursor (valor de 'siguiente_cursor' de la página anterior).
+    Con stream=1 devuelve todos los pendientes como un stream JSON, sin paginar.
+    """
     current_app.logger.info("Consulta de turnos pendientes iniciada.")
-    turnos_pendientes, error = turno_service.consultar_turnos_pendientes()
+    if request.args.get('stream') == '1':
+        return respuesta_json_streaming(
+            turno_service.iterar_turnos_pendientes(),
+            prefijo='{"turnos_pendientes":[', sufijo=']}'
+        )
+
+    try:
+        limite = leer_limite(request.args.get('limite'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    despues_de = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            fecha, id_turno = decodificar_cursor(cursor, 2)
+            despues_de = (datetime.fromisoformat(fecha), int(id_turno))
+        except (TypeError, ValueError):
+            return jsonify({'message': 'Cursor inválido.'}), 400
+
+    turnos_pendientes, error = turno_service.consultar_turnos_pendientes(limite, despues_de)
     if error:
-        current_app.logger.error(f"Error al consultar turnos pendientes: {error}")
+        current_app.logger.error("Error al consultar turnos pendientes: %s", error)
         return jsonify({'message': error}), 400
 
+    siguiente_cursor = None
+    if len(turnos_pendientes) == limite:
+        ultimo = turnos_pendientes[-1]
+        siguiente_cursor = codificar_cursor(ultimo['fecha'], ultimo['id_turno'])
+
     current_app.logger.info("Consulta de turnos pendientes finalizada.")
-    return jsonify({'turnos_pendientes': turnos_pendientes}), 200
+    response = jsonify({'turnos_pendientes': turnos_pendientes, 'siguiente_cursor': siguiente_cursor})
+    if siguiente_cursor:
+        response.headers[HEADER_SIGUIENTE_CURSOR] = siguiente_cursor
+    return response, 200
 
 @turno_bp.route('/<int:id_turno>/finalizar', methods=['POST'])
 @token_required
 @roles_required(['INSPECTOR', 'ADMINISTRADOR'])
 def finalizar_turno(id_turno):
     """ Ruta para que el Inspector cargue los resultados de la inspección. """
-    current_app.logger.info(f"Finalización de turno iniciada para ID: {id_turno}")
+    current_app.logger.info("Finalización de turno iniciada para ID: %s", id_turno)
 
     data = request.get_json()
     detalles_control = data.get('detalles_control')
@@ -100,10 +212,10 @@ def finalizar_turno(id_turno):
 
     resultado_final, error = turno_service.finalizar_turno_inspeccion(id_turno, detalles_control)
     if error:
-        current_app.logger.error(f"Fallo al finalizar turno {id_turno}: {error}")
+        current_app.logger.error("Fallo al finalizar turno %s: %s", id_turno, error)
         return jsonify({'message': error}), 409
 
-    current_app.logger.info(f"Turno {id_turno} finalizado exitosamente con resultado: {resultado_final['resultado']}.")
+    current_app.logger.info("Turno %s finalizado exitosamente con resultado: %s.", id_turno, resultado_final['resultado'])
     return jsonify({
         'message': f"Inspección finalizada. Resultado: {resultado_final['resultado']}",
         'id_turno': resultado_final['id_turno']
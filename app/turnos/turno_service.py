@@ -1,70 +1,300 @@
 # app/services/turno_service.py
 from flask import current_app
-from ..dao.turno_dao import TurnoDAO
+from ..dao.turno_dao import TurnoDAO, RESERVA_OK, RESERVA_NO_ENCONTRADO, RESERVA_CONFLICTO
 from ..dao.vehiculo_dao import VehiculoDAO
 from ..dao.resultado_dao import ResultadoDAO
 from ..models import Vehiculo, Resultado, ResultadoPorControl
-from datetime import datetime
+from ..cache import CacheLRU
+from .indice_disponibilidad import IndiceDisponibilidad
+from .agenda import Agenda
+from datetime import datetime, timedelta
+from itertools import islice
+
+RESERVA_POR_ID_CON_AGENDA = "Con la agenda virtual los turnos se reservan por fecha y hora (campo 'fecha'), no por id_turno."
 
 class TurnoService:
-    def __init__(self, turno_dao: TurnoDAO, vehiculo_dao: VehiculoDAO, resultado_dao: ResultadoDAO):
+    def __init__(self, turno_dao: TurnoDAO, vehiculo_dao: VehiculoDAO, resultado_dao: ResultadoDAO,
+                 cache_disponibilidad: CacheLRU = None, indice_disponibilidad: IndiceDisponibilidad = None,
+                 cache_resultados: CacheLRU = None, agenda: Agenda = None, reloj=datetime.now):
         self.turno_dao = turno_dao
         self.vehiculo_dao = vehiculo_dao
         self.resultado_dao = resultado_dao
+        self.indice_disponibilidad = indice_disponibilidad
+
+        # Con agenda virtual, la disponibilidad se calcula con sus reglas y el índice no se usa.
+        self.agenda = agenda
+        self.reloj = reloj
+
+        # Cache de disponibilidad por fecha. Las escrituras hechas por este proceso a través
+        # de TurnoDAO la invalidan al instante; el TTL acota lo que escriban otros procesos.
+        self.cache_disponibilidad = cache_disponibilidad
+        if cache_disponibilidad is not None:
+            turno_dao.agregar_observador(self._invalidar_disponibilidad)
+            if agenda is not None:
+                agenda.agenda_dao.agregar_observador(self._invalidar_fechas)
+
+        # Un turno FINALIZADO y su resultado ya no cambian: se cachean sin TTL ni invalidación.
+        # cache_resultados: id_resultado -> (turno_dict, resultado_completo)
+        # _resultado_por_turno: id_turno -> id_resultado, solo para turnos finalizados
+        self.cache_resultados = cache_resultados
+        self._resultado_por_turno = CacheLRU(max_entradas=cache_resultados.max_entradas) if cache_resultados is not None else None
+
+    def _invalidar_disponibilidad(self, turnos):
+        """ Invalida en la cache las fechas de los turnos modificados. """
+        self._invalidar_fechas({t.fecha.date() for t in turnos if t.fecha})
+
+    def _invalidar_fechas(self, fechas):
+        for fecha in fechas:
+            self.cache_disponibilidad.invalidar(fecha)
 
     def consultar_disponibilidad(self, fecha_str: str):
         """ Consulta los slots LIBRES para una fecha específica. Se asume que los slots han sido precargados en la DB usando el init.sql. """
         try:
             fecha_consulta = datetime.strptime(fecha_str, '%Y-%m-%d').date()
         except ValueError:
-            current_app.logger.error(f"Formato de fecha inválido recibido: {fecha_str}")
+            current_app.logger.error("Formato de fecha inválido recibido: %s", fecha_str)
             return None, "Formato de fecha inválido. Usar YYYY-MM-DD."
 
-        disponibles = self.turno_dao.obtener_disponibles_por_fecha(fecha_consulta)
-        current_app.logger.info(f"Turnos disponibles para {fecha_str}: {len(disponibles)} encontrados.")
-        return [turno.to_dict() for turno in disponibles], None
+        if self.cache_disponibilidad is None:
+            disponibles = self._cargar_disponibilidad(fecha_consulta)
+        else:
+            disponibles = self.cache_disponibilidad.obtener_o_cargar(
+                fecha_consulta, lambda: self._cargar_disponibilidad(fecha_consulta)
+            )
+        current_app.logger.info("Turnos disponibles para %s: %s encontrados.", fecha_str, len(disponibles))
+        return disponibles, None
+
+    def _cargar_disponibilidad(self, fecha_consulta):
+        if self.agenda is not None:
+            return [turno.to_dict() for turno in self.agenda.disponibles(fecha_consulta, fecha_consulta)[fecha_consulta]]
+
+        disponibles = None
+        if self.indice_disponibilidad is not None:
+            disponibles = self.indice_disponibilidad.disponibles(fecha_consulta)
+        if disponibles is None:
+            disponibles = self.turno_dao.obtener_disponibles_por_fecha(fecha_consulta)
+        return [turno.to_dict() for turno in disponibles]
+
+    def _validar_rango(self, desde_str: str, hasta_str: str):
+        """ Convierte y valida el rango de días desde..hasta. Devuelve (desde, hasta, error). """
+        try:
+            desde = datetime.strptime(desde_str, '%Y-%m-%d').date()
+            hasta = datetime.strptime(hasta_str, '%Y-%m-%d').date()
+        except ValueError:
+            current_app.logger.error("Formato de fecha inválido recibido: %s..%s", desde_str, hasta_str)
+            return None, None, "Formato de fecha inválido. Usar YYYY-MM-DD."
+
+        if hasta < desde:
+            return None, None, "La fecha 'hasta' no puede ser anterior a 'desde'."
+        max_dias = current_app.config['DISPONIBILIDAD_RANGO_MAX_DIAS']
+        if (hasta - desde).days + 1 > max_dias:
+            return None, None, f"El rango no puede superar los {max_dias} días."
+        return desde, hasta, None
+
+    def consultar_disponibilidad_rango(self, desde_str: str, hasta_str: str, resumen: bool = False):
+        """
+        Consulta los slots LIBRES de los días desde..hasta (inclusive) con una sola consulta.
+        Devuelve {'YYYY-MM-DD': [turnos]} con todos los días del rango, o con resumen=True
+        {'YYYY-MM-DD': cantidad}, contada en la DB con GROUP BY.
+        """
+        desde, hasta, error = self._validar_rango(desde_str, hasta_str)
+        if error:
+            return None, error
+
+        if self.agenda is not None:
+            por_dia = self.agenda.disponibles(desde, hasta)
+            if resumen:
+                return {dia.isoformat(): sum(h.cupos for h in libres) for dia, libres in por_dia.items()}, None
+            return {dia.isoformat(): [h.to_dict() for h in libres] for dia, libres in por_dia.items()}, None
+
+        if resumen:
+            return self._libres_por_dia(desde, hasta, self.turno_dao.contar_disponibles_por_dia(desde, hasta)), None
+
+        turnos = self.turno_dao.obtener_disponibles_por_rango(desde, hasta)
+        current_app.logger.info("Turnos disponibles de %s a %s: %s encontrados.", desde_str, hasta_str, len(turnos))
+        return self._agrupar_por_dia(desde, hasta, turnos), None
+
+    @staticmethod
+    def _dias(desde, hasta):
+        return [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+
+    @classmethod
+    def _libres_por_dia(cls, desde, hasta, libres):
+        """ Completa con 0 los días del rango sin turnos libres. """
+        return {dia.isoformat(): libres.get(dia, 0) for dia in cls._dias(desde, hasta)}
+
+    @classmethod
+    def _agrupar_por_dia(cls, desde, hasta, turnos):
+        """ Agrupa los turnos por día, con todos los días del rango. """
+        por_dia = {dia.isoformat(): [] for dia in cls._dias(desde, hasta)}
+        for turno in turnos:
+            por_dia[turno.fecha.date().isoformat()].append(turno.to_dict())
+        return por_dia
+
+    def consultar_proximo_libre(self, desde_str: str = None):
+        """ Busca el primer slot LIBRE a partir de la fecha/hora dada (por defecto, ahora). """
+        try:
+            desde = datetime.fromisoformat(desde_str) if desde_str else datetime.now()
+        except ValueError:
+            current_app.logger.error("Formato de fecha inválido recibido: %s", desde_str)
+            return None, "Formato de fecha inválido. Usar YYYY-MM-DD o YYYY-MM-DDTHH:MM."
+
+        max_dias = current_app.config.get('PROXIMO_LIBRE_MAX_DIAS', 30)
+        if self.agenda is not None:
+            turno = self.agenda.proximo_libre(desde, max_dias)
+        elif self.indice_disponibilidad is not None:
+            turno = self.indice_disponibilidad.proximo_libre(desde, max_dias)
+        else:
+            hasta = datetime.combine(desde.date() + timedelta(days=max_dias), datetime.min.time())
+            turno = self.turno_dao.obtener_proximo_libre(desde, hasta)
+
+        return (turno.to_dict() if turno else None), None
 
     def reservar_turno(self, matricula: str, id_marca: int, anio: int, id_turno: int):
-        """ Generar una reserva de turno para un vehículo. """
+        """ Generar una reserva de turno para un vehículo en una única transacción. """
+        if self.agenda is not None:
+            # Reservar la fila por id no pasaría por el contador del horario en CuposHorario.
+            return None, RESERVA_POR_ID_CON_AGENDA
 
         vehiculo = Vehiculo(matricula=matricula, id_marca=id_marca, anio=anio)
-        self.vehiculo_dao.crear(vehiculo)
+        resultado, turno = self.turno_dao.reservar(id_turno, vehiculo)
 
-        turno = self.turno_dao.obtener_por_id(id_turno)
-        if not turno:
+        if resultado == RESERVA_OK:
+            return turno.to_dict(), None
+        if resultado == RESERVA_NO_ENCONTRADO:
             return None, "ID de turno no encontrado."
-
-        if turno.estado != 'LIBRE':
+        if resultado == RESERVA_CONFLICTO:
             return None, f"El turno {id_turno} ya está {turno.estado}."
+        return None, "Error al actualizar el estado del turno."
+
+    def reservar_horario(self, matricula: str, id_marca: int, anio: int, fecha_str: str):
+        """ Reserva por fecha y hora un lugar de la agenda virtual; la fila en Turnos se crea al reservar. """
+        if self.agenda is None:
+            return None, "La reserva por horario requiere la agenda virtual (AGENDA_VIRTUAL=1)."
+        try:
+            fecha = datetime.fromisoformat(fecha_str)
+        except (TypeError, ValueError):
+            return None, "Formato de fecha inválido. Usar YYYY-MM-DDTHH:MM."
+        ahora = self.reloj()
+        if fecha < ahora:
+            return None, f"El horario {fecha_str} ya pasó."
+        horizonte = current_app.config['RESERVA_HORIZONTE_DIAS']
+        if fecha >= ahora + timedelta(days=horizonte):
+            return None, f"Solo se puede reservar hasta {horizonte} días hacia adelante."
+        capacidad = self.agenda.capacidad_de(fecha)
+        if not capacidad:
+            return None, f"El horario {fecha_str} no corresponde a un turno de la agenda."
+
+        vehiculo = Vehiculo(matricula=matricula, id_marca=id_marca, anio=anio)
+        resultado, turno = self.turno_dao.reservar_horario(fecha, vehiculo, capacidad)
+
+        if resultado == RESERVA_OK:
+            return turno.to_dict(), None
+        if resultado == RESERVA_CONFLICTO:
+            return None, f"No quedan lugares en el horario {fecha_str}."
+        return None, "Error al reservar el horario."
 
-        turno_actualizado = self.turno_dao.actualizar_a_reservado(id_turno, matricula)
-        if turno_actualizado:
-            return turno_actualizado.to_dict(), None
+    def _ventana_reserva(self, desde_str: str, hasta_str: str = None):
+        """
+        Convierte la ventana de reserva-próximo en datetimes [desde, hasta). Una fecha sin hora
+        como 'hasta' incluye ese día entero; sin 'hasta', la ventana termina al final del día de 'desde'.
+        Devuelve (desde, hasta, error).
+        """
+        try:
+            desde = datetime.fromisoformat(desde_str)
+            if hasta_str:
+                hasta = datetime.fromisoformat(hasta_str)
+                if len(hasta_str) == 10:
+                    hasta += timedelta(days=1)
+            else:
+                hasta = datetime.combine(desde.date() + timedelta(days=1), datetime.min.time())
+        except (TypeError, ValueError):
+            return None, None, "Formato de fecha inválido. Usar YYYY-MM-DD o YYYY-MM-DDTHH:MM."
+
+        if hasta <= desde:
+            return None, None, "La fecha 'hasta' debe ser posterior a 'desde'."
+        max_dias = current_app.config.get('PROXIMO_LIBRE_MAX_DIAS', 30)
+        if hasta - desde > timedelta(days=max_dias):
+            return None, None, f"La ventana no puede superar los {max_dias} días."
+        return desde, hasta, None
+
+    def reservar_proximo(self, matricula: str, id_marca: int, anio: int, desde_str: str, hasta_str: str = None):
+        """
+        Reserva el primer turno libre de la ventana [desde, hasta): el servidor elige el turno y
+        resuelve la competencia entre clientes, que no necesitan reintentar con otro id_turno.
+        """
+        desde, hasta, error = self._ventana_reserva(desde_str, hasta_str)
+        if error:
+            return None, error
+
+        vehiculo = Vehiculo(matricula=matricula, id_marca=id_marca, anio=anio)
+        if self.agenda is not None:
+            resultado, turno = self._reservar_proximo_horario(desde, hasta, vehiculo)
         else:
-            return None, "Error al actualizar el estado del turno."
+            resultado, turno = self.turno_dao.reservar_proximo(desde, hasta, vehiculo)
+
+        if resultado == RESERVA_OK:
+            return turno.to_dict(), None
+        if resultado in (RESERVA_NO_ENCONTRADO, RESERVA_CONFLICTO):
+            return None, "No hay turnos libres en el período consultado."
+        return None, "Error al reservar el turno."
+
+    def _reservar_proximo_horario(self, desde: datetime, hasta: datetime, vehiculo: Vehiculo):
+        """
+        Con agenda virtual no hay filas libres que bloquear: se prueban en orden los horarios con
+        lugar de la ventana. Cada intento es el UPDATE condicional del contador del horario, que
+        no espera a nadie si el horario se llenó; se prueban a lo sumo RESERVA_PROXIMO_MAX_INTENTOS.
+        """
+        intentos = max(1, current_app.config['RESERVA_PROXIMO_MAX_INTENTOS'])
+        # Como en la reserva por horario, solo horarios futuros dentro del horizonte de reservas
+        ahora = self.reloj()
+        desde = max(desde, ahora)
+        hasta = min(hasta, ahora + timedelta(days=current_app.config['RESERVA_HORIZONTE_DIAS']))
+        if hasta <= desde:
+            return RESERVA_NO_ENCONTRADO, None
+        disponibles = self.agenda.disponibles(desde.date(), (hasta - timedelta(microseconds=1)).date())
+        candidatos = (h for libres in disponibles.values() for h in libres if desde <= h.fecha < hasta)
+        for horario in islice(candidatos, intentos):
+            resultado, turno = self.turno_dao.reservar_horario(horario.fecha, vehiculo, horario.capacidad)
+            if resultado != RESERVA_CONFLICTO:
+                return resultado, turno
+        return RESERVA_NO_ENCONTRADO, None
 
     def consultar_turno(self, id_turno: int):
-        """ Obtiene el turno y, si está finalizado, obtiene el resultado completo. """
-        turno = self.turno_dao.obtener_por_id(id_turno)
+        """ Obtiene el turno y, si está finalizado, el resultado completo, en una sola consulta. """
+        if self.cache_resultados is not None:
+            id_resultado = self._resultado_por_turno.obtener(id_turno)
+            cacheado = self.cache_resultados.obtener(id_resultado) if id_resultado is not None else None
+            if cacheado:
+                turno_dict, resultado_completo = cacheado
+                return {**turno_dict, 'resultado_inspeccion': resultado_completo}, None
+
+        turno, resultado_completo = self.turno_dao.obtener_con_resultado(id_turno)
         if not turno:
             return None, "Turno no encontrado."
 
         turno_dict = turno.to_dict()
         if turno.estado == 'FINALIZADO' and turno.id_resultado:
-            resultado_completo = self.resultado_dao.obtener_resultado_completo(turno.id_resultado)
-            current_app.logger.info(f"Resultado completo obtenido para turno ID: {id_turno}")
-            turno_dict['resultado_inspeccion'] = resultado_completo
+            current_app.logger.info("Resultado completo obtenido para turno ID: %s", id_turno)
+            if self.cache_resultados is not None and resultado_completo:
+                self.cache_resultados.guardar(turno.id_resultado, (turno_dict, resultado_completo))
+                self._resultado_por_turno.guardar(id_turno, turno.id_resultado)
         else:
-            current_app.logger.info(f"Turno {id_turno} no tiene resultado de inspección.")
-            turno_dict['resultado_inspeccion'] = None
+            current_app.logger.info("Turno %s no tiene resultado de inspección.", id_turno)
+            resultado_completo = None
 
-        return turno_dict, None
+        return {**turno_dict, 'resultado_inspeccion': resultado_completo}, None
 
-    def consultar_turnos_pendientes(self):
-        """ Obtiene todos los turnos en estado 'RESERVADO'. """
-        pendientes = self.turno_dao.obtener_pendientes()
+    def consultar_turnos_pendientes(self, limite: int = None, despues_de: tuple = None):
+        """ Obtiene una página de turnos en estado 'RESERVADO', a partir de la clave (fecha, id_turno) dada. """
+        limite = limite or current_app.config['PAGINA_TAMANIO_DEFECTO']
+        pendientes = self.turno_dao.obtener_pendientes(limite, despues_de)
         return [turno.to_dict() for turno in pendientes], None
 
+    def iterar_turnos_pendientes(self):
+        """ Genera todos los turnos 'RESERVADO' como dicts, sin materializar la lista completa. """
+        return (turno.to_dict() for turno in self.turno_dao.iterar_pendientes())
+
     def _procesar_detalles_inspeccion(self, detalles_control: list):
         """ Procesa la lista de detalles, calcula puntajes y valida. """
         puntaje_total = 0
@@ -122,8 +352,8 @@ class TurnoService:
         )
 
         if id_resultado:
-            current_app.logger.info(f"Turno ID {id_turno} finalizado y guardado exitosamente en DB con resultado ID: {id_resultado}.")
+            current_app.logger.info("Turno ID %s finalizado y guardado exitosamente en DB con resultado ID: %s.", id_turno, id_resultado)
             return {'id_turno': id_turno, 'resultado': resultado_final}, None
         else:
-            current_app.logger.error(f"Fallo crítico al guardar la transacción en la DB para el turno ID: {id_turno}")
+            current_app.logger.error("Fallo crítico al guardar la transacción en la DB para el turno ID: %s", id_turno)
             return None, "Error al guardar la transacción de resultados en la DB."
\ No newline at end of file
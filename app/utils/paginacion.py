@@ -0,0 +1,37 @@
+import base64
+import json
+
+from flask import current_app
+
+# Header con el cursor de la página siguiente (también en el cuerpo cuando la respuesta es un objeto)
+HEADER_SIGUIENTE_CURSOR = 'X-Siguiente-Cursor'
+
+def codificar_cursor(*valores) -> str:
+    """ Codifica la clave de orden del último elemento de una página como un cursor opaco. """
+    crudo = json.dumps(valores, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(crudo.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decodificar_cursor(cursor: str, cantidad: int) -> list:
+    """ Decodifica un cursor opaco. Lanza ValueError si no es válido. """
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno).decode('utf-8'))
+    except Exception as e:
+        raise ValueError("Cursor inválido.") from e
+    if not isinstance(valores, list) or len(valores) != cantidad:
+        raise ValueError("Cursor inválido.")
+    return valores
+
+def leer_limite(valor) -> int:
+    """ Valida el parámetro 'limite' contra la configuración. Lanza ValueError si no es válido. """
+    por_defecto = current_app.config['PAGINA_TAMANIO_DEFECTO']
+    maximo = current_app.config['PAGINA_TAMANIO_MAXIMO']
+    if valor is None:
+        return por_defecto
+    try:
+        limite = int(valor)
+    except ValueError:
+        raise ValueError(f"El parámetro 'limite' debe ser un entero entre 1 y {maximo}.")
+    if not 1 <= limite <= maximo:
+        raise ValueError(f"El parámetro 'limite' debe ser un entero entre 1 y {maximo}.")
+    return limite
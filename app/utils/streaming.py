@@ -0,0 +1,25 @@
+from flask import Response, current_app, stream_with_context
+
+def respuesta_json_streaming(elementos, prefijo='[', sufijo=']', filas_por_chunk=100):
+    """
+    Devuelve una respuesta que serializa `elementos` como un array JSON a medida que se
+    generan, en chunks de `filas_por_chunk` elementos. El primer byte sale antes de leer
+    el último elemento y la memoria por petición no depende del tamaño del resultado.
+    `prefijo`/`sufijo` permiten envolver el array, p. ej. '{"items":[' y ']}'.
+    """
+    def generar():
+        dumps = current_app.json.dumps
+        yield prefijo
+        chunk = []
+        separador = ''
+        for elemento in elementos:
+            chunk.append(separador + dumps(elemento, separators=(',', ':')))
+            separador = ','
+            if len(chunk) >= filas_por_chunk:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+        yield sufijo + '\n'
+
+    return Response(stream_with_context(generar()), mimetype='application/json')
@@ -1,13 +1,40 @@
-from flask import Blueprint, jsonify, current_app
+import logging
+from flask import Blueprint, Response, jsonify
+from app.auth.auth_required import token_required, roles_required
+
+# Nombre -> función sin argumentos que devuelve un dict de contadores.
+fuentes_estadisticas = {}
+
+# RegistroMetricas de la app; None si las métricas están deshabilitadas.
+registro_metricas = None
+
+# Logger propio para muestrear los registros de cada chequeo (ver LOG_MUESTREO).
+logger_health = logging.getLogger('app.health')
 
 utils_bp = Blueprint('utils', __name__, url_prefix='/api')
 
 @utils_bp.route('/health', methods=['GET'])
 def health_check():
     """Endpoint para que Docker Compose sepa que la aplicación está viva."""
-    current_app.logger.info("Recepción de mensaje exitoso!")
+    logger_health.info("Recepción de mensaje exitoso!")
     return jsonify({
         'status': 'ok',
         'service': 'vehicles-api-service',
         'version': '1.0'
-    }), 200
\ No newline at end of file
+    }), 200
+
+@utils_bp.route('/estadisticas', methods=['GET'])
+@token_required
+@roles_required(['ADMINISTRADOR'])
+def estadisticas():
+    """ Devuelve los contadores internos (pool de conexiones, caches, etc.). """
+    return jsonify({
+        nombre: fuente() for nombre, fuente in fuentes_estadisticas.items()
+    }), 200
+
+@utils_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """ Expone las métricas de los pedidos en el formato de texto de Prometheus. """
+    if registro_metricas is None:
+        return jsonify({'message': 'Las métricas no están habilitadas.'}), 404
+    return Response(registro_metricas.exportar(), mimetype='text/plain; version=0.0.4; charset=utf-8')
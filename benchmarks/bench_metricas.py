@@ -0,0 +1,48 @@
+"""
+Benchmark del costo de la instrumentación de pedidos (app/metricas.py).
+
+Mide el mismo endpoint trivial con las métricas habilitadas y deshabilitadas, y el costo
+aislado de registrar una observación.
+
+Uso: python -m benchmarks.bench_metricas [cantidad_pedidos]
+"""
+import logging
+import sys
+import timeit
+
+from flask import jsonify
+
+from app import create_app
+from app.config import Config
+from app.metricas import RegistroMetricas
+
+def crear_app(metricas_habilitadas):
+    config = type('ConfigBench', (Config,), {'METRICAS_HABILITADAS': metricas_habilitadas})
+    app = create_app(config_class=config)
+    app.logger.setLevel(logging.WARNING)
+    app.add_url_rule('/bench', 'bench', lambda: jsonify({'ok': True}))
+    return app
+
+def segundos_por_pedido(app, cantidad, repeticiones):
+    client = app.test_client()
+    client.get('/bench')  # calentamiento
+    return min(timeit.repeat(lambda: client.get('/bench'), number=cantidad, repeat=repeticiones)) / cantidad
+
+def main(cantidad=5000, repeticiones=5):
+    sin_metricas = segundos_por_pedido(crear_app(False), cantidad, repeticiones)
+    con_metricas = segundos_por_pedido(crear_app(True), cantidad, repeticiones)
+
+    registro = RegistroMetricas()
+    observacion = min(timeit.repeat(
+        lambda: registro.observar_pedido('turnos.consultar_disponibilidad', 'GET', 200, 0.012, 0.004),
+        number=100000, repeat=repeticiones)) / 100000
+
+    print(f"Pedidos por corrida: {cantidad}")
+    print(f"  sin métricas   {sin_metricas * 1e6:8.1f} us/pedido")
+    print(f"  con métricas   {con_metricas * 1e6:8.1f} us/pedido")
+    print(f"  sobrecosto     {(con_metricas - sin_metricas) * 1e6:8.1f} us/pedido "
+          f"({100 * (con_metricas / sin_metricas - 1):.1f}%)")
+    print(f"  observar_pedido {observacion * 1e6:7.2f} us")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
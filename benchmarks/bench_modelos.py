@@ -0,0 +1,75 @@
+"""
+Benchmark del camino fila -> modelo -> dict de los listados.
+
+Compara el camino anterior (cursor de diccionarios + clase con __dict__ + Turno(**fila))
+con el actual (cursor de tuplas + modelo con __slots__ + Turno.row_mapper).
+
+Uso: python -m benchmarks.bench_modelos [cantidad_filas]
+"""
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+
+from app.models import Turno
+
+COLUMNAS = ('id_turno', 'matricula', 'fecha', 'estado', 'id_resultado')
+
+class TurnoConDict:
+    """Réplica del modelo Turno anterior, sin __slots__."""
+    def __init__(self, id_turno=None, matricula=None, fecha=None, estado='LIBRE', id_resultado=None):
+        self.id_turno = id_turno
+        self.matricula = matricula
+        self.fecha = fecha
+        self.id_resultado = id_resultado
+        self.estado = estado
+
+    def to_dict(self):
+        return {
+            'id_turno': self.id_turno,
+            'matricula': self.matricula,
+            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'id_resultado': self.id_resultado,
+            'estado': self.estado,
+        }
+
+def generar_filas(cantidad):
+    inicio = datetime(2025, 1, 1, 9, 0)
+    return [
+        (i, f'AB{i:06d}', inicio + timedelta(minutes=30 * i), 'RESERVADO', None)
+        for i in range(1, cantidad + 1)
+    ]
+
+def camino_anterior(filas):
+    # El cursor de diccionarios arma un dict por fila antes de llegar al DAO
+    modelos = [TurnoConDict(**dict(zip(COLUMNAS, fila))) for fila in filas]
+    return modelos, [m.to_dict() for m in modelos]
+
+def camino_actual(filas):
+    build = Turno.row_mapper(COLUMNAS)
+    modelos = list(map(build, filas))
+    return modelos, [m.to_dict() for m in modelos]
+
+def memoria_pico(funcion, filas):
+    tracemalloc.start()
+    resultado = funcion(filas)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del resultado
+    return pico
+
+def main(cantidad=20000, repeticiones=5):
+    filas = generar_filas(cantidad)
+    print(f"Filas por corrida: {cantidad}")
+    resultados = {}
+    for nombre, funcion in (('anterior', camino_anterior), ('actual', camino_actual)):
+        tiempo = min(timeit.repeat(lambda: funcion(filas), number=1, repeat=repeticiones))
+        pico = memoria_pico(funcion, filas)
+        resultados[nombre] = (tiempo, pico)
+        print(f"  {nombre:9s} {tiempo * 1e6 / cantidad:7.2f} us/fila  pico {pico / cantidad:7.1f} B/fila")
+
+    (t_ant, m_ant), (t_act, m_act) = resultados['anterior'], resultados['actual']
+    print(f"Mejora: CPU x{t_ant / t_act:.2f}, memoria pico -{100 * (1 - m_act / m_ant):.0f}%")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
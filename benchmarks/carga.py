@@ -0,0 +1,259 @@
+"""
+Generador de carga de un día de reservas.
+
+Simula clientes que consultan la disponibilidad de un día y compiten por reservar uno de los
+turnos libres, e inspectores que leen los pendientes y finalizan inspecciones. Las llegadas
+de cada tipo de usuario siguen un proceso de Poisson con la tasa indicada (carga abierta),
+cada sesión corre en un pool de hilos y entre la consulta y la acción hay una pausa aleatoria
+(`--pausa-media`), durante la cual otros usuarios pueden tomar el mismo turno.
+
+Destinos:
+  * en proceso (por defecto): la app de create_app con los DAOs en memoria de la suite de
+    benchmarks, a través del cliente de pruebas de Flask.
+  * HTTP: `--url http://localhost:5001` contra un servidor levantado, con los usuarios de
+    prueba del README (`--password`).
+
+Informa throughput, percentiles de latencia, tasa de conflictos (409) y de errores (5xx o
+fallas de conexión) por tipo de pedido. `--grabar traza.jsonl` guarda cada pedido con su
+instante relativo; `--reproducir traza.jsonl` los vuelve a emitir en el mismo orden y con los
+mismos tiempos (escalados por `--velocidad`).
+
+Uso:
+    python -m benchmarks.carga --duracion 20 --clientes-por-segundo 80 --inspectores-por-segundo 5
+    python -m benchmarks.carga --url http://localhost:5001 --desde 2025-11-18 --grabar manana.jsonl
+    python -m benchmarks.carga --reproducir manana.jsonl --velocidad 2
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from .suite import Entorno, PRIMER_DIA, DETALLES_CONTROL, percentil
+
+class DestinoEnProceso:
+    """Pedidos a la app en el mismo proceso, con un cliente de pruebas por hilo."""
+
+    def __init__(self, dias):
+        self.entorno = Entorno(turnos_necesarios=dias * 18)
+        # Los conflictos de reserva son parte de la carga, pero la app los registra como ERROR.
+        self.entorno.app.logger.setLevel(logging.CRITICAL)
+        self.tokens = {'CLIENTE': self.entorno.token_cliente, 'INSPECTOR': self.entorno.token_inspector}
+        self._local = threading.local()
+
+    def pedir(self, metodo, ruta, rol, cuerpo=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.entorno.app.test_client()
+        response = client.open(ruta, method=metodo, json=cuerpo,
+                               headers={'Authorization': f'Bearer {self.tokens[rol]}'})
+        return response.status_code, response.get_json(silent=True)
+
+class DestinoHTTP:
+    """Pedidos a un servidor HTTP. Obtiene los tokens con el login de los usuarios de prueba."""
+
+    def __init__(self, url, usuarios, password):
+        self.url = url.rstrip('/')
+        self.tokens = {}
+        for rol, username in usuarios.items():
+            status, cuerpo = self._enviar('POST', '/api/auth/login', None, {'username': username, 'password': password})
+            if status != 200:
+                raise SystemExit(f"No se pudo iniciar sesión como {username}: {status} {cuerpo}")
+            self.tokens[rol] = cuerpo['token']
+
+    def _enviar(self, metodo, ruta, token, cuerpo):
+        datos = json.dumps(cuerpo).encode('utf-8') if cuerpo is not None else None
+        pedido = urllib.request.Request(self.url + ruta, data=datos, method=metodo)
+        pedido.add_header('Content-Type', 'application/json')
+        if token:
+            pedido.add_header('Authorization', f'Bearer {token}')
+        try:
+            with urllib.request.urlopen(pedido, timeout=30) as response:
+                return response.status, json.loads(response.read() or b'null')
+        except urllib.error.HTTPError as e:
+            return e.code, None
+
+    def pedir(self, metodo, ruta, rol, cuerpo=None):
+        return self._enviar(metodo, ruta, self.tokens[rol], cuerpo)
+
+class Estadisticas:
+    """Latencias y resultados por tipo de pedido, thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.status = defaultdict(lambda: defaultdict(int))
+
+    def registrar(self, tipo, status, segundos):
+        with self._lock:
+            self.latencias[tipo].append(segundos)
+            self.status[tipo][status] += 1
+
+    def informe(self, duracion):
+        total = sum(len(v) for v in self.latencias.values())
+        lineas = [f"Pedidos: {total} en {duracion:.1f} s ({total / duracion:.1f} pedidos/s)",
+                  f"{'tipo':15s} {'pedidos':>8s} {'p50 ms':>8s} {'p90 ms':>8s} {'p99 ms':>8s} "
+                  f"{'conflictos':>11s} {'errores':>8s}"]
+        for tipo in sorted(self.latencias):
+            tiempos = sorted(self.latencias[tipo])
+            cantidad = len(tiempos)
+            status = self.status[tipo]
+            conflictos = status.get(409, 0)
+            errores = sum(n for s, n in status.items() if s is None or s >= 500)
+            lineas.append(
+                f"{tipo:15s} {cantidad:8d} {percentil(tiempos, 0.5) * 1e3:8.2f} {percentil(tiempos, 0.9) * 1e3:8.2f} "
+                f"{percentil(tiempos, 0.99) * 1e3:8.2f} {conflictos / cantidad:10.1%} {errores / cantidad:8.1%}"
+            )
+        return '\n'.join(lineas)
+
+class Generador:
+    def __init__(self, destino, estadisticas, inicio, grabadora=None, pausa_media=0.0):
+        self.destino = destino
+        self.pausa_media = pausa_media
+        self.estadisticas = estadisticas
+        self.inicio = inicio
+        self.grabadora = grabadora
+        self._lock_grabadora = threading.Lock()
+
+    def pedir(self, tipo, metodo, ruta, rol, cuerpo=None):
+        """Emite un pedido, mide su latencia y lo graba en la traza si corresponde."""
+        if self.grabadora is not None:
+            linea = json.dumps({'t': round(time.perf_counter() - self.inicio, 6), 'tipo': tipo,
+                                'metodo': metodo, 'ruta': ruta, 'rol': rol, 'cuerpo': cuerpo})
+            with self._lock_grabadora:
+                self.grabadora.write(linea + '\n')
+
+        t0 = time.perf_counter()
+        try:
+            status, respuesta = self.destino.pedir(metodo, ruta, rol, cuerpo)
+        except Exception:
+            status, respuesta = None, None
+        self.estadisticas.registrar(tipo, status, time.perf_counter() - t0)
+        return status, respuesta
+
+    def _pausa(self, rnd):
+        """Tiempo que el usuario tarda en decidir; mientras tanto otros ven los mismos turnos libres."""
+        if self.pausa_media > 0:
+            time.sleep(rnd.expovariate(1 / self.pausa_media))
+
+    def sesion_cliente(self, dias, desde, rnd):
+        fecha = (desde + timedelta(days=rnd.randrange(dias))).isoformat()
+        status, respuesta = self.pedir('disponibilidad', 'GET', f'/api/turnos/disponibilidad?fecha={fecha}', 'CLIENTE')
+        disponibles = (respuesta or {}).get('disponibles') if status == 200 else None
+        if not disponibles:
+            return
+        self._pausa(rnd)
+        # Varios clientes eligen entre los primeros horarios: ahí se producen los conflictos.
+        turno = rnd.choice(disponibles[:3])
+        self.pedir('reservar', 'POST', '/api/turnos/reservar', 'CLIENTE', {
+            'matricula': f'CAR{rnd.randrange(10 ** 6):06d}', 'id_marca': 1, 'anio': 2020,
+            'id_turno': turno['id_turno']})
+
+    def sesion_inspector(self, rnd):
+        status, respuesta = self.pedir('pendientes', 'GET', '/api/turnos/pendientes?limite=10', 'INSPECTOR')
+        pendientes = (respuesta or {}).get('turnos_pendientes') if status == 200 else None
+        if not pendientes:
+            return
+        self._pausa(rnd)
+        turno = rnd.choice(pendientes)
+        self.pedir('finalizar', 'POST', f"/api/turnos/{turno['id_turno']}/finalizar", 'INSPECTOR',
+                   {'detalles_control': DETALLES_CONTROL})
+
+def llegadas(tasa, duracion, rnd):
+    """Instantes de llegada de un proceso de Poisson de `tasa` por segundo en [0, duracion)."""
+    t = 0.0
+    if tasa <= 0:
+        return
+    while True:
+        t += rnd.expovariate(tasa)
+        if t >= duracion:
+            return
+        yield t
+
+def correr_carga(generador, pool, args, desde):
+    rnd = random.Random(args.semilla)
+    agenda = [(t, 'cliente') for t in llegadas(args.clientes_por_segundo, args.duracion, rnd)]
+    agenda += [(t, 'inspector') for t in llegadas(args.inspectores_por_segundo, args.duracion, rnd)]
+    agenda.sort()
+
+    futuros = []
+    for i, (t, tipo) in enumerate(agenda):
+        _esperar_hasta(generador.inicio + t)
+        rnd_sesion = random.Random(args.semilla * 1000003 + i)
+        if tipo == 'cliente':
+            futuros.append(pool.submit(generador.sesion_cliente, args.dias, desde, rnd_sesion))
+        else:
+            futuros.append(pool.submit(generador.sesion_inspector, rnd_sesion))
+    return futuros
+
+def reproducir(generador, pool, traza, velocidad):
+    futuros = []
+    with open(traza) as f:
+        for linea in f:
+            pedido = json.loads(linea)
+            _esperar_hasta(generador.inicio + pedido['t'] / velocidad)
+            futuros.append(pool.submit(generador.pedir, pedido['tipo'], pedido['metodo'], pedido['ruta'],
+                                       pedido['rol'], pedido['cuerpo']))
+    return futuros
+
+def _esperar_hasta(instante):
+    restante = instante - time.perf_counter()
+    if restante > 0:
+        time.sleep(restante)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help="servidor HTTP destino; sin esto se usa la app en proceso")
+    parser.add_argument('--duracion', type=float, default=10.0, help="segundos de generación de llegadas")
+    parser.add_argument('--clientes-por-segundo', type=float, default=50.0)
+    parser.add_argument('--inspectores-por-segundo', type=float, default=5.0)
+    parser.add_argument('--hilos', type=int, default=128, help="sesiones concurrentes como máximo")
+    parser.add_argument('--pausa-media', type=float, default=0.5,
+                        help="segundos promedio entre ver la lista y elegir un turno")
+    parser.add_argument('--dias', type=int, default=3, help="días de agenda entre los que eligen los clientes")
+    parser.add_argument('--desde', type=date.fromisoformat, help="primer día de agenda (modo HTTP)")
+    parser.add_argument('--usuario-cliente', default='cliente_test')
+    parser.add_argument('--usuario-inspector', default='inspector_test')
+    parser.add_argument('--password', default='test')
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--grabar', help="archivo JSONL donde grabar la traza de pedidos")
+    parser.add_argument('--reproducir', help="traza JSONL a reproducir en lugar de generar carga")
+    parser.add_argument('--velocidad', type=float, default=1.0, help="factor de velocidad de la reproducción")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        destino = DestinoHTTP(args.url, {'CLIENTE': args.usuario_cliente, 'INSPECTOR': args.usuario_inspector},
+                              args.password)
+        desde = args.desde or date.today() + timedelta(days=1)
+    else:
+        destino = DestinoEnProceso(args.dias)
+        desde = PRIMER_DIA
+
+    estadisticas = Estadisticas()
+    grabadora = open(args.grabar, 'w') if args.grabar else None
+    try:
+        generador = Generador(destino, estadisticas, time.perf_counter(), grabadora, args.pausa_media)
+        with ThreadPoolExecutor(max_workers=args.hilos) as pool:
+            if args.reproducir:
+                futuros = reproducir(generador, pool, args.reproducir, args.velocidad)
+            else:
+                futuros = correr_carga(generador, pool, args, desde)
+            for futuro in futuros:
+                futuro.result()
+        duracion = time.perf_counter() - generador.inicio
+    finally:
+        if grabadora is not None:
+            grabadora.close()
+
+    print(estadisticas.informe(duracion))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
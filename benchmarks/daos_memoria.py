@@ -0,0 +1,173 @@
+"""
+DAOs en memoria para correr los benchmarks sin MySQL.
+
+Implementan la misma interfaz que los DAOs de app/dao (los de turnos heredan el mecanismo de
+observadores de TurnoDAO) y devuelven objetos nuevos en cada lectura, como lo haría un cursor.
+"""
+import itertools
+import threading
+from datetime import datetime, time, timedelta
+
+from app.dao.turno_dao import TurnoDAO, RESERVA_OK, RESERVA_NO_ENCONTRADO, RESERVA_CONFLICTO
+from app.models import Usuario, Turno, Resultado
+
+class DatosMemoria:
+    """Tablas compartidas por los DAOs en memoria."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.usuarios = {}       # username -> Usuario
+        self.turnos = {}         # id_turno -> Turno
+        self.turnos_por_dia = {}  # date -> [id_turno] en orden de horario
+        self.vehiculos = {}      # matricula -> Vehiculo
+        self.resultados = {}     # id_resultado -> resultado_completo (dict)
+        self._ids_turno = itertools.count(1)
+        self._ids_usuario = itertools.count(1)
+        self._ids_resultado = itertools.count(1)
+
+    def cargar_agenda(self, desde, dias, hora_inicio=time(9, 0), hora_fin=time(18, 0), intervalo_minutos=30):
+        """Crea turnos LIBRES para `dias` días a partir de `desde`, en la grilla de la agenda."""
+        intervalo = timedelta(minutes=intervalo_minutos)
+        for i in range(dias):
+            dia = desde + timedelta(days=i)
+            actual = datetime.combine(dia, hora_inicio)
+            fin = datetime.combine(dia, hora_fin)
+            while actual < fin:
+                self.agregar_turno(Turno(fecha=actual, estado='LIBRE'))
+                actual += intervalo
+
+    def agregar_turno(self, turno):
+        with self.lock:
+            turno.id_turno = next(self._ids_turno)
+            self.turnos[turno.id_turno] = turno
+            self.turnos_por_dia.setdefault(turno.fecha.date(), []).append(turno.id_turno)
+        return turno.id_turno
+
+    def agregar_usuario(self, username, password_hash, rol):
+        with self.lock:
+            usuario = Usuario(next(self._ids_usuario), username, password_hash, rol)
+            self.usuarios[username] = usuario
+        return usuario.id_usuario
+
+def _copia(turno):
+    return Turno(turno.id_turno, turno.matricula, turno.fecha, turno.estado, turno.id_resultado)
+
+class UsuarioDAOMemoria:
+    def __init__(self, datos):
+        self.datos = datos
+
+    def crear(self, usuario):
+        return self.datos.agregar_usuario(usuario.username, usuario.password_hash, usuario.rol)
+
+    def obtener_por_username(self, username):
+        usuario = self.datos.usuarios.get(username)
+        if usuario is None:
+            return None
+        return Usuario(usuario.id_usuario, usuario.username, usuario.password_hash, usuario.rol)
+
+class TurnoDAOMemoria(TurnoDAO):
+    def __init__(self, datos):
+        super().__init__()
+        self.datos = datos
+
+    def _del_dia(self, dia):
+        turnos = self.datos.turnos
+        return [_copia(turnos[i]) for i in self.datos.turnos_por_dia.get(dia, ())]
+
+    def crear_varios(self, turnos, tamanio_lote=None):
+        # Como el índice único sobre fecha: los horarios que ya tienen turno se omiten.
+        existentes = {t.fecha for t in self.datos.turnos.values()}
+        nuevos = [t for t in turnos if t.fecha not in existentes]
+        for turno in nuevos:
+            self.datos.agregar_turno(_copia(turno))
+        self._notificar(turnos)
+        return len(nuevos)
+
+    def obtener_por_id(self, id_turno):
+        turno = self.datos.turnos.get(id_turno)
+        return _copia(turno) if turno else None
+
+    def obtener_con_resultado(self, id_turno):
+        turno = self.obtener_por_id(id_turno)
+        if turno is None:
+            return None, None
+        resultado = self.datos.resultados.get(turno.id_resultado)
+        if resultado is None:
+            return turno, None
+        return turno, {**resultado, 'detalles_control': [dict(d) for d in resultado['detalles_control']]}
+
+    def obtener_por_fecha(self, fecha_consulta):
+        return self._del_dia(fecha_consulta)
+
+    def obtener_por_rango(self, desde, hasta):
+        turnos = []
+        while desde <= hasta:
+            turnos += self._del_dia(desde)
+            desde += timedelta(days=1)
+        return turnos
+
+    def obtener_disponibles_por_fecha(self, fecha_consulta):
+        return [t for t in self._del_dia(fecha_consulta) if t.estado == 'LIBRE']
+
+    def obtener_proximo_libre(self, desde, hasta):
+        dia = desde.date()
+        while datetime.combine(dia, time.min) < hasta:
+            for turno in self.obtener_disponibles_por_fecha(dia):
+                if desde <= turno.fecha < hasta:
+                    return turno
+            dia += timedelta(days=1)
+        return None
+
+    def obtener_pendientes(self, limite, despues_de=None):
+        pendientes = sorted((t for t in self.datos.turnos.values() if t.estado == 'RESERVADO'),
+                            key=lambda t: (t.fecha, t.id_turno))
+        if despues_de is not None:
+            pendientes = [t for t in pendientes if (t.fecha, t.id_turno) > despues_de]
+        return [_copia(t) for t in pendientes[:limite]]
+
+    def iterar_pendientes(self):
+        yield from self.obtener_pendientes(len(self.datos.turnos))
+
+    def reservar(self, id_turno, vehiculo):
+        with self.datos.lock:
+            guardado = self.datos.turnos.get(id_turno)
+            if guardado is None:
+                return RESERVA_NO_ENCONTRADO, None
+            if guardado.estado != 'LIBRE':
+                return RESERVA_CONFLICTO, _copia(guardado)
+            self.datos.vehiculos.setdefault(vehiculo.matricula, vehiculo)
+            guardado.matricula = vehiculo.matricula
+            guardado.estado = 'RESERVADO'
+            turno = _copia(guardado)
+        self._notificar([turno])
+        return RESERVA_OK, turno
+
+class VehiculoDAOMemoria:
+    def __init__(self, datos):
+        self.datos = datos
+
+    def crear(self, vehiculo):
+        self.datos.vehiculos.setdefault(vehiculo.matricula, vehiculo)
+        return True
+
+    def obtener_por_matricula(self, matricula):
+        return self.datos.vehiculos.get(matricula)
+
+class ResultadoDAOMemoria:
+    def __init__(self, datos):
+        self.datos = datos
+
+    def registrar_resultado_inspeccion(self, turno, resultado, detalles_control):
+        with self.datos.lock:
+            id_resultado = next(self.datos._ids_resultado)
+            completo = Resultado(id_resultado, resultado.resultado, resultado.puntaje_total,
+                                 resultado.observaciones).to_dict()
+            completo['detalles_control'] = [
+                {'id_control': d.id_control, 'calificacion': d.calificacion, 'observaciones': d.observaciones}
+                for d in detalles_control
+            ]
+            self.datos.resultados[id_resultado] = completo
+            guardado = self.datos.turnos[turno.id_turno]
+            guardado.id_resultado = id_resultado
+            guardado.estado = 'FINALIZADO'
+        return id_resultado
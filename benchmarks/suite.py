@@ -0,0 +1,275 @@
+"""
+Suite de benchmarks de los endpoints y servicios más usados, sin MySQL.
+
+Arma la app con create_app (misma configuración de caches, índice y ejecutores que en
+producción) pero con los DAOs en memoria de benchmarks/daos_memoria.py, y mide cada caso a
+través del cliente de pruebas de Flask (`/http`) y llamando directamente al servicio
+(`/servicio`). Informa throughput, p50 y p99 por caso.
+
+Uso:
+    python -m benchmarks.suite                      # corre y compara con el baseline, si existe
+    python -m benchmarks.suite --guardar-baseline   # corre y guarda el baseline
+    python -m benchmarks.suite --solo reservar --iteraciones 5000
+
+Sale con código 1 si algún caso empeora su p50 o su throughput más allá de la tolerancia
+respecto del baseline. Los baselines dependen de la máquina: se guardan por defecto en
+benchmarks/resultados/ (fuera del control de versiones).
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import bcrypt
+
+from app import create_app
+from app.auth import auth_controller
+from app.auth.auth_required import _verificar
+from app.config import Config
+from app.models import Usuario
+from app.turnos import turno_controller
+from .daos_memoria import (DatosMemoria, UsuarioDAOMemoria, TurnoDAOMemoria,
+                           VehiculoDAOMemoria, ResultadoDAOMemoria)
+
+BASELINE_DEFECTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados', 'baseline.json')
+
+PRIMER_DIA = date(2030, 1, 2)
+DIAS_CONSULTADOS = 30
+SLOTS_POR_DIA = 18
+PASSWORD = 'test'
+DETALLES_CONTROL = [{'id_control': i, 'calificacion': 8, 'observaciones': None} for i in range(1, 9)]
+
+class ConfigBenchmark(Config):
+    TESTING = True
+    JWT_SECRET_KEY = 'benchmark'
+    JWT_EXPIRATION_SECONDS = 3600
+
+class Entorno:
+    """App, cliente, datos en memoria y tokens compartidos por los casos."""
+
+    def __init__(self, turnos_necesarios):
+        self.datos = DatosMemoria()
+        dias = max(DIAS_CONSULTADOS, math.ceil(turnos_necesarios / SLOTS_POR_DIA) + 1)
+        self.datos.cargar_agenda(PRIMER_DIA, dias)
+        # bcrypt con costo 4 para que el login no domine la duración de la suite
+        password_hash = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds=4)).decode('utf-8')
+        for username, rol in (('cliente_bench', 'CLIENTE'), ('inspector_bench', 'INSPECTOR')):
+            self.datos.agregar_usuario(username, password_hash, rol)
+
+        with patch.multiple('app',
+                            UsuarioDAO=lambda: UsuarioDAOMemoria(self.datos),
+                            TurnoDAO=lambda: TurnoDAOMemoria(self.datos),
+                            VehiculoDAO=lambda: VehiculoDAOMemoria(self.datos),
+                            ResultadoDAO=lambda: ResultadoDAOMemoria(self.datos)):
+            self.app = create_app(config_class=ConfigBenchmark)
+
+        self.client = self.app.test_client()
+        self.turno_service = turno_controller.turno_service
+        self.auth_service = auth_controller.auth_service
+        with self.app.app_context():
+            self.token_cliente = Usuario(1, 'cliente_bench', rol='CLIENTE').generate_auth_token()
+            self.token_inspector = Usuario(2, 'inspector_bench', rol='INSPECTOR').generate_auth_token()
+        self._proximo_libre = iter(sorted(self.datos.turnos))
+
+    def headers(self, token):
+        return {'Authorization': f'Bearer {token}'}
+
+    def turnos_libres(self, cantidad):
+        """Reserva para un caso `cantidad` ids de turnos LIBRES que ningún otro caso usa."""
+        return [next(self._proximo_libre) for _ in range(cantidad)]
+
+    def turnos_reservados(self, cantidad):
+        ids = self.turnos_libres(cantidad)
+        for id_turno in ids:
+            turno = self.datos.turnos[id_turno]
+            turno.estado, turno.matricula = 'RESERVADO', f'BEN{id_turno:05d}'
+        return ids
+
+def _esperar(response, status):
+    if response.status_code != status:
+        raise RuntimeError(f"Respuesta inesperada {response.status_code}: {response.get_data(as_text=True)[:200]}")
+
+def _fecha(i):
+    return (PRIMER_DIA + timedelta(days=i % DIAS_CONSULTADOS)).isoformat()
+
+# Cada caso recibe (entorno, cantidad de llamadas) y devuelve una función f(i) para i en [0, cantidad).
+
+def disponibilidad_servicio(entorno, cantidad):
+    return lambda i: entorno.turno_service.consultar_disponibilidad(_fecha(i))
+
+def disponibilidad_http(entorno, cantidad):
+    headers = entorno.headers(entorno.token_cliente)
+    return lambda i: _esperar(entorno.client.get(f'/api/turnos/disponibilidad?fecha={_fecha(i)}', headers=headers), 200)
+
+def reservar_servicio(entorno, cantidad):
+    ids = entorno.turnos_libres(cantidad)
+    def reservar(i):
+        _, error = entorno.turno_service.reservar_turno(f'SRV{i:06d}', 1, 2020, ids[i])
+        if error:
+            raise RuntimeError(error)
+    return reservar
+
+def reservar_http(entorno, cantidad):
+    ids = entorno.turnos_libres(cantidad)
+    headers = entorno.headers(entorno.token_cliente)
+    return lambda i: _esperar(entorno.client.post('/api/turnos/reservar', headers=headers, json={
+        'matricula': f'HTP{i:06d}', 'id_marca': 1, 'anio': 2020, 'id_turno': ids[i]}), 201)
+
+def finalizar_servicio(entorno, cantidad):
+    ids = entorno.turnos_reservados(cantidad)
+    def finalizar(i):
+        _, error = entorno.turno_service.finalizar_turno_inspeccion(ids[i], DETALLES_CONTROL)
+        if error:
+            raise RuntimeError(error)
+    return finalizar
+
+def finalizar_http(entorno, cantidad):
+    ids = entorno.turnos_reservados(cantidad)
+    headers = entorno.headers(entorno.token_inspector)
+    return lambda i: _esperar(entorno.client.post(f'/api/turnos/{ids[i]}/finalizar', headers=headers,
+                                                  json={'detalles_control': DETALLES_CONTROL}), 200)
+
+def _turnos_finalizados(entorno, cantidad=100):
+    ids = entorno.turnos_reservados(cantidad)
+    for id_turno in ids:
+        entorno.turno_service.finalizar_turno_inspeccion(id_turno, DETALLES_CONTROL)
+    return ids
+
+def consultar_turno_servicio(entorno, cantidad):
+    ids = _turnos_finalizados(entorno)
+    return lambda i: entorno.turno_service.consultar_turno(ids[i % len(ids)])
+
+def consultar_turno_http(entorno, cantidad):
+    ids = _turnos_finalizados(entorno)
+    headers = entorno.headers(entorno.token_cliente)
+    return lambda i: _esperar(entorno.client.get(f'/api/turnos/{ids[i % len(ids)]}/consultar', headers=headers), 200)
+
+def login_servicio(entorno, cantidad):
+    def login(i):
+        if entorno.auth_service.login('cliente_bench', PASSWORD) is None:
+            raise RuntimeError("Login fallido")
+    return login
+
+def login_http(entorno, cantidad):
+    return lambda i: _esperar(entorno.client.post('/api/auth/login', json={
+        'username': 'cliente_bench', 'password': PASSWORD}), 200)
+
+def token_servicio(entorno, cantidad):
+    """Verificación completa (HMAC + claims), sin la cache de tokens."""
+    return lambda i: _verificar(entorno.token_cliente)
+
+def token_http(entorno, cantidad):
+    headers = entorno.headers(entorno.token_cliente)
+    return lambda i: _esperar(entorno.client.get('/api/auth/test-protected', headers=headers), 200)
+
+CASOS = {
+    'disponibilidad/servicio': disponibilidad_servicio,
+    'disponibilidad/http': disponibilidad_http,
+    'reservar/servicio': reservar_servicio,
+    'reservar/http': reservar_http,
+    'finalizar/servicio': finalizar_servicio,
+    'finalizar/http': finalizar_http,
+    'consultar_turno/servicio': consultar_turno_servicio,
+    'consultar_turno/http': consultar_turno_http,
+    'login/servicio': login_servicio,
+    'login/http': login_http,
+    'token/servicio': token_servicio,
+    'token/http': token_http,
+}
+
+# Casos que consumen un turno por llamada (para dimensionar la agenda en memoria)
+CASOS_QUE_CONSUMEN_TURNOS = ('reservar/', 'finalizar/', 'consultar_turno/')
+
+def percentil(ordenados, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    return ordenados[min(len(ordenados) - 1, max(0, math.ceil(p * len(ordenados)) - 1))]
+
+def medir(funcion, iteraciones, calentamiento):
+    for i in range(calentamiento):
+        funcion(i)
+    tiempos = []
+    inicio = time.perf_counter()
+    for i in range(calentamiento, calentamiento + iteraciones):
+        t0 = time.perf_counter()
+        funcion(i)
+        tiempos.append(time.perf_counter() - t0)
+    total = time.perf_counter() - inicio
+    tiempos.sort()
+    return {
+        'iteraciones': iteraciones,
+        'ops_por_segundo': round(iteraciones / total, 1),
+        'p50_us': round(percentil(tiempos, 0.50) * 1e6, 1),
+        'p99_us': round(percentil(tiempos, 0.99) * 1e6, 1),
+    }
+
+def correr(nombres, iteraciones, calentamiento):
+    cantidad = iteraciones + calentamiento
+    consumidos = sum(1 for n in nombres if n.startswith(CASOS_QUE_CONSUMEN_TURNOS))
+    entorno = Entorno(turnos_necesarios=consumidos * (cantidad + 100))
+
+    resultados = {}
+    with entorno.app.app_context():
+        for nombre in nombres:
+            resultados[nombre] = medir(CASOS[nombre](entorno, cantidad), iteraciones, calentamiento)
+            r = resultados[nombre]
+            print(f"{nombre:26s} {r['ops_por_segundo']:10.1f} ops/s   p50 {r['p50_us']:9.1f} us   p99 {r['p99_us']:9.1f} us")
+    return resultados
+
+def comparar(resultados, baseline, tolerancia):
+    """Devuelve la lista de regresiones de p50 o throughput respecto del baseline."""
+    regresiones = []
+    for nombre, actual in resultados.items():
+        base = baseline.get(nombre)
+        if not base:
+            continue
+        if actual['p50_us'] > base['p50_us'] * (1 + tolerancia):
+            regresiones.append(f"{nombre}: p50 {actual['p50_us']} us (baseline {base['p50_us']} us)")
+        if actual['ops_por_segundo'] < base['ops_por_segundo'] / (1 + tolerancia):
+            regresiones.append(f"{nombre}: {actual['ops_por_segundo']} ops/s (baseline {base['ops_por_segundo']} ops/s)")
+    return regresiones
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iteraciones', type=int, default=1000)
+    parser.add_argument('--calentamiento', type=int, default=50)
+    parser.add_argument('--solo', help="corre solo los casos cuyo nombre contiene este texto")
+    parser.add_argument('--baseline', default=BASELINE_DEFECTO)
+    parser.add_argument('--guardar-baseline', action='store_true')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help="empeoramiento admitido (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    nombres = [n for n in CASOS if not args.solo or args.solo in n]
+    resultados = correr(nombres, args.iteraciones, args.calentamiento)
+
+    if args.guardar_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(resultados)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline guardado en {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("Sin baseline para comparar (usar --guardar-baseline).")
+        return 0
+
+    with open(args.baseline) as f:
+        regresiones = comparar(resultados, json.load(f), args.tolerancia)
+    if regresiones:
+        print(f"Regresiones por encima de la tolerancia ({args.tolerancia:.0%}):")
+        for regresion in regresiones:
+            print(f"  {regresion}")
+        return 1
+    print(f"Sin regresiones respecto del baseline (tolerancia {args.tolerancia:.0%}).")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
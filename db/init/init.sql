@@ -2,7 +2,8 @@ CREATE TABLE Usuarios (
     id_usuario INT PRIMARY KEY AUTO_INCREMENT,
     username VARCHAR(100) NOT NULL UNIQUE,
     password_hash VARCHAR(255) NOT NULL,
-    rol VARCHAR(50) NOT NULL DEFAULT 'CLIENTE'
+    rol VARCHAR(50) NOT NULL DEFAULT 'CLIENTE',
+    version_token INT NOT NULL DEFAULT 0
 );
 
 CREATE TABLE Marcas (
@@ -43,12 +44,47 @@ CREATE TABLE Turnos (
     id_turno INT PRIMARY KEY AUTO_INCREMENT,
     matricula VARCHAR(20) NULL,
     fecha DATETIME NOT NULL,
+    carril INT NOT NULL DEFAULT 1,
     id_resultado INT NULL,
     estado VARCHAR(50) NOT NULL,
     FOREIGN KEY (matricula) REFERENCES Vehiculos(matricula),
     FOREIGN KEY (id_resultado) REFERENCES Resultados(id_resultado)
 );
 
+-- Esquema equivalente al de las migraciones 001 a 007 de db/migrations, que quedan
+-- registradas en SchemaMigrations para que 'flask migrar' no vuelva a aplicarlas.
+CREATE INDEX idx_turnos_estado_fecha ON Turnos (estado, fecha);
+CREATE INDEX idx_turnos_matricula ON Turnos (matricula);
+CREATE INDEX idx_turnos_id_resultado ON Turnos (id_resultado);
+CREATE UNIQUE INDEX uq_turnos_fecha_carril ON Turnos (fecha, carril);
+
+CREATE TABLE TokensRevocados (
+    jti BINARY(16) PRIMARY KEY,
+    expira DATETIME NOT NULL,
+    INDEX idx_tokens_revocados_expira (expira)
+);
+
+CREATE TABLE AgendaExcepciones (
+    fecha DATE PRIMARY KEY,
+    hora_inicio TIME NULL,
+    hora_fin TIME NULL,
+    motivo VARCHAR(100) NULL,
+    capacidad INT NULL
+);
+
+CREATE TABLE CuposHorario (
+    fecha DATETIME PRIMARY KEY,
+    reservados INT NOT NULL
+);
+
+CREATE TABLE SchemaMigrations (
+    version VARCHAR(50) PRIMARY KEY,
+    aplicada_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO SchemaMigrations (version) VALUES
+('001'), ('002'), ('003'), ('004'), ('005'), ('006'), ('007');
+
 INSERT INTO Controles (descripcion) VALUES
 ('Frenos'), ('Luces'), ('Neumáticos'), ('Suspensión'),
 ('Dirección'), ('Emisiones'), ('Vidrios'), ('Carrocería');
@@ -0,0 +1,8 @@
+-- Índices para los caminos de acceso de Turnos.
+-- (estado, fecha): disponibilidad por día (estado = 'LIBRE' AND fecha en [desde, hasta))
+--                  y turnos pendientes (estado = 'RESERVADO' ORDER BY fecha).
+-- matricula / id_resultado: búsquedas y joins por vehículo y por resultado. InnoDB reemplaza
+-- el índice implícito de la clave foránea por estos índices con nombre.
+CREATE INDEX idx_turnos_estado_fecha ON Turnos (estado, fecha);
+CREATE INDEX idx_turnos_matricula ON Turnos (matricula);
+CREATE INDEX idx_turnos_id_resultado ON Turnos (id_resultado);
@@ -0,0 +1,3 @@
+-- Índice por fecha para leer todos los turnos de un día, sin importar su estado
+-- (carga del índice de disponibilidad en memoria).
+CREATE INDEX idx_turnos_fecha ON Turnos (fecha);
@@ -0,0 +1,7 @@
+-- Refresh tokens revocados (logout). Solo se guardan los revocados: el jti (UUID) ocupa
+-- 16 bytes como clave primaria y `expira` permite purgar las filas que ya no sirven.
+CREATE TABLE TokensRevocados (
+    jti BINARY(16) PRIMARY KEY,
+    expira DATETIME NOT NULL,
+    INDEX idx_tokens_revocados_expira (expira)
+);
@@ -0,0 +1,22 @@
+-- Un único turno por horario: la agenda tiene un slot por fecha y hora, así que la alta masiva
+-- puede repetirse sin duplicar días (los slots que ya existen se omiten).
+-- Dos reservas en el mismo horario no se pueden resolver automáticamente: si las hay, la
+-- migración se detiene antes de modificar datos con un error de clave duplicada sobre
+-- VerificacionReservasDuplicadas que indica la fecha en conflicto.
+CREATE TEMPORARY TABLE VerificacionReservasDuplicadas (fecha DATETIME PRIMARY KEY);
+INSERT INTO VerificacionReservasDuplicadas (fecha)
+SELECT fecha FROM Turnos WHERE estado <> 'LIBRE';
+DROP TEMPORARY TABLE VerificacionReservasDuplicadas;
+-- Se descartan los duplicados LIBRES que dejaron altas repetidas: se conserva la reserva del
+-- horario si la hay y, si no, el LIBRE de menor id. La tabla derivada (DISTINCT evita que se
+-- fusione) permite leer Turnos en el mismo DELETE.
+DELETE FROM Turnos WHERE id_turno IN (
+    SELECT id_turno FROM (
+        SELECT DISTINCT t.id_turno FROM Turnos t
+        JOIN Turnos o ON o.fecha = t.fecha AND o.id_turno <> t.id_turno
+        WHERE t.estado = 'LIBRE' AND (o.estado <> 'LIBRE' OR o.id_turno < t.id_turno)
+    ) AS duplicados
+);
+-- El índice único reemplaza a idx_turnos_fecha en las lecturas por día.
+CREATE UNIQUE INDEX uq_turnos_fecha ON Turnos (fecha);
+DROP INDEX idx_turnos_fecha ON Turnos;
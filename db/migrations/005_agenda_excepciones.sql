@@ -0,0 +1,10 @@
+-- Excepciones de la agenda virtual (AGENDA_VIRTUAL=1): feriados (sin horario) y días con un
+-- horario distinto del habitual. La disponibilidad se calcula con estas reglas y solo las
+-- reservas se guardan en Turnos; el índice único sobre Turnos.fecha (004) garantiza una
+-- reserva por horario.
+CREATE TABLE AgendaExcepciones (
+    fecha DATE PRIMARY KEY,
+    hora_inicio TIME NULL,
+    hora_fin TIME NULL,
+    motivo VARCHAR(100) NULL
+);
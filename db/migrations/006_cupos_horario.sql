@@ -0,0 +1,16 @@
+-- Varios carriles de inspección por horario en la agenda virtual.
+-- CuposHorario guarda un contador de reservas por horario: reservar es un único UPDATE
+-- condicional (reservados < capacidad) sobre esa fila, y el valor del contador es el carril
+-- asignado. La capacidad sale de las reglas de la agenda (AGENDA_CAPACIDAD o la excepción del
+-- día), no se guarda. Turnos pasa a admitir una reserva por (fecha, carril); las filas
+-- existentes quedan en el carril 1 y los contadores se inicializan con sus reservas.
+ALTER TABLE Turnos ADD COLUMN carril INT NOT NULL DEFAULT 1;
+CREATE UNIQUE INDEX uq_turnos_fecha_carril ON Turnos (fecha, carril);
+DROP INDEX uq_turnos_fecha ON Turnos;
+ALTER TABLE AgendaExcepciones ADD COLUMN capacidad INT NULL;
+CREATE TABLE CuposHorario (
+    fecha DATETIME PRIMARY KEY,
+    reservados INT NOT NULL
+);
+INSERT INTO CuposHorario (fecha, reservados)
+SELECT fecha, COUNT(*) FROM Turnos WHERE estado <> 'LIBRE' GROUP BY fecha;
@@ -0,0 +1,4 @@
+-- Versión de los refresh tokens de cada usuario. El refresh token la lleva en el claim 'ver' y
+-- el refresh la compara con la de la fila: incrementarla invalida todos los refresh tokens
+-- emitidos al usuario (p. ej. tras cambiarle el rol o deshabilitarlo).
+ALTER TABLE Usuarios ADD COLUMN version_token INT NOT NULL DEFAULT 0;
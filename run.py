@@ -5,4 +5,8 @@ app = create_app()
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True)
+    if app.config['SERVIDOR'] == 'produccion':
+        from app.servidor import servir
+        servir(app, port)
+    else:
+        app.run(host='0.0.0.0', port=port, debug=True)
@@ -8,6 +8,7 @@ class TestingConfig(Config):
     TESTING = True
     JWT_SECRET_KEY = 'TEST_SECRET_KEY'
     JWT_EXPIRATION_SECONDS = 60 * 60 * 24 * 7
+    DB_TRAZA_HEADERS = True
 
 @pytest.fixture(scope='session')
 def app():
@@ -54,3 +55,52 @@ def admin_token_data(app):
     """Token de prueba para el rol ADMINISTRADOR."""
     with app.app_context():
         return _generate_test_token(app, "admin_test", 3, "ADMINISTRADOR")
+
+class _CursorVacio:
+    """Cursor que acepta cualquier sentencia y no devuelve filas."""
+    description = ()
+    rowcount = 0
+    lastrowid = None
+
+    def execute(self, query, params=()):
+        pass
+
+    def executemany(self, query, seq_params):
+        pass
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+    def fetchmany(self, size=1):
+        return []
+
+    def close(self):
+        pass
+
+class _ConexionVacia:
+    def cursor(self, **kwargs):
+        return _CursorVacio()
+
+    def is_connected(self):
+        return True
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def db_simulada():
+    """Reemplaza el pool de MySQL por conexiones que aceptan cualquier consulta y no devuelven filas."""
+    from unittest.mock import patch
+    from app.db_connection import ConnectionPool
+    pool = ConnectionPool(_ConexionVacia, size=1, max_overflow=4)
+    with patch('app.db_connection.get_pool', return_value=pool):
+        yield pool
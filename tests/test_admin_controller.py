@@ -25,6 +25,43 @@ def test_crear_usuario_parametros_faltantes(mock_service, client, admin_token_da
 
     assert response.status_code == 400
 
+@patch('app.admin.admin_controller.admin_service')
+def test_obtener_usuarios_paginado(mock_service, client, admin_token_data):
+    """Prueba que el listado de usuarios pagine por id y devuelva el cursor en el header."""
+    mock_service.consultar_usuarios.return_value = [
+        Usuario(id_usuario=4, username='a', rol='CLIENTE'),
+        Usuario(id_usuario=9, username='b', rol='CLIENTE')
+    ]
+
+    response = client.get('/api/admin/usuarios?limite=2', headers=admin_token_data['headers'])
+    cursor = response.headers['X-Siguiente-Cursor']
+
+    assert response.status_code == 200
+    assert [u['id_usuario'] for u in response.get_json()] == [4, 9]
+    mock_service.consultar_usuarios.assert_called_with(2, None)
+
+    client.get(f'/api/admin/usuarios?limite=2&cursor={cursor}', headers=admin_token_data['headers'])
+    mock_service.consultar_usuarios.assert_called_with(2, 9)
+
+    # La respuesta sigue siendo un array (compatibilidad): la última página se reconoce por la falta del header
+    mock_service.consultar_usuarios.return_value = [Usuario(id_usuario=12, username='c', rol='CLIENTE')]
+    response = client.get(f'/api/admin/usuarios?limite=2&cursor={cursor}', headers=admin_token_data['headers'])
+    assert isinstance(response.get_json(), list)
+    assert 'X-Siguiente-Cursor' not in response.headers
+
+@patch('app.admin.admin_controller.admin_service')
+def test_obtener_usuarios_stream(mock_service, client, admin_token_data):
+    """Prueba que el modo stream devuelva el mismo JSON que el listado materializado."""
+    mock_service.iterar_usuarios.return_value = iter([
+        Usuario(id_usuario=1, username='a', rol='CLIENTE'),
+        Usuario(id_usuario=2, username='b', rol='INSPECTOR')
+    ])
+
+    response = client.get('/api/admin/usuarios?stream=1', headers=admin_token_data['headers'])
+
+    assert response.is_streamed
+    assert response.get_data(as_text=True) == '[{"id_usuario":1,"rol":"CLIENTE","username":"a"},{"id_usuario":2,"rol":"INSPECTOR","username":"b"}]\n'
+
 @patch('app.admin.admin_controller.admin_service')
 def test_crear_turnos_exito(mock_service, client, admin_token_data):
     """Prueba la creación de turnos de un día con rol de admin (éxito)."""
@@ -34,6 +71,22 @@ def test_crear_turnos_exito(mock_service, client, admin_token_data):
 
     assert response.status_code == 201
 
+@patch('app.admin.admin_controller.admin_service')
+def test_crear_turnos_rango(mock_service, client, admin_token_data):
+    """Prueba la apertura de la agenda de un rango de fechas."""
+    mock_service.crear_turnos_rango.return_value = ({'creados': 1170, 'existentes': 18}, None)
+
+    response = client.post('/api/admin/turnos/bulk-create', headers=admin_token_data['headers'],
+                           query_string={'desde': '2026-01-01', 'hasta': '2026-03-31', 'dias_semana': '1,2,3,4,5'})
+
+    assert response.status_code == 201
+    assert response.get_json()['creados'] == 1170
+    mock_service.crear_turnos_rango.assert_called_once_with('2026-01-01', '2026-03-31', '1,2,3,4,5', None, None, None)
+
+    response = client.post('/api/admin/turnos/bulk-create', headers=admin_token_data['headers'],
+                           query_string={'desde': '2026-01-01'})
+    assert response.status_code == 400
+
 @patch('app.admin.admin_controller.admin_service')
 def test_crear_turnos_sin_autorizacion(mock_service, client, client_token_data):
     """Prueba que un usuario no-admin no pueda crear turnos."""
@@ -47,4 +100,21 @@ def test_crear_turnos_fecha_faltante(mock_service, client, admin_token_data):
     response = client.post('/api/admin/turnos/bulk-create', headers=admin_token_data['headers'])
 
     assert response.status_code == 400
-    assert 'Faltan campos requeridos' in response.get_json()['message']
\ No newline at end of file
+    assert 'Faltan campos requeridos' in response.get_json()['message']
+
+@patch('app.admin.admin_controller.admin_service')
+def test_excepciones_agenda(mock_service, client, admin_token_data):
+    """Prueba el alta y la baja de una excepción de la agenda virtual."""
+    from app.models import ExcepcionAgenda
+    from datetime import date
+    mock_service.guardar_excepcion_agenda.return_value = (ExcepcionAgenda(fecha=date(2025, 12, 25), motivo='Navidad'), None)
+    mock_service.eliminar_excepcion_agenda.return_value = (False, None)
+
+    response = client.post('/api/admin/agenda/excepciones', headers=admin_token_data['headers'],
+                           json={'fecha': '2025-12-25', 'motivo': 'Navidad'})
+    assert response.status_code == 201
+    assert response.get_json()['excepcion']['hora_inicio'] is None
+    mock_service.guardar_excepcion_agenda.assert_called_once_with('2025-12-25', None, None, 'Navidad', None)
+
+    response = client.delete('/api/admin/agenda/excepciones?fecha=2025-12-25', headers=admin_token_data['headers'])
+    assert response.status_code == 404
@@ -1,4 +1,5 @@
 from unittest.mock import MagicMock
+from datetime import datetime
 from app.admin.admin_service import AdminService
 from app.models import Usuario
 
@@ -35,7 +36,7 @@ def test_crear_usuario_ya_existente():
     assert error == "El usuario 'user_existente' ya existe."
     mock_usuario_dao.crear.assert_not_called()
 
-def test_crear_turnos_exito():
+def test_crear_turnos_exito(app):
     """Prueba la creación automática de turnos para un día."""
     mock_usuario_dao = MagicMock()
     mock_turno_dao = MagicMock()
@@ -52,7 +53,7 @@ def test_crear_turnos_exito():
     # Verificar que se generaron 18 turnos (de 9:00 a 17:30)
     assert len(mock_turno_dao.crear_varios.call_args[0][0]) == 18
 
-def test_crear_turnos_fecha_invalida():
+def test_crear_turnos_fecha_invalida(app):
     """Prueba que la creación de turnos falle si la fecha es inválida."""
     mock_usuario_dao = MagicMock()
     mock_turno_dao = MagicMock()
@@ -61,4 +62,70 @@ def test_crear_turnos_fecha_invalida():
     turnos_creados, error = service.crear_turnos('25-12-2025') # Formato incorrecto
 
     assert turnos_creados is None
-    mock_turno_dao.crear_varios.assert_not_called()
\ No newline at end of file
+    mock_turno_dao.crear_varios.assert_not_called()
+
+def test_crear_turnos_usa_el_horario_de_la_agenda(app, monkeypatch):
+    """Prueba que el alta de un día tome horario e intervalo de AGENDA_*."""
+    mock_turno_dao = MagicMock()
+    mock_turno_dao.crear_varios.return_value = 4
+    monkeypatch.setitem(app.config, 'AGENDA_HORA_INICIO', '08:00')
+    monkeypatch.setitem(app.config, 'AGENDA_HORA_FIN', '10:00')
+    monkeypatch.setitem(app.config, 'AGENDA_INTERVALO_MINUTOS', 45)
+
+    service = AdminService(MagicMock(), mock_turno_dao)
+    service.crear_turnos('2025-12-25')
+
+    turnos = mock_turno_dao.crear_varios.call_args[0][0]
+    assert [t.fecha for t in turnos] == [datetime(2025, 12, 25, 8, 0), datetime(2025, 12, 25, 8, 45),
+                                         datetime(2025, 12, 25, 9, 30)]
+
+def test_crear_turnos_rango_dias_semana(app):
+    """Prueba que el alta por rango respete los días de la semana y el horario, e informe los turnos existentes."""
+    mock_turno_dao = MagicMock()
+    mock_turno_dao.crear_varios.return_value = 10
+
+    service = AdminService(MagicMock(), mock_turno_dao)
+    # 2025-12-01 es lunes: del rango lunes..domingo solo quedan lunes, miércoles y viernes.
+    resumen, error = service.crear_turnos_rango('2025-12-01', '2025-12-07', '1,3,5', '09:00', '11:00', '30')
+
+    assert error is None
+    turnos = mock_turno_dao.crear_varios.call_args[0][0]
+    assert len(turnos) == 12
+    assert {t.fecha.day for t in turnos} == {1, 3, 5}
+    assert turnos[0].fecha == datetime(2025, 12, 1, 9, 0)
+    assert turnos[-1].fecha == datetime(2025, 12, 5, 10, 30)
+    assert resumen == {'creados': 10, 'existentes': 2}
+
+def test_crear_turnos_rango_invalido(app):
+    """Prueba que el alta por rango rechace rangos excesivos y parámetros de agenda inválidos."""
+    mock_turno_dao = MagicMock()
+    service = AdminService(MagicMock(), mock_turno_dao)
+
+    assert service.crear_turnos_rango('2025-01-01', '2026-12-31')[1] == \
+        f"El rango no puede superar los {app.config['TURNOS_ALTA_MAX_DIAS']} días."
+    assert service.crear_turnos_rango('2025-01-01', '2025-01-31', dias_semana_str='1,8')[0] is None
+    assert service.crear_turnos_rango('2025-01-01', '2025-01-31', hora_inicio_str='18:00', hora_fin_str='09:00')[0] is None
+    mock_turno_dao.crear_varios.assert_not_called()
+
+def test_guardar_excepcion_agenda(app):
+    """Prueba que se guarden feriados y horarios especiales, y se rechacen horarios incompletos."""
+    agenda_dao = MagicMock()
+    agenda_dao.guardar_excepcion.return_value = True
+    service = AdminService(MagicMock(), MagicMock(), agenda_dao=agenda_dao)
+
+    feriado, error = service.guardar_excepcion_agenda('2025-12-25', motivo='Navidad')
+    assert error is None and feriado.cerrado
+
+    especial, error = service.guardar_excepcion_agenda('2025-12-24', '09:00', '13:00')
+    assert error is None and especial.to_dict()['hora_fin'] == '13:00'
+
+    assert service.guardar_excepcion_agenda('2025-12-24', '09:00')[0] is None
+    assert service.guardar_excepcion_agenda('2025-12-24', '13:00', '09:00')[0] is None
+    assert agenda_dao.guardar_excepcion.call_count == 2
+
+def test_excepciones_agenda_deshabilitada(app):
+    """Prueba que sin agenda virtual las excepciones respondan con error."""
+    service = AdminService(MagicMock(), MagicMock())
+
+    assert service.guardar_excepcion_agenda('2025-12-25') == (None, "La agenda virtual no está habilitada.")
+    assert service.eliminar_excepcion_agenda('2025-12-25') == (None, "La agenda virtual no está habilitada.")
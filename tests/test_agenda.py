@@ -0,0 +1,63 @@
+from unittest.mock import MagicMock
+from datetime import date, datetime, time
+
+from app.models import ExcepcionAgenda
+from app.turnos.agenda import Agenda
+
+LUNES = date(2025, 11, 17)
+
+def _agenda(excepciones=(), reservados=None, capacidad=1):
+    agenda_dao = MagicMock()
+    agenda_dao.obtener_excepciones.return_value = list(excepciones)
+    turno_dao = MagicMock()
+    turno_dao.obtener_reservados_por_horario.return_value = reservados or {}
+    agenda = Agenda(agenda_dao, turno_dao, time(9, 0), time(18, 0), 30, dias_semana=range(1, 6), capacidad=capacidad)
+    return agenda, agenda_dao, turno_dao
+
+def test_disponibles_descuenta_reservas_con_dos_consultas():
+    """Prueba que los slots libres salgan de las reglas menos los horarios reservados."""
+    agenda, agenda_dao, turno_dao = _agenda(reservados={datetime(2025, 11, 17, 9, 0): 1})
+
+    disponibles = agenda.disponibles(LUNES, date(2025, 11, 23))
+
+    assert len(disponibles) == 7
+    assert len(disponibles[LUNES]) == 17
+    assert disponibles[LUNES][0].fecha == datetime(2025, 11, 17, 9, 30)
+    assert disponibles[LUNES][0].to_dict()['id_turno'] is None
+    # Sábado y domingo no se atiende
+    assert disponibles[date(2025, 11, 22)] == [] and disponibles[date(2025, 11, 23)] == []
+    agenda_dao.obtener_excepciones.assert_called_once_with(LUNES, date(2025, 11, 23))
+    turno_dao.obtener_reservados_por_horario.assert_called_once_with(datetime(2025, 11, 17), datetime(2025, 11, 24))
+
+def test_excepciones_cierran_o_cambian_el_horario():
+    """Prueba que un feriado cierre el día y un horario especial reemplace al habitual, incluso en fin de semana."""
+    agenda, _, _ = _agenda(excepciones=[
+        ExcepcionAgenda(fecha=LUNES, motivo='Feriado'),
+        ExcepcionAgenda(fecha=date(2025, 11, 22), hora_inicio=time(10, 0), hora_fin=time(12, 0)),
+    ])
+
+    disponibles = agenda.disponibles(LUNES, date(2025, 11, 22))
+
+    assert disponibles[LUNES] == []
+    assert [t.fecha.hour for t in disponibles[date(2025, 11, 22)]] == [10, 10, 11, 11]
+
+def test_capacidad_por_carriles():
+    """Prueba que cada horario informe los lugares que le quedan según su capacidad y sus reservas."""
+    agenda, _, _ = _agenda(capacidad=4, reservados={datetime(2025, 11, 17, 9, 0): 4, datetime(2025, 11, 17, 9, 30): 1},
+                           excepciones=[ExcepcionAgenda(fecha=date(2025, 11, 18), hora_inicio=time(9, 0),
+                                                        hora_fin=time(10, 0), capacidad=2)])
+
+    disponibles = agenda.disponibles(LUNES, date(2025, 11, 18))
+
+    assert [(h.fecha.minute, h.cupos) for h in disponibles[LUNES][:2]] == [(30, 3), (0, 4)]
+    assert [h.cupos for h in disponibles[date(2025, 11, 18)]] == [2, 2]
+
+def test_proximo_libre_y_capacidad_de():
+    """Prueba la búsqueda del próximo slot libre y la validación de horarios de la agenda."""
+    agenda, _, _ = _agenda()
+
+    # Viernes 17:40: el último slot del día (17:30) ya pasó, el próximo es el lunes siguiente.
+    assert agenda.proximo_libre(datetime(2025, 11, 21, 17, 40), 7).fecha == datetime(2025, 11, 24, 9, 0)
+    assert agenda.capacidad_de(datetime(2025, 11, 17, 10, 30)) == 1
+    assert agenda.capacidad_de(datetime(2025, 11, 17, 10, 15)) == 0
+    assert agenda.capacidad_de(datetime(2025, 11, 22, 10, 0)) == 0
@@ -0,0 +1,361 @@
+import asyncio
+import json
+from datetime import date
+
+import pytest
+
+from app.aio import crear_app_asgi, PoolAsincrono
+from app.aio.sqlite import ConexionSQLite, conectar_sqlite, crear_esquema, traducir_sql
+from app.config import Config
+from app.db_connection import PoolTimeoutError
+from app.models import Usuario
+from app.trazas import presupuesto_consultas
+from app.utils.paginacion import HEADER_SIGUIENTE_CURSOR
+
+class ConfigAsync(Config):
+    TESTING = True
+    JWT_SECRET_KEY = 'TEST_SECRET_KEY'
+    DB_POOL_SIZE = 4
+    DB_POOL_MAX_OVERFLOW = 4
+
+DETALLES_CONTROL = [{'id_control': i, 'calificacion': 10} for i in range(1, 9)]
+
+@pytest.fixture
+def asgi(tmp_path):
+    """Aplicación ASGI sobre un archivo SQLite vacío."""
+    ruta = str(tmp_path / 'turnos.db')
+    crear_esquema(ruta)
+    return crear_app_asgi(ConfigAsync, conectar=conectar_sqlite(ruta))
+
+@pytest.fixture
+def tokens(asgi):
+    with asgi.app.app_context():
+        return {
+            rol: Usuario(id_usuario=i, username=f'{rol.lower()}_test', rol=rol).generate_auth_token()
+            for i, rol in enumerate(('CLIENTE', 'INSPECTOR', 'ADMINISTRADOR'), start=1)
+        }
+
+async def pedir(asgi, metodo, ruta, cuerpo=None, token=None):
+    """Emite un pedido HTTP a la app ASGI y devuelve (status, cuerpo JSON, headers)."""
+    path, _, query = ruta.partition('?')
+    headers = [(b'content-type', b'application/json')]
+    if token:
+        headers.append((b'authorization', f'Bearer {token}'.encode()))
+    datos = json.dumps(cuerpo).encode() if cuerpo is not None else b''
+    scope = {'type': 'http', 'method': metodo, 'path': path, 'query_string': query.encode(), 'headers': headers}
+    enviados = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': datos, 'more_body': False}
+
+    async def send(mensaje):
+        enviados.append(mensaje)
+
+    await asgi(scope, receive, send)
+    return enviados[0]['status'], json.loads(enviados[1]['body']), dict(enviados[0]['headers'])
+
+async def _crear_agenda(asgi, tokens, fecha='2030-05-10'):
+    status, _, _ = await pedir(asgi, 'POST', f'/api/admin/turnos/bulk-create?fecha={fecha}', token=tokens['ADMINISTRADOR'])
+    assert status == 201
+    status, cuerpo, _ = await pedir(asgi, 'GET', f'/api/turnos/disponibilidad?fecha={fecha}', token=tokens['CLIENTE'])
+    assert status == 200
+    return cuerpo['disponibles']
+
+def test_traducir_sql_para_sqlite():
+    """Prueba la traducción de placeholders y de las construcciones propias de MySQL."""
+    assert traducir_sql("SELECT * FROM Turnos WHERE id_turno = %s FOR UPDATE").strip() == \
+        "SELECT * FROM Turnos WHERE id_turno = ?"
+    assert traducir_sql("INSERT IGNORE INTO T (a) VALUES (%s)") == "INSERT OR IGNORE INTO T (a) VALUES (?)"
+    assert traducir_sql("INSERT INTO V (m) VALUES (%s)\n ON DUPLICATE KEY UPDATE m = m\n") == \
+        "INSERT INTO V (m) VALUES (?)\n ON CONFLICT DO NOTHING"
+
+def test_disponibilidad_y_reserva(asgi, tokens):
+    """Prueba el alta de la agenda, la consulta de disponibilidad y una reserva por la app ASGI."""
+    async def escenario():
+        disponibles = await _crear_agenda(asgi, tokens)
+        assert len(disponibles) == 18
+        assert disponibles[0]['fecha'] == '2030-05-10T09:00:00'
+
+        reserva = {'matricula': 'AB123CD', 'id_marca': 1, 'anio': 2020, 'id_turno': disponibles[0]['id_turno']}
+        status, cuerpo, _ = await pedir(asgi, 'POST', '/api/turnos/reservar', reserva, tokens['CLIENTE'])
+        assert status == 201
+        assert cuerpo['turno']['estado'] == 'RESERVADO'
+
+        # La reserva invalida la cache de disponibilidad del día.
+        _, cuerpo, _ = await pedir(asgi, 'GET', '/api/turnos/disponibilidad?fecha=2030-05-10', token=tokens['CLIENTE'])
+        assert len(cuerpo['disponibles']) == 17
+
+    asyncio.run(escenario())
+
+def test_disponibilidad_una_sola_carga_por_fecha(asgi, tokens, monkeypatch):
+    """Prueba que varias consultas simultáneas de una fecha sin cachear hagan una sola lectura."""
+    dao = asgi.turno_service.turno_dao
+    original = dao.obtener_disponibles_por_fecha
+    lecturas = []
+
+    async def obtener_lento(fecha):
+        lecturas.append(fecha)
+        await asyncio.sleep(0.05)
+        return await original(fecha)
+
+    async def escenario():
+        await _crear_agenda(asgi, tokens)
+        asgi.turno_service.cache_disponibilidad.limpiar()
+        monkeypatch.setattr(dao, 'obtener_disponibles_por_fecha', obtener_lento)
+        respuestas = await asyncio.gather(*(
+            pedir(asgi, 'GET', '/api/turnos/disponibilidad?fecha=2030-05-10', token=tokens['CLIENTE'])
+            for _ in range(5)
+        ))
+        assert {len(cuerpo['disponibles']) for _, cuerpo, _ in respuestas} == {18}
+
+    asyncio.run(escenario())
+    assert len(lecturas) == 1
+
+def test_disponibilidad_invalidada_durante_la_carga_no_se_cachea(asgi):
+    """Prueba que si una escritura invalida la fecha mientras se carga, el resultado no quede en cache."""
+    servicio = asgi.turno_service
+    fecha = date(2030, 5, 10)
+
+    async def obtener_y_escribir(_):
+        await asyncio.sleep(0)
+        servicio._invalidar_fechas({fecha})
+        return []
+
+    servicio.turno_dao.obtener_disponibles_por_fecha = obtener_y_escribir
+    with asgi.app.app_context():
+        assert asyncio.run(servicio.consultar_disponibilidad('2030-05-10')) == ([], None)
+    assert servicio.cache_disponibilidad.obtener(fecha) is None
+    assert not servicio._cargas_disponibilidad
+
+def test_reservas_concurrentes_un_solo_ganador(asgi, tokens):
+    """Prueba que de varias reservas simultáneas del mismo turno solo una tenga éxito."""
+    async def escenario():
+        disponibles = await _crear_agenda(asgi, tokens)
+        id_turno = disponibles[0]['id_turno']
+        respuestas = await asyncio.gather(*(
+            pedir(asgi, 'POST', '/api/turnos/reservar',
+                  {'matricula': f'CAR{i:04d}', 'id_marca': 1, 'anio': 2020, 'id_turno': id_turno}, tokens['CLIENTE'])
+            for i in range(10)
+        ))
+        return sorted(status for status, _, _ in respuestas)
+
+    assert asyncio.run(escenario()) == [201] + [409] * 9
+
+def test_alta_por_rango_idempotente(asgi, tokens):
+    """Prueba que repetir el alta de un rango no duplique los turnos existentes."""
+    async def escenario():
+        await _crear_agenda(asgi, tokens, fecha='2030-05-06')
+        ruta = '/api/admin/turnos/bulk-create?desde=2030-05-06&hasta=2030-05-12&dias_semana=1,2,3,4,5'
+        primera = await pedir(asgi, 'POST', ruta, token=tokens['ADMINISTRADOR'])
+        segunda = await pedir(asgi, 'POST', ruta, token=tokens['ADMINISTRADOR'])
+        return primera, segunda
+
+    (status, primera, _), (_, segunda, _) = asyncio.run(escenario())
+    # 2030-05-06 es lunes y ya tenía su agenda: se crean solo martes a viernes.
+    assert status == 201
+    assert (primera['creados'], primera['existentes']) == (72, 18)
+    assert (segunda['creados'], segunda['existentes']) == (0, 90)
+
+def test_disponibilidad_por_rango(asgi, tokens):
+    """Prueba la disponibilidad de varios días, agrupada por día y como resumen, igual que en Flask."""
+    async def escenario():
+        await _crear_agenda(asgi, tokens, fecha='2030-05-10')
+        ruta = '/api/turnos/disponibilidad/rango?desde=2030-05-09&hasta=2030-05-11'
+        return (
+            await pedir(asgi, 'GET', ruta, token=tokens['CLIENTE']),
+            await pedir(asgi, 'GET', ruta + '&resumen=1', token=tokens['CLIENTE']),
+            await pedir(asgi, 'GET', '/api/turnos/disponibilidad/rango?desde=2030-05-09', token=tokens['CLIENTE']),
+        )
+
+    (status, cuerpo, _), (_, resumen, _), (status_sin_hasta, _, _) = asyncio.run(escenario())
+    assert status == 200
+    assert {dia: len(turnos) for dia, turnos in cuerpo['disponibles'].items()} == \
+        {'2030-05-09': 0, '2030-05-10': 18, '2030-05-11': 0}
+    assert resumen['libres_por_dia'] == {'2030-05-09': 0, '2030-05-10': 18, '2030-05-11': 0}
+    assert status_sin_hasta == 400
+
+def test_listado_de_usuarios_paginado(asgi, tokens):
+    """Prueba el listado de usuarios por cursor, con el cursor siguiente en el header."""
+    async def escenario():
+        for nombre in ('ana', 'beto', 'carla'):
+            usuario = {'username': nombre, 'password': 'pw', 'rol': 'CLIENTE'}
+            status, _, _ = await pedir(asgi, 'POST', '/api/admin/usuarios', usuario, tokens['ADMINISTRADOR'])
+            assert status == 201
+        primera = await pedir(asgi, 'GET', '/api/admin/usuarios?limite=2', token=tokens['ADMINISTRADOR'])
+        cursor = primera[2][HEADER_SIGUIENTE_CURSOR.lower().encode()].decode()
+        segunda = await pedir(asgi, 'GET', f'/api/admin/usuarios?limite=2&cursor={cursor}', token=tokens['ADMINISTRADOR'])
+        return primera, segunda
+
+    (status, primera, _), (_, segunda, headers) = asyncio.run(escenario())
+    assert status == 200
+    assert [u['username'] for u in primera] == ['ana', 'beto']
+    assert [u['username'] for u in segunda] == ['carla']
+    assert HEADER_SIGUIENTE_CURSOR.lower().encode() not in headers
+
+def test_finalizar_y_consultar_turno(asgi, tokens):
+    """Prueba que consultar un turno finalizado devuelva el resultado con sus detalles."""
+    async def escenario():
+        disponibles = await _crear_agenda(asgi, tokens)
+        id_turno = disponibles[0]['id_turno']
+        await pedir(asgi, 'POST', '/api/turnos/reservar',
+                    {'matricula': 'AB123CD', 'id_marca': 1, 'anio': 2020, 'id_turno': id_turno}, tokens['CLIENTE'])
+
+        status, cuerpo, headers = await pedir(asgi, 'GET', '/api/turnos/pendientes?limite=1', token=tokens['INSPECTOR'])
+        assert status == 200
+        assert [t['id_turno'] for t in cuerpo['turnos_pendientes']] == [id_turno]
+        assert b'x-siguiente-cursor' in headers
+
+        status, cuerpo, _ = await pedir(asgi, 'POST', f'/api/turnos/{id_turno}/finalizar',
+                                        {'detalles_control': DETALLES_CONTROL}, tokens['INSPECTOR'])
+        assert status == 200
+        assert cuerpo['message'] == 'Inspección finalizada. Resultado: SEGURO'
+
+        status, cuerpo, _ = await pedir(asgi, 'GET', f'/api/turnos/{id_turno}/consultar', token=tokens['CLIENTE'])
+        assert status == 200
+        resultado = cuerpo['turno']['resultado_inspeccion']
+        assert resultado['puntaje_total'] == 80
+        assert len(resultado['detalles_control']) == 8
+
+    asyncio.run(escenario())
+
+def test_consultar_turno_corre_las_consultas_en_paralelo(asgi, tokens, monkeypatch):
+    """Prueba que el turno y su resultado se lean a la vez, en dos conexiones."""
+    original = ConexionSQLite.ejecutar
+    activas = [0, 0]  # en curso, máximo
+
+    async def ejecutar_lento(self, query, params):
+        activas[0] += 1
+        activas[1] = max(activas[1], activas[0])
+        try:
+            await asyncio.sleep(0.05)
+            return await original(self, query, params)
+        finally:
+            activas[0] -= 1
+
+    async def escenario():
+        disponibles = await _crear_agenda(asgi, tokens)
+        monkeypatch.setattr(ConexionSQLite, 'ejecutar', ejecutar_lento)
+        with presupuesto_consultas(2):
+            status, cuerpo, _ = await pedir(asgi, 'GET', f"/api/turnos/{disponibles[0]['id_turno']}/consultar",
+                                            token=tokens['CLIENTE'])
+        assert status == 200
+        assert cuerpo['turno']['resultado_inspeccion'] is None
+
+    asyncio.run(escenario())
+    assert activas[1] == 2
+
+def test_autorizacion_igual_que_flask(asgi, tokens):
+    """Prueba las respuestas de token faltante, rol insuficiente y ruta inexistente."""
+    async def escenario():
+        return (
+            await pedir(asgi, 'GET', '/api/turnos/pendientes'),
+            await pedir(asgi, 'GET', '/api/turnos/pendientes', token=tokens['CLIENTE']),
+            await pedir(asgi, 'GET', '/api/turnos/no-existe', token=tokens['CLIENTE']),
+        )
+
+    sin_token, rol_invalido, no_encontrado = asyncio.run(escenario())
+    assert sin_token[0] == 401
+    assert rol_invalido[:2] == (403, {'message': 'Permisos insuficientes. Rol requerido: INSPECTOR, ADMINISTRADOR'})
+    assert no_encontrado[0] == 404
+
+def test_error_al_validar_token_responde_500(asgi, tokens, monkeypatch):
+    """Prueba que un error inesperado al validar el token responda un JSON 500, como token_required."""
+    def fallar(token):
+        raise RuntimeError("cache no disponible")
+    monkeypatch.setattr('app.aio.asgi._claims_verificados', fallar)
+
+    status, cuerpo, _ = asyncio.run(pedir(asgi, 'GET', '/api/turnos/pendientes', token=tokens['INSPECTOR']))
+
+    assert (status, cuerpo) == (500, {'message': 'Error de servidor al validar token: cache no disponible'})
+
+def test_login_y_refresh(asgi, tokens):
+    """Prueba el login con bcrypt fuera del event loop y el canje del refresh token."""
+    async def escenario():
+        status, _, _ = await pedir(asgi, 'POST', '/api/admin/usuarios',
+                                   {'username': 'nuevo', 'password': 'secreta', 'rol': 'CLIENTE'}, tokens['ADMINISTRADOR'])
+        assert status == 201
+
+        status, cuerpo, _ = await pedir(asgi, 'POST', '/api/auth/login', {'username': 'nuevo', 'password': 'mala'})
+        assert status == 401
+
+        status, cuerpo, _ = await pedir(asgi, 'POST', '/api/auth/login', {'username': 'nuevo', 'password': 'secreta'})
+        assert status == 200
+        assert cuerpo['rol'] == 'CLIENTE'
+
+        refresh = {'refresh_token': cuerpo['refresh_token']}
+        assert (await pedir(asgi, 'POST', '/api/auth/refresh', refresh))[0] == 200
+        assert (await pedir(asgi, 'POST', '/api/auth/logout', refresh))[0] == 200
+        status, cuerpo, _ = await pedir(asgi, 'POST', '/api/auth/refresh', refresh)
+        assert (status, cuerpo['message']) == (401, 'Refresh token revocado. Inicie sesión nuevamente.')
+
+    asyncio.run(escenario())
+
+def test_ejecutor_hash_con_el_tope_de_la_app_wsgi(asgi):
+    """Prueba que los hashes admitidos se acoten como en create_app."""
+    ejecutor = asgi.auth_service.ejecutor_hash
+    assert ejecutor.max_admitidos == min(ConfigAsync.WEB_THREADS - 1, ejecutor.max_workers + ejecutor.max_cola)
+
+def test_no_arranca_con_agenda_virtual(tmp_path):
+    """Prueba que la app ASGI se niegue a arrancar con la agenda virtual, que no soporta."""
+    class ConfigAgendaVirtual(ConfigAsync):
+        AGENDA_VIRTUAL = True
+
+    with pytest.raises(RuntimeError, match='AGENDA_VIRTUAL'):
+        crear_app_asgi(ConfigAgendaVirtual, conectar=conectar_sqlite(str(tmp_path / 'turnos.db')))
+
+def test_pool_asincrono_timeout():
+    """Prueba que esperar una conexión ceda el loop y falle con PoolTimeoutError al vencer el plazo."""
+    class Conexion:
+        async def cerrar(self):
+            pass
+
+    async def conectar():
+        return Conexion()
+
+    async def escenario():
+        pool = PoolAsincrono(conectar, size=1, max_overflow=0, timeout=0.05)
+        conexion = await pool.adquirir()
+        with pytest.raises(PoolTimeoutError):
+            await pool.adquirir()
+
+        # Al liberarla, quien espera la recibe.
+        espera = asyncio.create_task(pool.adquirir())
+        await asyncio.sleep(0)
+        await pool.liberar(conexion)
+        assert await espera is conexion
+        return pool.stats()
+
+    stats = asyncio.run(escenario())
+    assert stats['timeouts'] == 1
+    assert stats['created'] == 1
+
+def test_pool_asincrono_reemplaza_conexion_ociosa_caida():
+    """Prueba que una conexión ociosa más de ping_interval se verifique y, si no responde, se reemplace."""
+    class Conexion:
+        viva = True
+        cerrada = False
+
+        async def ping(self):
+            if not self.viva:
+                raise ConnectionError("MySQL server has gone away")
+
+        async def cerrar(self):
+            self.cerrada = True
+
+    async def conectar():
+        return Conexion()
+
+    async def escenario():
+        pool = PoolAsincrono(conectar, size=1, max_overflow=0, ping_interval=0)
+        primera = await pool.adquirir()
+        await pool.liberar(primera)
+        assert await pool.adquirir() is primera
+        await pool.liberar(primera)
+
+        primera.viva = False
+        segunda = await pool.adquirir()
+        assert segunda is not primera and primera.cerrada
+        return pool.stats()
+
+    stats = asyncio.run(escenario())
+    assert (stats['created'], stats['discarded'], stats['open']) == (2, 1, 1)
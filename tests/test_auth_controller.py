@@ -1,4 +1,7 @@
 from unittest.mock import patch
+from app.auth.ejecutor_hash import ColaHashLlenaError
+import jwt
+from app.auth.auth_required import EXTENSION_CACHE_TOKENS
 
 @patch('app.auth.auth_controller.auth_service')
 def test_login_exitoso(mock_service, client):
@@ -47,4 +50,104 @@ def test_protected_route_sin_permiso(mock_service, client):
 def test_protected_route_exito(mock_service, client, client_token_data):
     """Prueba el acceso a una ruta protegida con token válido."""
     response = client.get('/api/auth/test-protected', headers=client_token_data['headers'])
-    assert response.status_code == 200
\ No newline at end of file
+    assert response.status_code == 200
+@patch('app.auth.auth_controller.auth_service')
+def test_login_ejecutor_saturado(mock_service, client):
+    """Prueba que el login responda 503 con Retry-After si el ejecutor de bcrypt está lleno."""
+    mock_service.login.side_effect = ColaHashLlenaError("lleno")
+
+    response = client.post('/api/auth/login', json={
+        'username': 'cliente_test',
+        'password': 'test'
+    })
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert 'token' not in response.get_json()
+
+@patch('app.auth.auth_controller.auth_service')
+def test_hash_creator_usa_el_servicio(mock_service, client):
+    """Prueba que el hash de prueba se genere a través del servicio (ejecutor acotado)."""
+    mock_service.hashear_password.return_value = '$2b$12$hash'
+
+    response = client.post('/api/auth/hash-creator', json={'password': 'x'})
+
+    assert response.status_code == 200
+    assert response.get_json()['hashed_password'] == '$2b$12$hash'
+    mock_service.hashear_password.assert_called_once_with('x')
+
+@patch('app.auth.auth_controller.auth_service')
+def test_login_devuelve_refresh_token(mock_service, client):
+    """Prueba que el login incluya el refresh token cuando el servicio lo emite."""
+    mock_service.login.return_value = {'token': 'TOKEN_TEST', 'rol': 'CLIENTE', 'refresh_token': 'REFRESH_TEST'}
+
+    response = client.post('/api/auth/login', json={'username': 'cliente_test', 'password': 'test'})
+
+    assert response.status_code == 200
+    assert response.get_json()['refresh_token'] == 'REFRESH_TEST'
+
+@patch('app.auth.auth_controller.auth_service')
+def test_refresh_ok(mock_service, client):
+    """Prueba el canje de un refresh token por un token de acceso."""
+    mock_service.refrescar.return_value = ({'token': 'NUEVO', 'rol': 'CLIENTE'}, None)
+
+    response = client.post('/api/auth/refresh', json={'refresh_token': 'REFRESH_TEST'})
+
+    assert response.status_code == 200
+    assert response.get_json()['token'] == 'NUEVO'
+    mock_service.refrescar.assert_called_once_with('REFRESH_TEST')
+
+@patch('app.auth.auth_controller.auth_service')
+def test_refresh_invalido(mock_service, client):
+    """Prueba que un refresh token inválido o revocado responda 401."""
+    mock_service.refrescar.return_value = (None, "Refresh token revocado. Inicie sesión nuevamente.")
+
+    response = client.post('/api/auth/refresh', json={'refresh_token': 'REVOCADO'})
+
+    assert response.status_code == 401
+    assert 'token' not in response.get_json()
+
+@patch('app.auth.auth_controller.auth_service')
+def test_logout_revoca_refresh_token(mock_service, client):
+    """Prueba que el logout revoque el refresh token."""
+    mock_service.revocar.return_value = (True, None)
+
+    response = client.post('/api/auth/logout', json={'refresh_token': 'REFRESH_TEST'})
+
+    assert response.status_code == 200
+    mock_service.revocar.assert_called_once_with('REFRESH_TEST')
+
+def test_refresh_token_no_sirve_como_token_de_acceso(app, client):
+    """Prueba que una ruta protegida rechace un refresh token."""
+    from app.models import Usuario
+    refresh_token = Usuario(id_usuario=1, username='cliente_test', rol='CLIENTE').generate_refresh_token()
+
+    response = client.get('/api/auth/test-protected', headers={'Authorization': f'Bearer {refresh_token}'})
+
+    assert response.status_code == 401
+
+def test_token_verificado_se_cachea(app, client, client_token_data):
+    """Prueba que un token ya verificado se resuelva desde la cache en el pedido siguiente."""
+    cache = app.extensions[EXTENSION_CACHE_TOKENS]
+    antes = cache.estadisticas()
+
+    client.get('/api/auth/test-protected', headers=client_token_data['headers'])
+    response = client.get('/api/auth/test-protected', headers=client_token_data['headers'])
+
+    assert response.status_code == 200
+    assert cache.estadisticas()['aciertos'] >= antes['aciertos'] + 1
+
+def test_token_cacheado_no_sobrevive_a_su_exp(app, client):
+    """Prueba que una entrada de la cache no se use pasado el 'exp' del token."""
+    from app.models import Usuario
+    cache = app.extensions[EXTENSION_CACHE_TOKENS]
+    token = Usuario(id_usuario=3, username='exp_test', rol='CLIENTE').generate_auth_token()
+    headers = {'Authorization': f'Bearer {token}'}
+    exp = jwt.decode(token, options={'verify_signature': False})['exp']
+
+    assert client.get('/api/auth/test-protected', headers=headers).status_code == 200
+    invalidaciones = cache.estadisticas()['invalidaciones']
+
+    with patch('app.auth.auth_required.time.time', return_value=exp + 1):
+        client.get('/api/auth/test-protected', headers=headers)
+
+    assert cache.estadisticas()['invalidaciones'] == invalidaciones + 1
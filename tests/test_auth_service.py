@@ -1,5 +1,11 @@
+import threading
+import time
+import jwt
+import pytest
 from unittest.mock import MagicMock
 from app.auth.auth_service import AuthService
+from app.auth.ejecutor_hash import EjecutorHash, ColaHashLlenaError
+from app.models import Usuario
 
 def test_login_ok():
     """Prueba el login exitoso de un usuario."""
@@ -26,4 +32,119 @@ def test_login_usuario_inexistente():
     service = AuthService(usuario_dao)
     resultado = service.login('nonexistentuser', 'anypassword')
 
-    assert resultado is None
\ No newline at end of file
+    assert resultado is None
+def test_login_verifica_password_en_el_ejecutor():
+    """Prueba que la verificación de bcrypt se delegue al ejecutor acotado."""
+    usuario_dao = MagicMock()
+    usuario_mock = MagicMock()
+    usuario_mock.generate_auth_token.return_value = 'token123'
+    usuario_mock.rol = 'CLIENTE'
+    usuario_dao.obtener_por_username.return_value = usuario_mock
+    ejecutor = MagicMock()
+    ejecutor.ejecutar.return_value = True
+
+    service = AuthService(usuario_dao, ejecutor)
+    resultado = service.login('testuser', 'pw')
+
+    assert resultado == {'token': 'token123', 'rol': 'CLIENTE'}
+    ejecutor.ejecutar.assert_called_once_with(usuario_mock.check_password, 'pw')
+
+def test_ejecutor_rechaza_cuando_la_cola_esta_llena():
+    """Prueba que el ejecutor falle de inmediato si no hay lugar en la cola."""
+    ejecutor = EjecutorHash(max_workers=1, max_cola=1)
+    liberar = threading.Event()
+    hilos = [threading.Thread(target=ejecutor.ejecutar, args=(liberar.wait,)) for _ in range(2)]
+    for hilo in hilos:
+        hilo.start()
+    while ejecutor.estadisticas()['en_curso'] < 2:
+        time.sleep(0.001)
+
+    with pytest.raises(ColaHashLlenaError):
+        ejecutor.ejecutar(len, 'x')
+
+    liberar.set()
+    for hilo in hilos:
+        hilo.join()
+    assert ejecutor.ejecutar(len, 'abc') == 3
+    stats = ejecutor.estadisticas()
+    assert stats['rechazados'] == 1
+    assert stats['en_curso'] == 0
+
+def _usuario_cliente():
+    return Usuario(id_usuario=7, username='cliente', password_hash='', rol='CLIENTE')
+
+def test_login_incluye_refresh_token(app):
+    """Prueba que el login devuelva un refresh token cuando están habilitados."""
+    usuario_dao = MagicMock()
+    usuario_dao.obtener_por_username.return_value = usuario_mock = MagicMock()
+    usuario_mock.check_password.return_value = True
+    usuario_mock.generate_refresh_token.return_value = 'refresh123'
+
+    service = AuthService(usuario_dao, token_revocado_dao=MagicMock())
+    resultado = service.login('cliente', 'pw')
+
+    assert resultado['refresh_token'] == 'refresh123'
+
+def test_refrescar_emite_token_con_una_sola_consulta(app):
+    """Prueba que el refresh emita un token de acceso sin bcrypt, con una sola lectura del estado del token."""
+    usuario_dao = MagicMock()
+    token_revocado_dao = MagicMock()
+    token_revocado_dao.obtener_estado_refresh.return_value = (_usuario_cliente(), False)
+    service = AuthService(usuario_dao, token_revocado_dao=token_revocado_dao)
+    refresh_token = _usuario_cliente().generate_refresh_token()
+
+    resultado, error = service.refrescar(refresh_token)
+
+    assert error is None
+    assert resultado['rol'] == 'CLIENTE'
+    claims = jwt.decode(resultado['token'], app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
+    assert claims['sub'] == '7' and 'typ' not in claims
+    jti = jwt.decode(refresh_token, options={'verify_signature': False})['jti']
+    token_revocado_dao.obtener_estado_refresh.assert_called_once_with(jti, '7')
+    usuario_dao.obtener_por_username.assert_not_called()
+
+def test_refrescar_rechaza_revocados_y_tokens_de_acceso(app):
+    """Prueba que no se acepten refresh tokens revocados ni tokens de acceso como refresh."""
+    token_revocado_dao = MagicMock()
+    token_revocado_dao.obtener_estado_refresh.return_value = (_usuario_cliente(), True)
+    service = AuthService(MagicMock(), token_revocado_dao=token_revocado_dao)
+    usuario = _usuario_cliente()
+
+    assert service.refrescar(usuario.generate_refresh_token()) == (None, "Refresh token revocado. Inicie sesión nuevamente.")
+    assert service.refrescar(usuario.generate_auth_token()) == (None, "Refresh token inválido.")
+
+def test_refrescar_usa_el_rol_y_la_version_de_la_fila(app):
+    """Prueba que el rol del token nuevo salga de la DB y que una versión distinta o un usuario borrado se rechacen."""
+    token_revocado_dao = MagicMock()
+    service = AuthService(MagicMock(), token_revocado_dao=token_revocado_dao)
+    refresh_token = _usuario_cliente().generate_refresh_token()
+
+    # El rol cambió después del login: el token nuevo lleva el de la fila
+    token_revocado_dao.obtener_estado_refresh.return_value = (
+        Usuario(id_usuario=7, username='cliente', rol='INSPECTOR'), False
+    )
+    resultado, _ = service.refrescar(refresh_token)
+    assert resultado['rol'] == 'INSPECTOR'
+    assert jwt.decode(resultado['token'], app.config['JWT_SECRET_KEY'], algorithms=['HS256'])['rol'] == 'INSPECTOR'
+
+    # Incrementar version_token invalida los refresh tokens emitidos antes
+    token_revocado_dao.obtener_estado_refresh.return_value = (
+        Usuario(id_usuario=7, username='cliente', rol='CLIENTE', version_token=1), False
+    )
+    assert service.refrescar(refresh_token) == (None, "Refresh token revocado. Inicie sesión nuevamente.")
+
+    token_revocado_dao.obtener_estado_refresh.return_value = None
+    assert service.refrescar(refresh_token) == (None, "Refresh token inválido.")
+
+def test_revocar_registra_jti(app):
+    """Prueba que el logout registre el jti del refresh token hasta su expiración."""
+    token_revocado_dao = MagicMock()
+    token_revocado_dao.revocar.return_value = True
+    service = AuthService(MagicMock(), token_revocado_dao=token_revocado_dao)
+    refresh_token = _usuario_cliente().generate_refresh_token()
+
+    assert service.revocar(refresh_token) == (True, None)
+
+    jti, expira = token_revocado_dao.revocar.call_args[0]
+    assert jti == jwt.decode(refresh_token, options={'verify_signature': False})['jti']
+    assert expira.tzinfo is None
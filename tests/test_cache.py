@@ -0,0 +1,95 @@
+import threading
+import time
+from app.cache import CacheLRU
+
+class RelojFalso:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+def test_cache_desaloja_lru():
+    """Prueba que al superar el máximo se desaloje la clave menos usada."""
+    cache = CacheLRU(max_entradas=2)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    cache.obtener('a')
+    cache.guardar('c', 3)
+
+    assert cache.obtener('b') is None
+    assert cache.obtener('a') == 1
+    assert cache.obtener('c') == 3
+    assert cache.estadisticas()['desalojos'] == 1
+
+def test_cache_consultar_no_cuenta_ni_renueva():
+    """Prueba que consultar no cuente aciertos ni fallos ni cambie el orden de desalojo."""
+    cache = CacheLRU(max_entradas=2)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+
+    assert cache.consultar('a') == 1
+    assert cache.consultar('z', 0) == 0
+    stats = cache.estadisticas()
+    assert (stats['aciertos'], stats['fallos']) == (0, 0)
+
+    cache.guardar('c', 3)
+    assert cache.consultar('a') is None
+
+def test_cache_expira_por_ttl():
+    """Prueba que una entrada no se devuelva después de su TTL."""
+    reloj = RelojFalso()
+    cache = CacheLRU(max_entradas=10, ttl=30, reloj=reloj)
+    cache.guardar('a', 1)
+
+    reloj.ahora = 29
+    assert cache.obtener('a') == 1
+    reloj.ahora = 30
+    assert cache.obtener('a') is None
+    assert cache.estadisticas()['expiraciones'] == 1
+
+def test_cache_comparte_cargas_concurrentes():
+    """Prueba que varios fallos simultáneos de la misma clave ejecuten una sola carga."""
+    cache = CacheLRU(max_entradas=10)
+    llamadas = []
+    inicio = threading.Event()
+
+    def cargar():
+        llamadas.append(1)
+        inicio.wait(1)
+        return 'valor'
+
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(cache.obtener_o_cargar('k', cargar))) for _ in range(5)]
+    for h in hilos:
+        h.start()
+    time.sleep(0.05)
+    inicio.set()
+    for h in hilos:
+        h.join()
+
+    assert llamadas == [1]
+    assert resultados == ['valor'] * 5
+    assert cache.estadisticas()['cargas_compartidas'] == 4
+
+def test_cache_no_guarda_carga_invalidada():
+    """Prueba que una invalidación durante la carga impida guardar el valor viejo."""
+    cache = CacheLRU(max_entradas=10)
+
+    def cargar():
+        cache.invalidar('k')
+        return 'viejo'
+
+    assert cache.obtener_o_cargar('k', cargar) == 'viejo'
+    assert cache.obtener('k') is None
+
+def test_cache_desaloja_por_peso():
+    """Prueba que la cache desaloje entradas viejas al superar el peso máximo."""
+    cache = CacheLRU(max_entradas=100, max_peso=10, peso=len)
+    cache.guardar('a', 'xxxx')
+    cache.guardar('b', 'xxxx')
+    cache.guardar('c', 'xxxx')
+
+    assert cache.obtener('a') is None
+    assert cache.obtener('c') == 'xxxx'
+    assert cache.estadisticas()['peso_total'] == 8
@@ -0,0 +1,202 @@
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.db_connection import ConnectionPool, PoolTimeoutError, DBConnection
+
+class FakeConnection:
+    """Conexión mínima que registra commits, rollbacks y cierres."""
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+        self.commits = 0
+        self.rollbacks = 0
+
+    def is_connected(self):
+        return self.alive
+
+    def cursor(self, **kwargs):
+        return MagicMock()
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+def _pool(**kwargs):
+    creadas = []
+    def connect():
+        conn = FakeConnection()
+        creadas.append(conn)
+        return conn
+    return ConnectionPool(connect, **kwargs), creadas
+
+def test_pool_reutiliza_conexiones():
+    """Prueba que una conexión devuelta se reutilice en lugar de abrir otra."""
+    pool, creadas = _pool(size=2, max_overflow=0)
+
+    conn = pool.acquire()
+    pool.release(conn)
+    conn2 = pool.acquire()
+
+    assert conn2 is conn
+    assert len(creadas) == 1
+    assert pool.stats()['checked_out'] == 1
+
+def test_pool_cierra_conexiones_de_desborde():
+    """Prueba que las conexiones por encima de 'size' se cierren al devolverse."""
+    pool, creadas = _pool(size=1, max_overflow=1)
+
+    c1 = pool.acquire()
+    c2 = pool.acquire()
+    pool.release(c1)
+    pool.release(c2)
+
+    assert len(creadas) == 2
+    assert c2.closed is True
+    assert pool.stats()['open'] == 1
+    assert pool.stats()['idle'] == 1
+
+def test_pool_timeout_cuando_esta_agotado():
+    """Prueba que se lance PoolTimeoutError y se cuente la espera."""
+    pool, _ = _pool(size=1, max_overflow=0, timeout=0.05)
+    pool.acquire()
+
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+
+    stats = pool.stats()
+    assert stats['waits'] == 1
+    assert stats['timeouts'] == 1
+    assert stats['wait_time_seconds'] > 0
+
+def test_pool_espera_hasta_que_se_libere_una_conexion():
+    """Prueba que un hilo en espera reciba la conexión devuelta por otro."""
+    pool, creadas = _pool(size=1, max_overflow=0, timeout=2)
+    conn = pool.acquire()
+
+    timer = threading.Timer(0.05, pool.release, args=(conn,))
+    timer.start()
+    conn2 = pool.acquire()
+    timer.join()
+
+    assert conn2 is conn
+    assert len(creadas) == 1
+    assert pool.stats()['waits'] == 1
+
+def test_pool_descarta_conexion_muerta_en_ping():
+    """Prueba que una conexión que no responde al ping se reemplace."""
+    pool, creadas = _pool(size=1, max_overflow=0, ping_interval=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.alive = False
+
+    conn2 = pool.acquire()
+
+    assert conn2 is not conn
+    assert conn.closed is True
+    assert len(creadas) == 2
+    assert pool.stats()['discarded'] == 1
+
+def test_pool_se_reinicia_tras_fork():
+    """Prueba que el proceso hijo no reutilice ni cierre las conexiones del padre."""
+    pool, creadas = _pool(size=1, max_overflow=0)
+    conn = pool.acquire()
+    pool.release(conn)
+
+    with patch('app.db_connection.os.getpid', return_value=pool._pid + 1):
+        conn2 = pool.acquire()
+
+    assert conn2 is not conn
+    assert conn.closed is False
+    assert pool.stats()['open'] == 1
+
+def test_db_connection_commit_y_devolucion():
+    """Prueba que el contexto haga commit y devuelva la conexión al pool."""
+    pool, creadas = _pool(size=1, max_overflow=0)
+
+    with patch('app.db_connection.get_pool', return_value=pool):
+        with DBConnection() as db:
+            db.execute("UPDATE Turnos SET estado = 'LIBRE'")
+
+    assert creadas[0].commits == 1
+    assert pool.stats()['checked_out'] == 0
+    assert pool.stats()['idle'] == 1
+
+def test_db_connection_rollback_en_error():
+    """Prueba que el contexto haga rollback si el bloque lanza una excepción."""
+    pool, creadas = _pool(size=1, max_overflow=0)
+
+    with patch('app.db_connection.get_pool', return_value=pool):
+        with pytest.raises(ValueError):
+            with DBConnection():
+                raise ValueError("fallo")
+
+    assert creadas[0].rollbacks == 1
+    assert creadas[0].commits == 0
+    assert pool.stats()['checked_out'] == 0
+
+def test_db_connection_stream_lee_por_lotes():
+    """Prueba que el stream use un cursor no bufferizado y lea con fetchmany."""
+    pool, creadas = _pool(size=1, max_overflow=0)
+    cursor_stream = MagicMock()
+    cursor_stream.fetchmany.side_effect = [[{'id': 1}, {'id': 2}], [{'id': 3}], []]
+
+    with patch('app.db_connection.get_pool', return_value=pool):
+        with DBConnection() as db:
+            crear_cursor = db.connection.cursor = MagicMock(return_value=cursor_stream)
+            filas = list(db.stream("SELECT id FROM T", batch_size=2))
+
+    assert filas == [{'id': 1}, {'id': 2}, {'id': 3}]
+    crear_cursor.assert_called_once_with(dictionary=True, buffered=False)
+    cursor_stream.fetchmany.assert_called_with(2)
+    assert pool.stats()['idle'] == 1
+
+def test_db_connection_stream_incompleto_descarta_conexion():
+    """Prueba que una conexión con un stream a medio leer no vuelva al pool."""
+    pool, creadas = _pool(size=1, max_overflow=0)
+    cursor_stream = MagicMock()
+    cursor_stream.fetchmany.side_effect = [[{'id': 1}, {'id': 2}], [{'id': 3}], []]
+
+    with patch('app.db_connection.get_pool', return_value=pool):
+        with DBConnection() as db:
+            db.connection.cursor = MagicMock(return_value=cursor_stream)
+            filas = db.stream("SELECT id FROM T", batch_size=2)
+            next(filas)
+            filas.close()
+
+    assert creadas[0].closed is True
+    assert creadas[0].commits == 0
+    assert pool.stats()['open'] == 0
+
+def test_db_connection_fetch_models_mapea_tuplas():
+    """Prueba que fetch_models construya modelos desde filas en tupla según las columnas."""
+    from app.models import Turno
+    pool, creadas = _pool(size=1, max_overflow=0)
+    cursor_tuplas = MagicMock()
+    cursor_tuplas.description = [('id_turno',), ('fecha',), ('estado',)]
+    cursor_tuplas.fetchall.return_value = [(1, None, 'LIBRE'), (2, None, 'RESERVADO')]
+
+    with patch('app.db_connection.get_pool', return_value=pool):
+        with DBConnection() as db:
+            db.connection.cursor = MagicMock(return_value=cursor_tuplas)
+            turnos = db.fetch_models(Turno, "SELECT id_turno, fecha, estado FROM Turnos")
+
+    assert [(t.id_turno, t.estado, t.matricula) for t in turnos] == [(1, 'LIBRE', None), (2, 'RESERVADO', None)]
+    cursor_tuplas.close.assert_called_once()
+
+def test_db_connection_informa_tiempo_a_observadores():
+    """Prueba que al cerrar el contexto se informe el tiempo que la conexión estuvo tomada."""
+    pool, _ = _pool(size=1, max_overflow=0)
+    tiempos = []
+
+    with patch('app.db_connection.get_pool', return_value=pool), \
+            patch('app.db_connection.observadores_tiempo', [tiempos.append]):
+        with DBConnection():
+            pass
+
+    assert len(tiempos) == 1 and tiempos[0] >= 0
@@ -0,0 +1,128 @@
+from unittest.mock import MagicMock
+from datetime import date, datetime, time
+
+from app.models import Turno
+from app.turnos.indice_disponibilidad import IndiceDisponibilidad
+
+DIA = date(2025, 11, 18)
+
+def _turnos_del_dia(estados):
+    """Genera los turnos del día cada 30 minutos desde las 9:00 con los estados dados."""
+    return [
+        Turno(id_turno=100 + i, fecha=datetime(2025, 11, 18, 9 + i // 2, 30 * (i % 2)), estado=estado)
+        for i, estado in enumerate(estados)
+    ]
+
+def _indice(turnos):
+    turno_dao = MagicMock()
+    turno_dao.obtener_por_fecha.return_value = turnos
+    turno_dao.obtener_por_rango.return_value = turnos
+    indice = IndiceDisponibilidad(turno_dao, time(9, 0), time(18, 0), 30)
+    return indice, turno_dao
+
+def test_indice_responde_sin_volver_a_la_db():
+    """Prueba que la disponibilidad se arme desde el bitset con una única carga por día."""
+    indice, turno_dao = _indice(_turnos_del_dia(['LIBRE', 'RESERVADO', 'LIBRE']))
+
+    primera = indice.disponibles(DIA)
+    segunda = indice.disponibles(DIA)
+
+    assert indice.cantidad_slots == 18
+    assert [t.id_turno for t in primera] == [100, 102]
+    assert primera[1].fecha == datetime(2025, 11, 18, 10, 0)
+    assert [t.id_turno for t in segunda] == [100, 102]
+    turno_dao.obtener_por_fecha.assert_called_once_with(DIA)
+    turno_dao.agregar_observador.assert_called_once_with(indice.aplicar)
+
+def test_indice_aplica_reserva_en_memoria():
+    """Prueba que una reserva notificada por el DAO marque el slot como ocupado sin recargar."""
+    indice, turno_dao = _indice(_turnos_del_dia(['LIBRE', 'LIBRE']))
+    indice.disponibles(DIA)
+
+    indice.aplicar([Turno(id_turno=100, fecha=datetime(2025, 11, 18, 9, 0), estado='RESERVADO')])
+
+    assert [t.id_turno for t in indice.disponibles(DIA)] == [101]
+    turno_dao.obtener_por_fecha.assert_called_once()
+
+def test_indice_aplicar_y_verificar_no_alteran_aciertos():
+    """Prueba que las lecturas internas del índice no cuenten como aciertos ni fallos de la cache de días."""
+    indice, _ = _indice(_turnos_del_dia(['LIBRE', 'LIBRE']))
+    indice.disponibles(DIA)
+    antes = indice.estadisticas()
+
+    indice.aplicar([Turno(id_turno=100, fecha=datetime(2025, 11, 18, 9, 0), estado='RESERVADO')])
+    indice.aplicar([Turno(id_turno=200, fecha=datetime(2025, 11, 19, 9, 0), estado='RESERVADO')])
+    indice.verificar(DIA)
+
+    despues = indice.estadisticas()
+    assert (despues['aciertos'], despues['fallos']) == (antes['aciertos'], antes['fallos'])
+
+def test_indice_recarga_dia_tras_alta_masiva():
+    """Prueba que turnos sin id (alta masiva) descarten el día para recargarlo."""
+    indice, turno_dao = _indice(_turnos_del_dia(['LIBRE']))
+    indice.disponibles(DIA)
+
+    indice.aplicar([Turno(fecha=datetime(2025, 11, 18, 9, 30), estado='LIBRE')])
+    indice.disponibles(DIA)
+
+    assert turno_dao.obtener_por_fecha.call_count == 2
+
+def test_indice_dia_no_indexable_con_slots_duplicados():
+    """Prueba que un día con dos turnos en el mismo horario se derive a la DB."""
+    turnos = _turnos_del_dia(['LIBRE']) + [Turno(id_turno=999, fecha=datetime(2025, 11, 18, 9, 0), estado='LIBRE')]
+    indice, _ = _indice(turnos)
+
+    assert indice.disponibles(DIA) is None
+
+def test_indice_proximo_libre():
+    """Prueba la búsqueda del próximo slot libre a partir de un horario."""
+    indice, _ = _indice(_turnos_del_dia(['LIBRE', 'RESERVADO', 'LIBRE', 'LIBRE']))
+
+    assert indice.proximo_libre(datetime(2025, 11, 18, 8, 0), dias=1).id_turno == 100
+    assert indice.proximo_libre(datetime(2025, 11, 18, 9, 10), dias=1).id_turno == 102
+    assert indice.proximo_libre(datetime(2025, 11, 18, 10, 30), dias=1).id_turno == 103
+    assert indice.proximo_libre(datetime(2025, 11, 18, 11, 0), dias=1) is None
+
+def test_indice_proximo_libre_carga_la_ventana_con_una_consulta():
+    """Prueba que, en frío, los días de la ventana se carguen con una sola consulta por rango."""
+    turnos = [
+        Turno(id_turno=1, fecha=datetime(2025, 11, 18, 9, 0), estado='RESERVADO'),
+        Turno(id_turno=2, fecha=datetime(2025, 11, 20, 9, 0), estado='RESERVADO'),
+        Turno(id_turno=3, fecha=datetime(2025, 11, 21, 9, 30), estado='LIBRE'),
+    ]
+    indice, turno_dao = _indice(turnos)
+
+    assert indice.proximo_libre(datetime(2025, 11, 18, 8, 0), dias=7).id_turno == 3
+    turno_dao.obtener_por_rango.assert_called_once_with(DIA, date(2025, 11, 24))
+    turno_dao.obtener_por_fecha.assert_not_called()
+
+    # Los días quedaron en el índice: la siguiente búsqueda no consulta la DB
+    assert indice.proximo_libre(datetime(2025, 11, 19, 8, 0), dias=3).id_turno == 3
+    assert turno_dao.obtener_por_rango.call_count == 1
+
+def test_indice_proximo_libre_relee_los_dias_tras_una_escritura():
+    """Prueba que una escritura notificada durante la búsqueda descarte lo precargado para los días siguientes."""
+    turnos = [Turno(id_turno=1, fecha=datetime(2025, 11, 18, 9, 0), estado='RESERVADO')]
+    indice, turno_dao = _indice(turnos)
+    turno_dao.obtener_por_fecha.return_value = []
+
+    def reservar_en_paralelo(desde, hasta):
+        indice.aplicar([Turno(id_turno=5, fecha=datetime(2025, 11, 19, 9, 0), estado='RESERVADO')])
+        return turnos
+    turno_dao.obtener_por_rango.side_effect = reservar_en_paralelo
+
+    assert indice.proximo_libre(datetime(2025, 11, 18, 8, 0), dias=3) is None
+    assert [c[0][0] for c in turno_dao.obtener_por_fecha.call_args_list] == [date(2025, 11, 19), date(2025, 11, 20)]
+
+def test_indice_verificar_detecta_inconsistencia():
+    """Prueba que la verificación compare el estado en memoria con una reconstrucción desde la DB."""
+    indice, turno_dao = _indice(_turnos_del_dia(['LIBRE', 'LIBRE']))
+    indice.disponibles(DIA)
+    assert indice.verificar(DIA)['consistente'] is True
+
+    # Otro proceso reservó el turno 101 sin pasar por este índice
+    turno_dao.obtener_por_fecha.return_value = _turnos_del_dia(['LIBRE', 'RESERVADO'])
+    assert indice.verificar(DIA)['consistente'] is False
+
+    indice.reconstruir(DIA)
+    assert indice.verificar(DIA)['consistente'] is True
@@ -0,0 +1,64 @@
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+
+from app.json_provider import ProveedorJSONRapido
+from app.models import Turno
+
+# Respuestas representativas de la API (mensajes con tildes, turnos, resultados, estadísticas)
+RESPUESTAS = [
+    {'message': 'Cursor inválido.'},
+    {'message': 'El turno 5 ya está RESERVADO.'},
+    {'disponibles': [{'id_turno': 1, 'fecha': '2025-11-18T09:00:00', 'estado': 'LIBRE',
+                      'matricula': None, 'id_resultado': None}]},
+    {'turno': {'id_turno': 9, 'estado': 'FINALIZADO', 'resultado_detalle': {
+        'puntaje_total': Decimal('72.50'), 'observaciones': 'Frenos: revisar ñandú 😀',
+        'controles': [{'id_control': 1, 'calificacion': 8}]}}},
+    {'turnos_pendientes': [], 'siguiente_cursor': None},
+    [{'id_usuario': 1, 'username': 'admin', 'rol': 'ADMINISTRADOR'}],
+    {'pool_db': {'wait_time_seconds': 0.000025, 'tasa_aciertos': 0.8333},
+     'extremos': [1e16, 1e-07, -2.5e-05, 1.5e300, 0.1, 100.0, -0.0, 2 ** 70]},
+    {'control': '\x00\x1f\x7f\t\n "\\/'},
+    {'tasa': float('nan'), 'limites': [float('inf'), -float('inf')], 'matricula': None},
+]
+
+@pytest.fixture
+def proveedores(app):
+    return DefaultJSONProvider(app), ProveedorJSONRapido(app)
+
+@pytest.mark.parametrize('obj', RESPUESTAS)
+def test_respuesta_identica_al_proveedor_de_flask(proveedores, obj):
+    """Prueba que el cuerpo de la respuesta sea idéntico byte a byte al del proveedor por defecto."""
+    flask_json, rapido = proveedores
+
+    assert rapido.response(obj).get_data() == flask_json.response(obj).get_data()
+    assert rapido.dumps(obj, separators=(',', ':')) == flask_json.dumps(obj, separators=(',', ':'))
+    assert rapido.dumps(obj) == flask_json.dumps(obj)
+
+def test_serializa_fechas_y_modelos(proveedores):
+    """Prueba que datetimes y modelos se serialicen sin convertirlos antes."""
+    _, rapido = proveedores
+    turno = Turno(id_turno=3, fecha=datetime(2025, 11, 18, 9, 30), estado='LIBRE')
+
+    assert rapido.dumps({'turno': turno}, separators=(',', ':')) == \
+        rapido.dumps({'turno': turno.to_dict()}, separators=(',', ':'))
+    assert rapido.dumps(datetime(2025, 11, 18, 9, 30)) == '"2025-11-18T09:30:00"'
+
+def test_sin_orjson_usa_biblioteca_estandar(proveedores, monkeypatch):
+    """Prueba que sin orjson instalado la salida no cambie."""
+    flask_json, rapido = proveedores
+    monkeypatch.setattr('app.json_provider.orjson', None)
+
+    for obj in RESPUESTAS:
+        assert rapido.response(obj).get_data() == flask_json.response(obj).get_data()
+    assert rapido.loads('{"a": [1, 2.5]}') == {'a': [1, 2.5]}
+
+def test_loads_acepta_lo_mismo_que_json(proveedores):
+    """Prueba que las entradas que orjson rechaza se deleguen a la biblioteca estándar."""
+    _, rapido = proveedores
+
+    assert rapido.loads(b'{"username": "jos\\u00e9"}') == {'username': 'josé'}
+    assert rapido.loads('[%d]' % 2 ** 70) == [2 ** 70]
+    with pytest.raises(ValueError):
+        rapido.loads('{no es json')
@@ -0,0 +1,92 @@
+import json
+import logging
+
+from flask import Flask
+
+from app.config import Config
+from app.logging_config import (
+    FormateadorJSON, FiltroMuestreo, ManejadorCola, configure_logging, detener_logging
+)
+
+def _record(nombre='app', nivel=logging.INFO, msg='Turno %s reservado.', args=(1,), **extra):
+    record = logging.LogRecord(nombre, nivel, __file__, 1, msg, args, None)
+    for clave, valor in extra.items():
+        setattr(record, clave, valor)
+    return record
+
+def test_formateador_json_incluye_extra_y_mensaje_interpolado():
+    """Prueba que cada registro sea una línea JSON con el mensaje interpolado y los campos extra."""
+    linea = FormateadorJSON().format(_record(id_turno=7))
+    datos = json.loads(linea)
+
+    assert datos['nivel'] == 'INFO'
+    assert datos['logger'] == 'app'
+    assert datos['mensaje'] == 'Turno 1 reservado.'
+    assert datos['id_turno'] == 7
+    assert 'args' not in datos
+
+def test_muestreo_conserva_uno_de_cada_n_incluyendo_hijos():
+    """Prueba que el muestreo se aplique al logger configurado y a sus hijos, pero no a otros."""
+    filtro = FiltroMuestreo({'app.health': 3})
+
+    conservados = [filtro.filter(_record('app.health.detalle')) for _ in range(7)]
+    assert conservados == [True, False, False, True, False, False, True]
+    assert all(filtro.filter(_record('app')) for _ in range(5))
+
+def test_limite_por_segundo_informa_suprimidos():
+    """Prueba el límite por plantilla y que el primero de la ventana siguiente informe los descartados."""
+    reloj = [0.0]
+    filtro = FiltroMuestreo(limite_por_segundo=2, reloj=lambda: reloj[0])
+
+    assert [filtro.filter(_record()) for _ in range(5)] == [True, True, False, False, False]
+    assert filtro.filter(_record(msg='Otro mensaje', args=None))
+
+    reloj[0] = 1.5
+    siguiente = _record()
+    assert filtro.filter(siguiente)
+    assert siguiente.suprimidos == 3
+
+def test_errores_nunca_se_descartan():
+    """Prueba que WARNING y superiores pasen aunque el logger esté muestreado o limitado."""
+    filtro = FiltroMuestreo({'app': 1000}, limite_por_segundo=1)
+    assert all(filtro.filter(_record(nivel=logging.ERROR)) for _ in range(10))
+
+def test_manejador_cola_interpola_en_el_hilo_que_loguea():
+    """Prueba que el registro encolado no conserve referencias a los argumentos."""
+    argumentos = {'estado': 'LIBRE'}
+    record = ManejadorCola(None).prepare(_record(msg='Turno %s', args=(argumentos,)))
+    argumentos['estado'] = 'RESERVADO'
+
+    assert record.msg == "Turno {'estado': 'LIBRE'}"
+    assert record.args is None
+
+def test_configure_logging_encola_y_escribe_desde_el_listener(capsys):
+    """Prueba que los registros de app.logger y de sus hijos se escriban como JSON vía la cola."""
+    app = Flask('app_logging_test')
+    app.config.from_object(Config)
+    configure_logging(app)
+    try:
+        assert [type(h) for h in app.logger.handlers] == [ManejadorCola]
+        app.logger.getChild('db').warning("Consulta lenta (%.1f ms)", 812.0)
+    finally:
+        detener_logging(app)
+
+    lineas = [json.loads(l) for l in capsys.readouterr().err.splitlines()]
+    assert lineas[-1]['logger'] == 'app_logging_test.db'
+    assert lineas[-1]['mensaje'] == 'Consulta lenta (812.0 ms)'
+
+def test_app_importa_sin_orjson():
+    """Prueba que la app y el formateador JSON funcionen con orjson no instalado."""
+    import subprocess
+    import sys
+    codigo = (
+        "import sys; sys.modules['orjson'] = None\n"
+        "import json, logging\n"
+        "import app\n"
+        "from app.logging_config import FormateadorJSON, orjson\n"
+        "assert orjson is None\n"
+        "r = logging.LogRecord('app', logging.INFO, 'app.py', 1, 'Turno %s ñ', (1,), None)\n"
+        "print(json.loads(FormateadorJSON().format(r))['mensaje'])\n"
+    )
+    salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True)
+    assert salida.stdout.strip() == 'Turno 1 ñ'
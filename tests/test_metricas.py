@@ -0,0 +1,58 @@
+from unittest.mock import patch
+
+from app import db_connection
+from app.metricas import Histograma, RegistroMetricas
+
+def test_histograma_acumula_por_bucket():
+    """Prueba que los buckets sean acumulativos e incluyan el límite (le)."""
+    histograma = Histograma((0.1, 1.0))
+    for valor in (0.05, 0.1, 0.5, 3.0):
+        histograma.observar(valor)
+
+    assert list(histograma.acumulados()) == [('0.1', 2), ('1.0', 3), ('+Inf', 4)]
+    assert histograma.total == 4
+
+def test_exportar_formato_prometheus():
+    """Prueba el formato de texto de Prometheus para latencias, estados y pedidos en curso."""
+    registro = RegistroMetricas(limites=(0.1,))
+    registro.inicio_pedido()
+    registro.observar_pedido('turnos.consultar_disponibilidad', 'GET', 200, 0.02, 0.01)
+    registro.observar_pedido('turnos.consultar_disponibilidad', 'GET', 400, 0.3, 0.0)
+
+    texto = registro.exportar()
+
+    assert '# TYPE http_request_duration_seconds histogram' in texto
+    assert 'http_request_duration_seconds_bucket{endpoint="turnos.consultar_disponibilidad",method="GET",le="0.1"} 1' in texto
+    assert 'http_request_duration_seconds_count{endpoint="turnos.consultar_disponibilidad",method="GET"} 2' in texto
+    assert 'http_requests_total{endpoint="turnos.consultar_disponibilidad",method="GET",status="400"} 1' in texto
+    assert 'http_requests_in_flight 1' in texto
+
+def test_endpoint_metrics_registra_pedidos(client):
+    """Prueba que los pedidos queden medidos y se expongan en /api/metrics."""
+    client.get('/api/health')
+    client.get('/api/no-existe')
+
+    response = client.get('/api/metrics')
+    texto = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert 'http_requests_total{endpoint="utils.health_check",method="GET",status="200"}' in texto
+    assert 'http_requests_total{endpoint="sin_ruta",method="GET",status="404"}' in texto
+    assert 'http_requests_in_flight 1' in texto  # el propio pedido a /api/metrics
+
+@patch('app.turnos.turno_controller.turno_service')
+def test_tiempo_db_se_suma_al_pedido(mock_service, app, client, client_token_data):
+    """Prueba que el tiempo informado por DBConnection se acumule en el pedido en curso."""
+    def consultar(fecha):
+        for observador in db_connection.observadores_tiempo:
+            observador(0.2)
+        return [], None
+    mock_service.consultar_disponibilidad.side_effect = consultar
+
+    client.get('/api/turnos/disponibilidad?fecha=2025-11-18', headers=client_token_data['headers'])
+    texto = client.get('/api/metrics').get_data(as_text=True)
+
+    linea = next(l for l in texto.splitlines()
+                 if l.startswith('http_request_db_seconds_sum{endpoint="turnos.consultar_disponibilidad"'))
+    assert float(linea.split()[-1]) >= 0.2
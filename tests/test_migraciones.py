@@ -0,0 +1,107 @@
+import os
+import re
+import sqlite3
+from unittest.mock import MagicMock, patch
+from datetime import date, datetime
+
+import pytest
+
+from app.config import Config
+from app.migraciones import aplicar_migraciones, listar_migraciones, separar_sentencias, verificar_indices
+from app.dao.turno_dao import QUERY_DISPONIBLES_POR_FECHA, rango_del_dia
+
+def _fake_db(filas_select=None, plan=None):
+    """Crea un DBConnection simulado que registra las sentencias ejecutadas."""
+    db = MagicMock()
+    db.__enter__.return_value = db
+    db.__exit__.return_value = False
+    db.cursor.fetchall.return_value = filas_select or []
+    db.cursor.fetchone.return_value = plan
+    return db
+
+def test_separar_sentencias_ignora_comentarios():
+    """Prueba que el script se divida en sentencias sin comentarios."""
+    sql = "-- comentario\nCREATE INDEX a ON T (x);\n\nCREATE INDEX b ON T (y);\n"
+
+    assert separar_sentencias(sql) == ['CREATE INDEX a ON T (x)', 'CREATE INDEX b ON T (y)']
+
+def test_aplicar_migraciones_solo_pendientes(tmp_path):
+    """Prueba que solo se apliquen las migraciones no registradas, en orden de versión."""
+    (tmp_path / '002_b.sql').write_text("CREATE INDEX b ON T (y);")
+    (tmp_path / '001_a.sql').write_text("CREATE INDEX a ON T (x);")
+
+    db = _fake_db(filas_select=[{'version': '001'}])
+    with patch('app.migraciones.DBConnection', return_value=db):
+        nuevas = aplicar_migraciones(str(tmp_path))
+
+    assert [v for v, _ in listar_migraciones(str(tmp_path))] == ['001', '002']
+    assert nuevas == ['002']
+    ejecutadas = [c[0][0] for c in db.cursor.execute.call_args_list]
+    assert 'CREATE INDEX b ON T (y)' in ejecutadas
+    assert 'CREATE INDEX a ON T (x)' not in ejecutadas
+
+def test_verificar_indices_reporta_indice_usado():
+    """Prueba que el chequeo marque como fallida una consulta que no usa el índice esperado."""
+    db = _fake_db(plan={'key': 'idx_turnos_estado_fecha'})
+    with patch('app.migraciones.DBConnection', return_value=db):
+        reporte = verificar_indices()
+
+    assert all(r['ok'] for r in reporte)
+
+    db = _fake_db(plan={'key': None})
+    with patch('app.migraciones.DBConnection', return_value=db):
+        reporte = verificar_indices()
+
+    assert not any(r['ok'] for r in reporte)
+
+def test_disponibilidad_usa_rango_semiabierto():
+    """Prueba que la consulta de disponibilidad no aplique funciones sobre la columna fecha."""
+    assert 'DATE(' not in QUERY_DISPONIBLES_POR_FECHA
+    assert rango_del_dia(date(2025, 11, 18)) == (datetime(2025, 11, 18), datetime(2025, 11, 19))
+
+def _aplicar_004_en_sqlite(filas):
+    """Aplica la migración 004 sobre una tabla Turnos en SQLite, adaptando la sintaxis propia de MySQL."""
+    conexion = sqlite3.connect(':memory:')
+    conexion.execute("CREATE TABLE Turnos (id_turno INTEGER PRIMARY KEY, fecha DATETIME NOT NULL, estado VARCHAR(50) NOT NULL)")
+    conexion.executemany("INSERT INTO Turnos (id_turno, fecha, estado) VALUES (?, ?, ?)", filas)
+    ruta = dict(listar_migraciones())['004']
+    with open(ruta, encoding='utf-8') as f:
+        for sentencia in separar_sentencias(f.read()):
+            if sentencia.startswith('DROP INDEX'):
+                continue
+            conexion.execute(sentencia.replace('DROP TEMPORARY TABLE', 'DROP TABLE'))
+    return conexion
+
+def test_migracion_004_conserva_la_reserva_entre_duplicados():
+    """Prueba que se descarten todos los LIBRES duplicados, aunque tengan menor id que la reserva."""
+    conexion = _aplicar_004_en_sqlite([
+        (1, '2025-11-18 09:00:00', 'LIBRE'),
+        (2, '2025-11-18 09:00:00', 'RESERVADO'),
+        (3, '2025-11-18 09:00:00', 'LIBRE'),
+        (4, '2025-11-18 09:30:00', 'LIBRE'),
+        (5, '2025-11-18 09:30:00', 'LIBRE'),
+        (6, '2025-11-18 10:00:00', 'LIBRE'),
+    ])
+
+    filas = conexion.execute("SELECT id_turno, estado FROM Turnos ORDER BY id_turno").fetchall()
+    assert filas == [(2, 'RESERVADO'), (4, 'LIBRE'), (6, 'LIBRE')]
+
+def test_migracion_004_se_detiene_con_reservas_duplicadas():
+    """Prueba que dos reservas en el mismo horario detengan la migración antes de borrar filas."""
+    filas = [
+        (1, '2025-11-18 09:00:00', 'RESERVADO'),
+        (2, '2025-11-18 09:00:00', 'COMPLETADO'),
+        (3, '2025-11-18 09:30:00', 'LIBRE'),
+        (4, '2025-11-18 09:30:00', 'LIBRE'),
+    ]
+    with pytest.raises(sqlite3.IntegrityError, match='VerificacionReservasDuplicadas'):
+        _aplicar_004_en_sqlite(filas)
+
+def test_init_sql_registra_todas_las_migraciones():
+    """Prueba que el esquema inicial marque como aplicadas todas las migraciones que ya incluye."""
+    ruta = os.path.join(os.path.dirname(Config.MIGRACIONES_DIR), 'init', 'init.sql')
+    with open(ruta, encoding='utf-8') as f:
+        init_sql = f.read()
+
+    registradas = re.search(r"INSERT INTO SchemaMigrations \(version\) VALUES\s*([^;]+);", init_sql).group(1)
+    assert re.findall(r"'(\d+)'", registradas) == [v for v, _ in listar_migraciones()]
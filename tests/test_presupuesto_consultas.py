@@ -0,0 +1,167 @@
+import pytest
+
+from app.trazas import presupuesto_consultas, huella_sql, HEADER_CONSULTAS
+
+def test_huella_sql_normaliza_literales_y_listas():
+    """Prueba que la huella agrupe ejecuciones de la misma consulta con distintos valores."""
+    sql = "SELECT * FROM Turnos WHERE id_turno IN (%s, %s,%s) AND estado = 'LIBRE'\n   LIMIT 50"
+    assert huella_sql(sql) == "SELECT * FROM Turnos WHERE id_turno IN (?+) AND estado = ? LIMIT ?"
+    assert huella_sql("INSERT INTO T (a, b) VALUES (%s, %s), (%s, %s)") == "INSERT INTO T (a, b) VALUES (?+)..."
+
+def test_presupuesto_excedido_falla(db_simulada):
+    """Prueba que el helper falle si el bloque ejecuta más consultas que las permitidas."""
+    from app.dao.turno_dao import TurnoDAO
+    dao = TurnoDAO()
+
+    with pytest.raises(AssertionError, match="2 consultas"):
+        with presupuesto_consultas(1):
+            dao.obtener_por_id(1)
+            dao.obtener_por_id(2)
+
+def test_presupuesto_no_cuenta_consultas_de_otros_hilos():
+    """Prueba que un presupuesto solo registre las consultas de su propio hilo."""
+    import threading
+    from app.trazas import _registrar_consulta
+
+    with presupuesto_consultas(1) as consultas:
+        hilo = threading.Thread(target=_registrar_consulta, args=("SELECT b FROM T", 0.0, 1))
+        hilo.start()
+        hilo.join()
+        _registrar_consulta("SELECT a FROM T", 0.0, 1)
+
+    assert [c.huella for c in consultas] == ["SELECT a FROM T"]
+
+def test_consultar_turno_una_consulta(client, client_token_data, db_simulada):
+    """Prueba que consultar un turno cueste un único round-trip y se informe en el header."""
+    with presupuesto_consultas(1):
+        response = client.get('/api/turnos/987654/consultar', headers=client_token_data['headers'])
+
+    assert response.status_code == 404
+    assert response.headers[HEADER_CONSULTAS] == '1'
+
+def test_reservar_turno_presupuesto(client, client_token_data, db_simulada):
+    """Prueba que la reserva no supere SELECT FOR UPDATE + alta del vehículo + UPDATE."""
+    with presupuesto_consultas(3) as consultas:
+        response = client.post('/api/turnos/reservar', headers=client_token_data['headers'], json={
+            'matricula': 'AAA111', 'id_marca': 1, 'anio': 2020, 'id_turno': 987654
+        })
+
+    assert response.status_code == 409
+    assert consultas[0].huella.endswith('FOR UPDATE')
+
+def test_disponibilidad_presupuesto(client, client_token_data, db_simulada):
+    """Prueba que la disponibilidad de un día cueste a lo sumo una consulta."""
+    with presupuesto_consultas(1):
+        response = client.get('/api/turnos/disponibilidad?fecha=2031-03-04', headers=client_token_data['headers'])
+
+    assert response.status_code == 200
+
+def test_log_de_consulta_lenta(db_simulada, monkeypatch, caplog):
+    """Prueba que una consulta por encima del umbral se registre con su huella."""
+    from app.dao.turno_dao import TurnoDAO
+    monkeypatch.setattr('app.trazas.umbral_consulta_lenta', 0.0)
+
+    with caplog.at_level('WARNING', logger='app.db'):
+        TurnoDAO().obtener_por_id(1)
+
+    assert 'Consulta lenta' in caplog.text
+    assert 'WHERE id_turno = ?' in caplog.text
+
+@pytest.mark.parametrize('resumen', ['0', '1'])
+def test_disponibilidad_rango_una_consulta(client, client_token_data, db_simulada, resumen):
+    """Prueba que la disponibilidad de un mes completo cueste una sola consulta, con y sin resumen."""
+    with presupuesto_consultas(1):
+        response = client.get(f'/api/turnos/disponibilidad/rango?desde=2031-03-01&hasta=2031-03-31&resumen={resumen}',
+                              headers=client_token_data['headers'])
+
+    assert response.status_code == 200
+
+def test_crear_varios_por_lotes(db_simulada):
+    """Prueba que el alta masiva envíe un INSERT de varias filas por lote que omite los horarios existentes."""
+    from datetime import datetime, timedelta
+    from app.dao.turno_dao import TurnoDAO
+    from app.models import Turno
+    inicio = datetime(2031, 3, 4, 9, 0)
+    turnos = [Turno(fecha=inicio + timedelta(minutes=30 * i), estado='LIBRE') for i in range(250)]
+
+    with presupuesto_consultas(3) as consultas:
+        TurnoDAO().crear_varios(turnos, tamanio_lote=100)
+
+    assert len(consultas) == 3
+    assert consultas[0].huella == "INSERT INTO Turnos (fecha, estado) VALUES (?+)... ON DUPLICATE KEY UPDATE fecha = fecha"
+
+def test_reservar_horario_completo_no_escribe_turnos(db_simulada):
+    """Prueba que un horario sin lugares se resuelva con la sentencia condicional sobre su fila, sin tocar Turnos."""
+    from datetime import datetime
+    from app.dao.turno_dao import TurnoDAO, RESERVA_CONFLICTO
+    from app.models import Vehiculo
+
+    with presupuesto_consultas(2) as consultas:
+        resultado = TurnoDAO().reservar_horario(datetime(2031, 3, 4, 9, 0), Vehiculo('AAA111', 1, 2020), capacidad=4)
+
+    assert resultado == (RESERVA_CONFLICTO, None)
+    assert consultas[0].huella.startswith('INSERT INTO Vehiculos')
+    assert consultas[1].huella.startswith('INSERT INTO CuposHorario')
+    assert 'IF(reservados < ?, LAST_INSERT_ID(reservados + ?), reservados)' in consultas[1].huella
+
+def test_reservar_horario_confirma_el_cupo_antes_de_escribir_el_turno(app):
+    """Prueba que el cupo se confirme en su propia sentencia y se devuelva si el turno no se puede escribir."""
+    from datetime import datetime
+    from unittest.mock import MagicMock, patch
+    from app.dao.turno_dao import TurnoDAO, QUERY_TOMAR_CUPO, RESERVA_ERROR
+    from app.models import Vehiculo
+
+    db = MagicMock()
+    db.__enter__.return_value = db
+    db.__exit__.return_value = False
+    ejecutadas = []
+
+    def execute(query, params=()):
+        ejecutadas.append((query, db.connection.commit.call_count))
+        if query == QUERY_TOMAR_CUPO:
+            db.cursor.rowcount, db.cursor.lastrowid = 2, 3
+        elif query.strip().startswith('INSERT INTO Turnos'):
+            raise RuntimeError("Lock wait timeout")
+    db.cursor.execute.side_effect = execute
+
+    with patch('app.dao.turno_dao.DBConnection', return_value=db), patch.object(app.logger, 'exception') as log:
+        resultado = TurnoDAO().reservar_horario(datetime(2031, 3, 4, 9, 0), Vehiculo('AAA111', 1, 2020), capacidad=4)
+
+    assert resultado == (RESERVA_ERROR, None)
+    # El error se registra con su traceback en el logger de la app
+    log.assert_called_once_with("Error al reservar horario.")
+    # El vehículo se confirma antes de tomar el cupo, y el cupo antes de escribir el turno
+    assert [commits for _, commits in ejecutadas[:3]] == [0, 1, 2]
+    assert ejecutadas[-1][0].startswith('UPDATE CuposHorario SET reservados = reservados - 1')
+
+def test_lecturas_de_agenda_e_indice_relanzan_errores_de_la_db(app):
+    """Prueba que las lecturas que alimentan el índice y la agenda registren y relancen los errores de la DB."""
+    from datetime import date, datetime
+    from unittest.mock import patch
+    from app.dao.agenda_dao import AgendaDAO
+    from app.dao.turno_dao import TurnoDAO
+
+    lecturas = [
+        ('app.dao.turno_dao', lambda: TurnoDAO().obtener_por_fecha(date(2031, 3, 4))),
+        ('app.dao.turno_dao', lambda: TurnoDAO().obtener_por_rango(date(2031, 3, 4), date(2031, 3, 5))),
+        ('app.dao.turno_dao', lambda: TurnoDAO().obtener_reservados_por_horario(datetime(2031, 3, 4), datetime(2031, 3, 5))),
+        ('app.dao.agenda_dao', lambda: AgendaDAO().obtener_excepciones(date(2031, 3, 4), date(2031, 3, 5))),
+    ]
+    for modulo, leer in lecturas:
+        with patch(f'{modulo}.DBConnection', side_effect=RuntimeError("sin conexión")), \
+                patch.object(app.logger, 'exception') as log:
+            with pytest.raises(RuntimeError):
+                leer()
+        log.assert_called_once()
+
+def test_reservar_proximo_una_transaccion(db_simulada):
+    """Prueba que reservar-próximo elija el turno con FOR UPDATE SKIP LOCKED y termine si no hay libres."""
+    from datetime import datetime
+    from app.dao.turno_dao import TurnoDAO, RESERVA_NO_ENCONTRADO
+    from app.models import Vehiculo
+
+    with presupuesto_consultas(1) as consultas:
+        resultado = TurnoDAO().reservar_proximo(datetime(2031, 3, 4, 9, 0), datetime(2031, 3, 5), Vehiculo('AAA111', 1, 2020))
+
+    assert resultado == (RESERVA_NO_ENCONTRADO, None)
+    assert consultas[0].huella.endswith('FOR UPDATE SKIP LOCKED')
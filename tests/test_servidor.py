@@ -0,0 +1,111 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask
+
+from app.auth import auth_controller
+from app.auth.ejecutor_hash import EjecutorHash, ColaHashLlenaError
+from app.config import Config
+from app.logging_config import configure_logging, reiniciar_logging, detener_logging, EXTENSION_LOGGING
+from app.servidor import registrar_recurso, reiniciar_tras_fork, opciones_gunicorn
+
+def _app(**config):
+    app = Flask('app_servidor_test')
+    app.config.from_object(Config)
+    app.config.update(config)
+    return app
+
+def test_opciones_gunicorn_con_hilos_y_precarga():
+    """Prueba que con varios hilos se use gthread y que la app se precargue en el maestro."""
+    opciones = opciones_gunicorn(_app(WEB_WORKERS=3, WEB_THREADS=8, WEB_MAX_REQUESTS=1000), 5000)
+
+    assert opciones['bind'] == '0.0.0.0:5000'
+    assert opciones['workers'] == 3
+    assert opciones['threads'] == 8
+    assert opciones['worker_class'] == 'gthread'
+    assert opciones['preload_app'] is True
+    assert opciones['max_requests_jitter'] == 100
+
+def test_opciones_gunicorn_sync_y_un_worker_por_cpu(monkeypatch):
+    """Prueba el worker sync con un hilo y WEB_WORKERS=0 como un proceso por CPU."""
+    monkeypatch.setattr('app.servidor.os.cpu_count', lambda: 6)
+    opciones = opciones_gunicorn(_app(WEB_WORKERS=0, WEB_THREADS=1), 8000)
+
+    assert opciones['workers'] == 6
+    assert opciones['worker_class'] == 'sync'
+
+def test_hooks_reinician_y_liberan_en_orden_inverso():
+    """Prueba que post_fork reinicie los recursos y worker_exit los libere en orden inverso."""
+    app = _app()
+    eventos = []
+    registrar_recurso(app, tras_fork=lambda: eventos.append('fork logging'), al_salir=lambda: eventos.append('salir logging'))
+    registrar_recurso(app, tras_fork=lambda: eventos.append('fork pool'), al_salir=lambda: eventos.append('salir pool'))
+    registrar_recurso(app, al_salir=lambda: eventos.append('salir ejecutor'))
+
+    opciones = opciones_gunicorn(app, 5000)
+    opciones['post_fork'](None, None)
+    opciones['worker_exit'](None, None)
+
+    assert eventos == ['fork logging', 'fork pool', 'salir ejecutor', 'salir pool', 'salir logging']
+
+def test_reiniciar_logging_crea_listener_nuevo(capsys):
+    """Prueba que tras reiniciar el logging los registros se escriban con el listener nuevo."""
+    app = _app()
+    configure_logging(app)
+    anterior = app.extensions[EXTENSION_LOGGING]
+    try:
+        reiniciar_logging(app)
+        assert app.extensions[EXTENSION_LOGGING] is not anterior
+        app.logger.warning("Worker %d listo", 2)
+    finally:
+        detener_logging(app)
+        anterior.stop()
+
+    lineas = [json.loads(l) for l in capsys.readouterr().err.splitlines()]
+    assert lineas[-1]['mensaje'] == 'Worker 2 listo'
+
+def test_ejecutor_hash_reiniciar_y_cerrar():
+    """Prueba que el ejecutor funcione tras reiniciarse y que cerrar espere los trabajos."""
+    ejecutor = EjecutorHash(max_workers=1, max_cola=1)
+    assert ejecutor.ejecutar(pow, 2, 10) == 1024
+
+    ejecutor.reiniciar()
+    assert ejecutor.estadisticas()['completados'] == 0
+    assert ejecutor.ejecutar(pow, 3, 2) == 9
+
+    ejecutor.cerrar()
+    assert ejecutor.estadisticas()['en_curso'] == 0
+
+def test_create_app_registra_recursos_por_worker(app):
+    """Prueba que la app registre logging, pool de DB y ejecutor de hashing como recursos por worker."""
+    reiniciar_tras_fork(app)
+    assert len(app.extensions['recursos_worker']) == 3
+
+def test_logins_no_ocupan_todos_los_hilos_del_worker(app, client):
+    """Prueba que con el ejecutor de bcrypt saturado quede un hilo del worker para un pedido sin autenticación."""
+    hilos_worker = app.config['WEB_THREADS']
+    ejecutor = auth_controller.auth_service.ejecutor_hash
+    assert ejecutor.max_admitidos == hilos_worker - 1
+
+    liberar = threading.Event()
+    def login():
+        try:
+            return ejecutor.ejecutar(liberar.wait)
+        except ColaHashLlenaError:
+            return 503
+
+    # Un pool con los hilos de un worker gthread: cada pedido ocupa un hilo hasta responder
+    with ThreadPoolExecutor(max_workers=hilos_worker) as worker:
+        logins = [worker.submit(login) for _ in range(hilos_worker + 2)]
+        while ejecutor.estadisticas()['en_curso'] < hilos_worker - 1:
+            time.sleep(0.001)
+
+        health = worker.submit(client.get, '/api/health')
+        try:
+            assert health.result(timeout=5).status_code == 200
+            assert sum(1 for l in logins if l.done() and l.result() == 503) == 3
+        finally:
+            liberar.set()
+        assert all(l.result() in (True, 503) for l in logins)
@@ -1,4 +1,5 @@
 from unittest.mock import patch
+from datetime import datetime
 
 # Datos de prueba para simplificar
 FECHA_OK = "2025-11-18"
@@ -29,6 +30,50 @@ def test_consultar_disponibilidad_parametros_faltantes(mock_service, client, cli
     assert response.status_code == 400
     assert 'Se requiere el parámetro "fecha"' in response.get_json()['message']
 
+@patch('app.turnos.turno_controller.turno_service')
+def test_consultar_disponibilidad_rango_resumen(mock_service, client, client_token_data):
+    """Prueba la consulta de disponibilidad de un rango en modo resumen."""
+    mock_service.consultar_disponibilidad_rango.return_value = ({'2025-11-18': 18, '2025-11-19': 0}, None)
+
+    response = client.get('/api/turnos/disponibilidad/rango?desde=2025-11-18&hasta=2025-11-19&resumen=1',
+                          headers=client_token_data['headers'])
+
+    assert response.status_code == 200
+    assert response.get_json()['libres_por_dia'] == {'2025-11-18': 18, '2025-11-19': 0}
+    mock_service.consultar_disponibilidad_rango.assert_called_once_with('2025-11-18', '2025-11-19', True)
+
+@patch('app.turnos.turno_controller.turno_service')
+def test_consultar_disponibilidad_rango_error(mock_service, client, client_token_data):
+    """Prueba que la consulta de un rango falle sin parámetros o con un rango inválido."""
+    response = client.get('/api/turnos/disponibilidad/rango?desde=2025-11-18', headers=client_token_data['headers'])
+    assert response.status_code == 400
+
+    mock_service.consultar_disponibilidad_rango.return_value = (None, 'El rango no puede superar los 62 días.')
+    response = client.get('/api/turnos/disponibilidad/rango?desde=2025-01-01&hasta=2025-12-31',
+                          headers=client_token_data['headers'])
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'El rango no puede superar los 62 días.'
+
+@patch('app.turnos.turno_controller.turno_service')
+def test_consultar_proximo_libre_ok(mock_service, client, client_token_data):
+    """Prueba la consulta del próximo turno libre (éxito)."""
+    mock_service.consultar_proximo_libre.return_value = ({'id_turno': 7, 'fecha': '2025-11-18T09:30:00', 'estado': 'LIBRE'}, None)
+
+    response = client.get('/api/turnos/proximo-libre?desde=2025-11-18T09:10', headers=client_token_data['headers'])
+
+    assert response.status_code == 200
+    assert response.get_json()['turno']['id_turno'] == 7
+    mock_service.consultar_proximo_libre.assert_called_once_with('2025-11-18T09:10')
+
+@patch('app.turnos.turno_controller.turno_service')
+def test_consultar_proximo_libre_sin_turnos(mock_service, client, client_token_data):
+    """Prueba que se devuelva 404 si no hay turnos libres en el período."""
+    mock_service.consultar_proximo_libre.return_value = (None, None)
+
+    response = client.get('/api/turnos/proximo-libre', headers=client_token_data['headers'])
+
+    assert response.status_code == 404
+
 @patch('app.turnos.turno_controller.turno_service')
 def test_reservar_turno_exito(mock_service, client, client_token_data):
     """Prueba la reserva de un turno (éxito)."""
@@ -61,6 +106,50 @@ def test_reservar_turno_exito(mock_service, client, client_token_data):
         payload['id_turno']
     )
 
+@patch('app.turnos.turno_controller.turno_service')
+def test_reservar_turno_por_horario(mock_service, client, client_token_data):
+    """Prueba que una reserva con fecha y sin id_turno se haga por horario (agenda virtual)."""
+    mock_service.reservar_horario.return_value = ({'id_turno': 9, 'estado': 'RESERVADO'}, None)
+
+    response = client.post('/api/turnos/reservar', headers=client_token_data['headers'], json={
+        'matricula': MATRICULA_VEHICULO, 'id_marca': 1, 'anio': 2020, 'fecha': '2025-11-18T09:30'
+    })
+
+    assert response.status_code == 201
+    mock_service.reservar_horario.assert_called_once_with(MATRICULA_VEHICULO, 1, 2020, '2025-11-18T09:30')
+    mock_service.reservar_turno.assert_not_called()
+
+@patch('app.turnos.turno_controller.turno_service')
+def test_reservar_turno_sin_id_ni_fecha(mock_service, client, client_token_data):
+    """Prueba que una reserva sin id_turno ni fecha falle indicando que se requiere alguno de los dos."""
+    response = client.post('/api/turnos/reservar', headers=client_token_data['headers'], json={
+        'matricula': MATRICULA_VEHICULO, 'id_marca': 1, 'anio': 2020
+    })
+
+    assert response.status_code == 400
+    assert 'id_turno o fecha' in response.get_json()['message']
+    mock_service.reservar_turno.assert_not_called()
+    mock_service.reservar_horario.assert_not_called()
+
+@patch('app.turnos.turno_controller.turno_service')
+def test_reservar_proximo(mock_service, client, client_token_data):
+    """Prueba la reserva del próximo turno libre elegido por el servidor."""
+    mock_service.reservar_proximo.return_value = ({'id_turno': 12, 'estado': 'RESERVADO'}, None)
+
+    response = client.post('/api/turnos/reservar-proximo', headers=client_token_data['headers'], json={
+        'matricula': MATRICULA_VEHICULO, 'id_marca': 1, 'anio': 2020, 'desde': '2025-11-18T09:00'
+    })
+
+    assert response.status_code == 201
+    assert response.get_json()['turno']['id_turno'] == 12
+    mock_service.reservar_proximo.assert_called_once_with(MATRICULA_VEHICULO, 1, 2020, '2025-11-18T09:00', None)
+
+    mock_service.reservar_proximo.return_value = (None, 'No hay turnos libres en el período consultado.')
+    response = client.post('/api/turnos/reservar-proximo', headers=client_token_data['headers'], json={
+        'matricula': MATRICULA_VEHICULO, 'id_marca': 1, 'anio': 2020, 'desde': '2025-11-18'
+    })
+    assert response.status_code == 409
+
 @patch('app.turnos.turno_controller.turno_service')
 def test_reservar_turno_sin_permiso(mock_service, client, inspector_token_data):
     """Prueba que un inspector no pueda reservar un turno."""
@@ -129,6 +218,49 @@ def test_consultar_turnos_pendientes_vacio(mock_service, client, inspector_token
     assert len(response.get_json()['turnos_pendientes']) == 0
     mock_service.consultar_turnos_pendientes.assert_called_once()
 
+@patch('app.turnos.turno_controller.turno_service')
+def test_consultar_turnos_pendientes_paginado(mock_service, client, inspector_token_data):
+    """Prueba que una página completa devuelva un cursor que posiciona la página siguiente."""
+    mock_service.consultar_turnos_pendientes.return_value = ([
+        {'id_turno': 1, 'fecha': '2025-11-18T09:00:00', 'estado': 'RESERVADO'},
+        {'id_turno': 2, 'fecha': '2025-11-18T09:30:00', 'estado': 'RESERVADO'}
+    ], None)
+
+    response = client.get('/api/turnos/pendientes?limite=2', headers=inspector_token_data['headers'])
+    cursor = response.get_json()['siguiente_cursor']
+
+    assert response.status_code == 200
+    assert cursor
+    assert response.headers['X-Siguiente-Cursor'] == cursor
+    mock_service.consultar_turnos_pendientes.assert_called_with(2, None)
+
+    client.get(f'/api/turnos/pendientes?limite=2&cursor={cursor}', headers=inspector_token_data['headers'])
+    mock_service.consultar_turnos_pendientes.assert_called_with(2, (datetime(2025, 11, 18, 9, 30), 2))
+
+@patch('app.turnos.turno_controller.turno_service')
+def test_consultar_turnos_pendientes_parametros_invalidos(mock_service, client, inspector_token_data):
+    """Prueba que un límite fuera de rango o un cursor corrupto devuelvan 400."""
+    response = client.get('/api/turnos/pendientes?limite=0', headers=inspector_token_data['headers'])
+    assert response.status_code == 400
+
+    response = client.get('/api/turnos/pendientes?cursor=no-es-un-cursor', headers=inspector_token_data['headers'])
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Cursor inválido.'
+    mock_service.consultar_turnos_pendientes.assert_not_called()
+
+@patch('app.turnos.turno_controller.turno_service')
+def test_consultar_turnos_pendientes_stream(mock_service, client, inspector_token_data):
+    """Prueba que el modo stream devuelva todos los pendientes sin paginar."""
+    pendientes = [{'id_turno': i, 'estado': 'RESERVADO', 'matricula': 'ÑANDÚ'} for i in range(250)]
+    mock_service.iterar_turnos_pendientes.return_value = iter(pendientes)
+
+    response = client.get('/api/turnos/pendientes?stream=1', headers=inspector_token_data['headers'])
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.get_json() == {'turnos_pendientes': pendientes}
+    mock_service.consultar_turnos_pendientes.assert_not_called()
+
 @patch('app.turnos.turno_controller.turno_service')
 def test_consultar_turnos_pendientes_sin_permiso(mock_service, client, client_token_data):
     """Prueba que un cliente no pueda consultar turnos pendientes."""
@@ -1,6 +1,11 @@
 # tests/test_turno_service.py
 from unittest.mock import MagicMock
-from app.turnos.turno_service import TurnoService
+from app.turnos.turno_service import TurnoService, RESERVA_POR_ID_CON_AGENDA
+from app.cache import CacheLRU
+from app.models import Turno
+from app.turnos.agenda import HorarioLibre
+from datetime import datetime, date, timedelta
+from app.dao.turno_dao import RESERVA_OK, RESERVA_NO_ENCONTRADO, RESERVA_CONFLICTO, RESERVA_ERROR
 
 
 def test_consultar_disponibilidad_ok():
@@ -24,6 +29,32 @@ def test_consultar_disponibilidad_ok():
     assert resultado[0]['id_turno'] == 1
     assert resultado[1]['id_turno'] == 2
 
+def test_consultar_disponibilidad_usa_cache_e_invalida():
+    """Prueba que la disponibilidad se cachee por fecha y se invalide al escribir turnos de esa fecha."""
+    turno_dao = MagicMock()
+    vehiculo_dao = MagicMock()
+    resultado_dao = MagicMock()
+
+    turno = MagicMock()
+    turno.to_dict.return_value = {'id_turno': 1, 'estado': 'LIBRE'}
+    turno_dao.obtener_disponibles_por_fecha.return_value = [turno]
+
+    service = TurnoService(turno_dao, vehiculo_dao, resultado_dao, CacheLRU(max_entradas=10))
+    service.consultar_disponibilidad('2024-06-15')
+    service.consultar_disponibilidad('2024-06-15')
+
+    assert turno_dao.obtener_disponibles_por_fecha.call_count == 1
+
+    # El DAO notifica los turnos escritos; solo se invalida su fecha
+    notificar = turno_dao.agregar_observador.call_args[0][0]
+    notificar([Turno(id_turno=1, fecha=datetime(2024, 6, 16, 9, 0))])
+    service.consultar_disponibilidad('2024-06-15')
+    assert turno_dao.obtener_disponibles_por_fecha.call_count == 1
+
+    notificar([Turno(id_turno=1, fecha=datetime(2024, 6, 15, 9, 0))])
+    service.consultar_disponibilidad('2024-06-15')
+    assert turno_dao.obtener_disponibles_por_fecha.call_count == 2
+
 def test_consultar_disponibilidad_formato_fecha_invalido():
     """Prueba que la consulta de disponibilidad falle si la fecha es inválida."""
     # Configurar el mock no es necesario aquí ya que no se llegará a llamar al DAO
@@ -37,24 +68,218 @@ def test_consultar_disponibilidad_formato_fecha_invalido():
 
     assert resultado is None
 
+def test_consultar_disponibilidad_rango_agrupa_por_dia():
+    """Prueba que el rango se resuelva con una consulta y se agrupe por día, incluyendo los días sin turnos."""
+    turno_dao = MagicMock()
+    turno_dao.obtener_disponibles_por_rango.return_value = [
+        Turno(id_turno=1, fecha=datetime(2024, 6, 15, 9, 0), estado='LIBRE'),
+        Turno(id_turno=2, fecha=datetime(2024, 6, 15, 9, 30), estado='LIBRE'),
+        Turno(id_turno=3, fecha=datetime(2024, 6, 17, 9, 0), estado='LIBRE'),
+    ]
+
+    service = TurnoService(turno_dao, MagicMock(), MagicMock())
+    resultado, error = service.consultar_disponibilidad_rango('2024-06-15', '2024-06-17')
+
+    assert error is None
+    assert list(resultado) == ['2024-06-15', '2024-06-16', '2024-06-17']
+    assert [t['id_turno'] for t in resultado['2024-06-15']] == [1, 2]
+    assert resultado['2024-06-16'] == []
+    turno_dao.obtener_disponibles_por_rango.assert_called_once_with(date(2024, 6, 15), date(2024, 6, 17))
+
+def test_consultar_disponibilidad_rango_resumen():
+    """Prueba que el resumen use el conteo por día del DAO y complete con 0 los días sin turnos libres."""
+    turno_dao = MagicMock()
+    turno_dao.contar_disponibles_por_dia.return_value = {date(2024, 6, 15): 18, date(2024, 6, 17): 3}
+
+    service = TurnoService(turno_dao, MagicMock(), MagicMock())
+    resultado, error = service.consultar_disponibilidad_rango('2024-06-15', '2024-06-17', resumen=True)
+
+    assert error is None
+    assert resultado == {'2024-06-15': 18, '2024-06-16': 0, '2024-06-17': 3}
+    turno_dao.obtener_disponibles_por_rango.assert_not_called()
+
+def test_consultar_disponibilidad_rango_invalido(app):
+    """Prueba que se rechacen los rangos invertidos o más largos que el máximo configurado."""
+    turno_dao = MagicMock()
+    service = TurnoService(turno_dao, MagicMock(), MagicMock())
+    max_dias = app.config['DISPONIBILIDAD_RANGO_MAX_DIAS']
+    hasta = (date(2024, 6, 1) + timedelta(days=max_dias)).isoformat()
+
+    assert service.consultar_disponibilidad_rango('2024-06-17', '2024-06-15') == \
+        (None, "La fecha 'hasta' no puede ser anterior a 'desde'.")
+    assert service.consultar_disponibilidad_rango('2024-06-01', hasta) == \
+        (None, f"El rango no puede superar los {max_dias} días.")
+    assert service.consultar_disponibilidad_rango('2024-06-01', '2024-06-xx')[1] == "Formato de fecha inválido. Usar YYYY-MM-DD."
+    turno_dao.obtener_disponibles_por_rango.assert_not_called()
+
+def test_disponibilidad_con_agenda_virtual():
+    """Prueba que con agenda virtual la disponibilidad se calcule con las reglas y no con el DAO de turnos."""
+    turno_dao = MagicMock()
+    agenda = MagicMock()
+    agenda.disponibles.return_value = {date(2024, 6, 15): [HorarioLibre(datetime(2024, 6, 15, 9, 0), 3)]}
+
+    service = TurnoService(turno_dao, MagicMock(), MagicMock(), agenda=agenda)
+    resultado, _ = service.consultar_disponibilidad('2024-06-15')
+    resumen, _ = service.consultar_disponibilidad_rango('2024-06-15', '2024-06-15', resumen=True)
+
+    assert resultado == [{**Turno(fecha=datetime(2024, 6, 15, 9, 0)).to_dict(), 'cupos': 3}]
+    assert resumen == {'2024-06-15': 3}
+    turno_dao.obtener_disponibles_por_fecha.assert_not_called()
+
+def test_reservar_horario_agenda_virtual(app):
+    """Prueba la reserva por horario: valida el slot con las reglas y toma un lugar según su capacidad."""
+    turno_dao = MagicMock()
+    agenda = MagicMock()
+    agenda.capacidad_de.side_effect = lambda fecha: 4 if fecha.minute in (0, 30) else 0
+    turno_dao.reservar_horario.return_value = (
+        RESERVA_OK, Turno(id_turno=7, matricula='ABC123', fecha=datetime(2024, 6, 15, 9, 30), estado='RESERVADO')
+    )
+
+    service = TurnoService(turno_dao, MagicMock(), MagicMock(), agenda=agenda, reloj=lambda: datetime(2024, 6, 1))
+    turno, error = service.reservar_horario('ABC123', 1, 2020, '2024-06-15T09:30')
+
+    assert error is None
+    assert (turno['id_turno'], turno['estado']) == (7, 'RESERVADO')
+    fecha, _, capacidad = turno_dao.reservar_horario.call_args[0]
+    assert (fecha, capacidad) == (datetime(2024, 6, 15, 9, 30), 4)
+
+    turno, error = service.reservar_horario('ABC123', 1, 2020, '2024-06-15T09:10')
+    assert error == "El horario 2024-06-15T09:10 no corresponde a un turno de la agenda."
+
+    turno_dao.reservar_horario.return_value = (RESERVA_CONFLICTO, None)
+    assert service.reservar_horario('XYZ999', 1, 2020, '2024-06-15T09:30')[1] == \
+        "No quedan lugares en el horario 2024-06-15T09:30."
+
+def test_reservar_por_id_y_por_horario_con_agenda_virtual(app):
+    """Prueba que con agenda virtual la reserva por id se rechace y el horario conserve su lugar para la reserva por fecha."""
+    turno_dao = MagicMock()
+    agenda = MagicMock()
+    agenda.capacidad_de.return_value = 1
+    turno_dao.reservar_horario.return_value = (
+        RESERVA_OK, Turno(id_turno=7, matricula='XYZ999', fecha=datetime(2024, 6, 15, 9, 30), estado='RESERVADO')
+    )
+    service = TurnoService(turno_dao, MagicMock(), MagicMock(), agenda=agenda, reloj=lambda: datetime(2024, 6, 1))
+
+    turno, error = service.reservar_turno('ABC123', 1, 2020, 7)
+    assert turno is None
+    assert error == RESERVA_POR_ID_CON_AGENDA
+    turno_dao.reservar.assert_not_called()
+
+    # El único lugar del horario se toma por el contador, sin que la reserva por id lo haya ocupado
+    turno, error = service.reservar_horario('XYZ999', 1, 2020, '2024-06-15T09:30')
+    assert error is None and turno['matricula'] == 'XYZ999'
+    fecha, _, capacidad = turno_dao.reservar_horario.call_args[0]
+    assert (fecha, capacidad) == (datetime(2024, 6, 15, 9, 30), 1)
+
+def test_reservar_horario_pasado_o_fuera_del_horizonte(app):
+    """Prueba que no se reserven horarios pasados ni más allá del horizonte, sin llegar al DAO."""
+    turno_dao = MagicMock()
+    agenda = MagicMock()
+    agenda.capacidad_de.return_value = 4
+    service = TurnoService(turno_dao, MagicMock(), MagicMock(), agenda=agenda, reloj=lambda: datetime(2024, 6, 15, 10, 0))
+    horizonte = app.config['RESERVA_HORIZONTE_DIAS']
+
+    assert service.reservar_horario('ABC123', 1, 2020, '2024-06-15T09:30') == \
+        (None, "El horario 2024-06-15T09:30 ya pasó.")
+    lejano = (datetime(2024, 6, 15, 10, 0) + timedelta(days=horizonte)).isoformat(timespec='minutes')
+    assert service.reservar_horario('ABC123', 1, 2020, lejano) == \
+        (None, f"Solo se puede reservar hasta {horizonte} días hacia adelante.")
+    turno_dao.reservar_horario.assert_not_called()
+
+    # reservar-próximo recorta la ventana a los horarios futuros
+    agenda.disponibles.return_value = {date(2024, 6, 15): [
+        HorarioLibre(datetime(2024, 6, 15, 9, 30), 4, 4), HorarioLibre(datetime(2024, 6, 15, 10, 30), 4, 4),
+    ]}
+    turno_dao.reservar_horario.return_value = (RESERVA_CONFLICTO, None)
+    service.reservar_proximo('ABC123', 1, 2020, '2024-06-15')
+    assert [c[0][0] for c in turno_dao.reservar_horario.call_args_list] == [datetime(2024, 6, 15, 10, 30)]
+    assert service.reservar_proximo('ABC123', 1, 2020, '2024-06-14', '2024-06-14') == \
+        (None, "No hay turnos libres en el período consultado.")
+
+def test_reservar_horario_sin_agenda_virtual():
+    """Prueba que la reserva por horario no esté disponible con la agenda materializada."""
+    turno_dao = MagicMock()
+    service = TurnoService(turno_dao, MagicMock(), MagicMock())
+
+    turno, error = service.reservar_horario('ABC123', 1, 2020, '2024-06-15T09:30')
+
+    assert turno is None
+    turno_dao.reservar_horario.assert_not_called()
+
+def test_reservar_proximo_ventana(app):
+    """Prueba que reservar-próximo delegue en el DAO la ventana [desde, hasta) calculada."""
+    turno_dao = MagicMock()
+    turno_dao.reservar_proximo.return_value = (
+        RESERVA_OK, Turno(id_turno=3, matricula='ABC123', fecha=datetime(2024, 6, 15, 10, 0), estado='RESERVADO')
+    )
+    service = TurnoService(turno_dao, MagicMock(), MagicMock())
+
+    turno, error = service.reservar_proximo('ABC123', 1, 2020, '2024-06-15T09:40')
+    assert error is None and turno['id_turno'] == 3
+    desde, hasta, vehiculo = turno_dao.reservar_proximo.call_args[0]
+    assert (desde, hasta) == (datetime(2024, 6, 15, 9, 40), datetime(2024, 6, 16))
+    assert vehiculo.matricula == 'ABC123'
+
+    # Una fecha sin hora como 'hasta' incluye ese día
+    service.reservar_proximo('ABC123', 1, 2020, '2024-06-15', '2024-06-17')
+    assert turno_dao.reservar_proximo.call_args[0][1] == datetime(2024, 6, 18)
+
+    turno_dao.reservar_proximo.return_value = (RESERVA_NO_ENCONTRADO, None)
+    assert service.reservar_proximo('ABC123', 1, 2020, '2024-06-15') == \
+        (None, "No hay turnos libres en el período consultado.")
+    assert service.reservar_proximo('ABC123', 1, 2020, '2024-06-15', '2024-06-14')[1] == \
+        "La fecha 'hasta' debe ser posterior a 'desde'."
+
+def test_reservar_proximo_agenda_virtual(app):
+    """Prueba que con agenda virtual se prueben en orden los horarios con lugar hasta lograr la reserva."""
+    turno_dao = MagicMock()
+    agenda = MagicMock()
+    agenda.disponibles.return_value = {date(2024, 6, 15): [
+        HorarioLibre(datetime(2024, 6, 15, 9, 0), 1, 4),
+        HorarioLibre(datetime(2024, 6, 15, 9, 30), 2, 4),
+        HorarioLibre(datetime(2024, 6, 15, 10, 0), 4, 4),
+    ]}
+    turno_dao.reservar_horario.side_effect = [
+        (RESERVA_CONFLICTO, None),  # otro cliente tomó el último lugar de las 9:00
+        (RESERVA_OK, Turno(id_turno=8, fecha=datetime(2024, 6, 15, 9, 30), estado='RESERVADO')),
+    ]
+    service = TurnoService(turno_dao, MagicMock(), MagicMock(), agenda=agenda, reloj=lambda: datetime(2024, 6, 1))
+
+    turno, error = service.reservar_proximo('ABC123', 1, 2020, '2024-06-15')
+
+    assert error is None and turno['id_turno'] == 8
+    assert [c[0][0].hour * 60 + c[0][0].minute for c in turno_dao.reservar_horario.call_args_list] == [540, 570]
+    assert turno_dao.reservar_horario.call_args[0][2] == 4
+    agenda.disponibles.assert_called_once_with(date(2024, 6, 15), date(2024, 6, 15))
+
+def test_reservar_proximo_agenda_virtual_limita_intentos(app, monkeypatch):
+    """Prueba que se prueben a lo sumo RESERVA_PROXIMO_MAX_INTENTOS horarios, y al menos uno aunque valga 0."""
+    turno_dao = MagicMock()
+    turno_dao.reservar_horario.return_value = (RESERVA_CONFLICTO, None)
+    agenda = MagicMock()
+    agenda.disponibles.return_value = {date(2024, 6, 15): [
+        HorarioLibre(datetime(2024, 6, 15, 9, 0) + timedelta(minutes=30 * i), 1) for i in range(6)
+    ]}
+    service = TurnoService(turno_dao, MagicMock(), MagicMock(), agenda=agenda, reloj=lambda: datetime(2024, 6, 1))
+
+    for max_intentos, llamadas in ((3, 3), (0, 1)):
+        monkeypatch.setitem(app.config, 'RESERVA_PROXIMO_MAX_INTENTOS', max_intentos)
+        turno_dao.reservar_horario.reset_mock()
+        assert service.reservar_proximo('ABC123', 1, 2020, '2024-06-15') == \
+            (None, "No hay turnos libres en el período consultado.")
+        assert turno_dao.reservar_horario.call_count == llamadas
+
 def test_reservar_turno_ok():
     """Prueba la reserva exitosa de un turno."""
     turno_dao = MagicMock()
     vehiculo_dao = MagicMock()
     resultado_dao = MagicMock()
 
-    vehiculo_dao.crear.return_value = None  # Simula creación exitosa
-
-    turno_previo = MagicMock()
-    turno_previo.estado = 'LIBRE'
-    turno_previo.to_dict.return_value = {'id_turno': 1, 'estado': 'RESERVADO', 'matricula': 'ABC123'}
-
     turno_post = MagicMock()
     turno_post.estado = 'RESERVADO'
     turno_post.to_dict.return_value = {'id_turno': 1, 'estado': 'RESERVADO', 'matricula': 'ABC123'}
 
-    turno_dao.obtener_por_id.return_value = turno_previo
-    turno_dao.actualizar_a_reservado.return_value = turno_post
+    turno_dao.reservar.return_value = (RESERVA_OK, turno_post)
 
     service = TurnoService(turno_dao, vehiculo_dao, resultado_dao)
     resultado, _ = service.reservar_turno('ABC123', 1, 2020, 1)
@@ -62,14 +287,21 @@ def test_reservar_turno_ok():
     assert resultado['estado'] == 'RESERVADO'
     assert resultado['matricula'] == 'ABC123'
 
+    # Toda la reserva ocurre en una sola llamada transaccional al DAO
+    turno_dao.reservar.assert_called_once()
+    id_turno, vehiculo = turno_dao.reservar.call_args[0]
+    assert id_turno == 1
+    assert vehiculo.matricula == 'ABC123'
+    vehiculo_dao.crear.assert_not_called()
+    turno_dao.obtener_por_id.assert_not_called()
+
 def test_reservar_turno_no_encontrado():
     """Prueba que la reserva falle si el turno no existe."""
     turno_dao = MagicMock()
     vehiculo_dao = MagicMock()
     resultado_dao = MagicMock()
 
-    vehiculo_dao.crear.return_value = None  # Simula creación exitosa
-    turno_dao.obtener_por_id.return_value = None  # Simula que no se encuentra el turno
+    turno_dao.reservar.return_value = (RESERVA_NO_ENCONTRADO, None)  # Simula que no se encuentra el turno
 
     service = TurnoService(turno_dao, vehiculo_dao, resultado_dao)
     resultado, mensaje = service.reservar_turno('ABC123', 1, 2020, 999)  # ID de turno inexistente
@@ -83,12 +315,10 @@ def test_reservar_turno_no_libre():
     vehiculo_dao = MagicMock()
     resultado_dao = MagicMock()
 
-    vehiculo_dao.crear.return_value = None  # Simula creación exitosa
-
     turno_previo = MagicMock()
     turno_previo.estado = 'RESERVADO'  # Ya reservado
 
-    turno_dao.obtener_por_id.return_value = turno_previo
+    turno_dao.reservar.return_value = (RESERVA_CONFLICTO, turno_previo)
 
     service = TurnoService(turno_dao, vehiculo_dao, resultado_dao)
     resultado, mensaje = service.reservar_turno('ABC123', 1, 2020, 1)
@@ -102,13 +332,7 @@ def test_reservar_turno_error_actualizacion():
     vehiculo_dao = MagicMock()
     resultado_dao = MagicMock()
 
-    vehiculo_dao.crear.return_value = None  # Simula creación exitosa
-
-    turno_previo = MagicMock()
-    turno_previo.estado = 'LIBRE'
-
-    turno_dao.obtener_por_id.return_value = turno_previo
-    turno_dao.actualizar_a_reservado.return_value = None  # Simula error en actualización
+    turno_dao.reservar.return_value = (RESERVA_ERROR, None)  # Simula error en la transacción
 
     service = TurnoService(turno_dao, vehiculo_dao, resultado_dao)
     resultado, mensaje = service.reservar_turno('ABC123', 1, 2020, 1)
@@ -128,15 +352,34 @@ def test_consultar_turno_finalizado():
     turno.to_dict.return_value = {'id_turno': 1, 'estado': 'FINALIZADO'}
 
     resultado_completo = {'detalles': 'Inspección completa'}
-    resultado_dao.obtener_resultado_completo.return_value = resultado_completo
-
-    turno_dao.obtener_por_id.return_value = turno
+    turno_dao.obtener_con_resultado.return_value = (turno, resultado_completo)
 
     service = TurnoService(turno_dao, vehiculo_dao, resultado_dao)
     resultado, _ = service.consultar_turno(1)
 
     assert resultado['id_turno'] == 1
     assert resultado['resultado_inspeccion'] == resultado_completo
+    resultado_dao.obtener_resultado_completo.assert_not_called()
+
+def test_consultar_turno_finalizado_cacheado():
+    """Prueba que un turno finalizado se sirva desde la cache en consultas repetidas."""
+    turno_dao = MagicMock()
+    vehiculo_dao = MagicMock()
+    resultado_dao = MagicMock()
+
+    turno = MagicMock()
+    turno.estado = 'FINALIZADO'
+    turno.id_resultado = 10
+    turno.to_dict.return_value = {'id_turno': 1, 'estado': 'FINALIZADO'}
+    turno_dao.obtener_con_resultado.return_value = (turno, {'id_resultado': 10, 'detalles_control': []})
+
+    service = TurnoService(turno_dao, vehiculo_dao, resultado_dao, cache_resultados=CacheLRU(max_entradas=10, max_peso=10000))
+    primero, _ = service.consultar_turno(1)
+    segundo, _ = service.consultar_turno(1)
+
+    assert primero == segundo
+    assert segundo['resultado_inspeccion']['id_resultado'] == 10
+    turno_dao.obtener_con_resultado.assert_called_once_with(1)
 
 def test_consultar_turno_no_finalizado():
     """Prueba la consulta de un turno que no está finalizado."""
@@ -149,13 +392,16 @@ def test_consultar_turno_no_finalizado():
     turno.id_resultado = None
     turno.to_dict.return_value = {'id_turno': 1, 'estado': 'RESERVADO'}
 
-    turno_dao.obtener_por_id.return_value = turno
+    turno_dao.obtener_con_resultado.return_value = (turno, None)
 
-    service = TurnoService(turno_dao, vehiculo_dao, resultado_dao)
+    service = TurnoService(turno_dao, vehiculo_dao, resultado_dao, cache_resultados=CacheLRU(max_entradas=10))
     resultado, _ = service.consultar_turno(1)
+    service.consultar_turno(1)
 
     assert resultado['id_turno'] == 1
     assert resultado['resultado_inspeccion'] is None
+    # Los turnos no finalizados pueden cambiar: no se cachean
+    assert turno_dao.obtener_con_resultado.call_count == 2
 
 def test_consultar_turno_no_encontrado():
     """Prueba que la consulta de un turno falle si no se encuentra."""
@@ -163,7 +409,7 @@ def test_consultar_turno_no_encontrado():
     vehiculo_dao = MagicMock()
     resultado_dao = MagicMock()
 
-    turno_dao.obtener_por_id.return_value = None
+    turno_dao.obtener_con_resultado.return_value = (None, None)
 
     service = TurnoService(turno_dao, vehiculo_dao, resultado_dao)
     resultado, mensaje = service.consultar_turno(999)